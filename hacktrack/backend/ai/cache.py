@@ -0,0 +1,60 @@
+import os
+import time
+import hashlib
+from typing import Optional
+
+from sqlalchemy import delete, desc
+from sqlalchemy.future import select
+
+from backend.db.session import AsyncSessionLocal
+from backend.db.models import SummaryCache
+from backend.utils.metrics import SUMMARY_CACHE_LOOKUPS
+
+# entries older than this are treated as misses and removed (default: 7 days)
+SUMMARY_CACHE_TTL = int(os.getenv("SUMMARY_CACHE_TTL", 7 * 24 * 3600))
+# least recently used entries beyond this count are evicted
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", 5000))
+
+# process-wide hit/miss counters
+cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+def cache_key(prompt: str, agent_id: str) -> str:
+    """Hash the exact prompt (and the agent answering it) into a cache key."""
+    return hashlib.sha256(f"{agent_id}\x00{prompt}".encode("utf-8")).hexdigest()
+
+async def get_cached_summary(key: str) -> Optional[dict]:
+    """Return the cached summary for key, or None if it is missing or expired."""
+    now = time.time()
+    async with AsyncSessionLocal() as db:
+        entry = await db.get(SummaryCache, key)
+        if entry is None or now - entry.created_at > SUMMARY_CACHE_TTL:
+            cache_stats["misses"] += 1
+            SUMMARY_CACHE_LOOKUPS.inc(result="miss")
+            return None
+
+        entry.last_used_at = now
+        entry.hits = (entry.hits or 0) + 1
+        await db.commit()
+
+    cache_stats["hits"] += 1
+    SUMMARY_CACHE_LOOKUPS.inc(result="hit")
+    return entry.summary
+
+async def store_summary(key: str, summary: dict):
+    now = time.time()
+    async with AsyncSessionLocal() as db:
+        await db.merge(SummaryCache(key=key, summary=summary, created_at=now, last_used_at=now, hits=0))
+        await db.commit()
+        await evict_summary_cache(db, now)
+
+async def evict_summary_cache(db, now: Optional[float] = None):
+    """Drop expired entries, then the least recently used ones above the size cap."""
+    now = now or time.time()
+    expired = await db.execute(
+        delete(SummaryCache).where(SummaryCache.created_at < now - SUMMARY_CACHE_TTL)
+    )
+    overflow = select(SummaryCache.key).order_by(desc(SummaryCache.last_used_at)).offset(SUMMARY_CACHE_MAX_ENTRIES)
+    lru = await db.execute(delete(SummaryCache).where(SummaryCache.key.in_(overflow)))
+    await db.commit()
+
+    cache_stats["evictions"] += (expired.rowcount or 0) + (lru.rowcount or 0)
@@ -0,0 +1,137 @@
+import os
+import re
+from typing import Dict, Optional
+
+from backend.utils.geo import inferred_countries
+from backend.utils.metrics import PROMPT_TOKENS_SAVED, LLM_CALLS_SKIPPED
+
+# estimated tokens allowed for an event's free text (OTX description or AbuseIPDB comment)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 300))
+# answer events whose countries are already known with a template instead of the agent
+SUMMARY_TEMPLATES = os.getenv("SUMMARY_TEMPLATES", "true").lower() in ("1", "true", "yes")
+
+# START OF COMPACTION
+
+# indicators of compromise carry no meaning for a one-line summary
+_IOC_PATTERNS = [
+    re.compile(r"\bh(?:tt|xx)ps?://\S+", re.I),                          # URLs, incl. defanged hxxp://
+    re.compile(r"\b[\w.+-]+@[\w-]+(?:\[?\.\]?[\w-]+)+\b"),               # email addresses
+    re.compile(r"\b(?:\d{1,3}(?:\[?\.\]?)){3}\d{1,3}(?::\d+)?\b"),        # IPv4, incl. 1[.]2[.]3[.]4 and :port
+    re.compile(r"\b(?:[0-9a-f]{1,4}:){3,7}[0-9a-f]{1,4}\b", re.I),        # IPv6
+    re.compile(r"\b[0-9a-f]{32}\b|\b[0-9a-f]{40}\b|\b[0-9a-f]{64}\b", re.I),  # MD5/SHA1/SHA256
+]
+# raw log dumps: timestamps, syslog prefixes and key=value runs
+_LOG_NOISE = [
+    re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"),
+    re.compile(r"\b[A-Z][a-z]{2} +\d{1,2} \d{2}:\d{2}:\d{2}\b"),
+    re.compile(r"\b\w+\[\d+\]:"),
+    re.compile(r"(?:\b[\w.-]+=\S+\s*){3,}"),
+]
+_WHITESPACE = re.compile(r"\s+")
+_ORPHAN_PUNCTUATION = re.compile(r"\s+([.,;:!?])|\b(?:and|or|from|to|at)\s*(?=[.,;:])")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+def estimate_tokens(text: str) -> int:
+    """Rough local token count: words and punctuation, floored at one token per 4 characters."""
+    if not text:
+        return 0
+    return max(len(_TOKEN_PIECES.findall(text)), len(text) // 4)
+
+def compact_text(text: str) -> str:
+    """Strips IOCs and log noise, collapses whitespace and drops repeated sentences."""
+    for pattern in _IOC_PATTERNS + _LOG_NOISE:
+        text = pattern.sub(" ", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    # "seen at <ip>." leaves "seen at ." behind
+    text = _ORPHAN_PUNCTUATION.sub(lambda m: m.group(1) or "", text)
+    text = _WHITESPACE.sub(" ", text).replace(" .", ".").strip()
+
+    seen, sentences = set(), []
+    for sentence in _SENTENCE_END.split(text):
+        key = sentence.lower()
+        if sentence and key not in seen:
+            seen.add(key)
+            sentences.append(sentence)
+    return " ".join(sentences)
+
+def truncate_to_budget(text: str, budget: int = PROMPT_TOKEN_BUDGET) -> str:
+    """Keeps whole sentences up to `budget` estimated tokens (cutting mid-sentence only if the first is too long)."""
+    if estimate_tokens(text) <= budget:
+        return text
+    kept, used = [], 0
+    for sentence in _SENTENCE_END.split(text):
+        cost = estimate_tokens(sentence)
+        if used + cost > budget:
+            break
+        kept.append(sentence)
+        used += cost
+    if kept:
+        return " ".join(kept)
+    return text[:budget * 4].rsplit(" ", 1)[0] + " …"
+
+def prepare_text(text: Optional[str], budget: int = PROMPT_TOKEN_BUDGET,
+                 savings: Optional[Dict[str, int]] = None) -> Optional[str]:
+    """
+    Compacts and truncates one free-text field. The estimated tokens saved are added
+    to `savings` per stage; they are recorded (record_savings) only once the prompt
+    is actually sent, since prompts are also built just to look up the summary cache.
+    """
+    if not text:
+        return text
+    before = estimate_tokens(text)
+    compacted = compact_text(text)
+    after_compaction = estimate_tokens(compacted)
+    prepared = truncate_to_budget(compacted, budget)
+    after = estimate_tokens(prepared)
+
+    if savings is not None:
+        savings["compaction"] = savings.get("compaction", 0) + before - after_compaction
+        savings["truncation"] = savings.get("truncation", 0) + after_compaction - after
+    return prepared
+
+def record_savings(savings: Dict[str, int]):
+    """Counts the tokens a prepared prompt saved; call once per prompt sent to the agent."""
+    for stage, tokens in savings.items():
+        if tokens > 0:
+            PROMPT_TOKENS_SAVED.inc(tokens, stage=stage)
+
+# END OF COMPACTION
+
+# START OF TEMPLATE SUMMARIES
+
+# first match wins, so more specific categories come first
+ATTACK_CATEGORIES = [
+    ("SSH brute-force attack", re.compile(r"\bssh\b.*\b(brute|login|auth|password)|brute.?forc\w*.*\bssh\b", re.I)),
+    ("brute-force login attempts", re.compile(r"brute.?forc|failed (login|password)|invalid user|authentication fail", re.I)),
+    ("port scan", re.compile(r"port ?scan|\bscann(ing|er)\b|\bnmap\b|\bmasscan\b", re.I)),
+    ("DDoS activity", re.compile(r"\bddos\b|\bsyn flood|\budp flood", re.I)),
+    ("web application attack", re.compile(r"sql ?injection|\bsqli\b|\bxss\b|wp-login|path traversal|\bexploit", re.I)),
+    ("spam", re.compile(r"\bspam|\bsmtp\b", re.I)),
+    ("phishing", re.compile(r"phish", re.I)),
+]
+
+def template_summary(event) -> Optional[dict]:
+    """
+    A summary built without the agent, for events whose countries are known and
+    whose text names a recognisable attack type. Returns None when the agent is needed.
+    """
+    if not SUMMARY_TEMPLATES:
+        return None
+    attacker, victim = inferred_countries(event)
+    if not attacker or not victim:
+        return None
+
+    # the title when there is one; long descriptions mention too many attack types in passing
+    text = getattr(event, "title", None) or getattr(event, "description", None) or ""
+    for category, pattern in ATTACK_CATEGORIES:
+        if pattern.search(text):
+            LLM_CALLS_SKIPPED.inc(reason="template")
+            return {
+                "summary": f"A host in {attacker} was reported for {category} against a system in {victim}.",
+                "attacker_country": attacker,
+                "victim_country": victim,
+            }
+    return None
+
+# END OF TEMPLATE SUMMARIES
@@ -1,9 +1,15 @@
 import os
 import json
+import time
 import textwrap
-from typing import Optional, Dict, Any, TypedDict, Tuple # Added Tuple import
+from typing import Optional, Dict, Any, TypedDict, Tuple, List, Union # Added Tuple import
 from mistralai import Mistral
-import random # Added for randomization
+
+from backend.ai.cache import cache_key, get_cached_summary, store_summary
+from backend.ai.prompt import prepare_text, record_savings, template_summary
+from backend.utils.country_coords import COUNTRY_INDEX
+from backend.utils.arc_geometry import ARC_GEOMETRY
+from backend.utils.metrics import LLM_REQUEST_SECONDS, record_llm_usage
 
 # Define the expected JSON output structure (full country names)
 class SummaryOutput(TypedDict):
@@ -11,47 +17,57 @@ class SummaryOutput(TypedDict):
     attacker_country: str
     victim_country: str
 
-# New type hint for the return value of get_coords_or_random
-ResolvedCoordTuple = Tuple[Optional[Dict[str, float]], str] 
+# shared Mistral client, created on first use and reused by every call
+_client: Optional[Mistral] = None
 
-# Changed return type to SummaryOutput
-async def summarize_event(event) -> SummaryOutput:
-    """
-    Connects to the Mistral AI API to summarize event details.
-    Uses the modern Mistral SDK with async support.
-    """
-    api_key = os.getenv("MISTRAL_API_KEY")
-    if not api_key:
-        raise RuntimeError("MISTRAL_API_KEY environment variable not set.")
+def get_client() -> Mistral:
+    global _client
+    if _client is None:
+        api_key = os.getenv("MISTRAL_API_KEY")
+        if not api_key:
+            raise RuntimeError("MISTRAL_API_KEY environment variable not set.")
+        _client = Mistral(api_key=api_key)
+    return _client
 
-    # Initialize the modern Mistral client
-    client = Mistral(api_key=api_key)
+def set_client(client):
+    """Replace the shared client, e.g. with a local stand-in for benchmarks."""
+    global _client
+    _client = client
 
-    attacker_country = 'None'
-    victim_country = 'None'
-    description = 'No description provided'
-    
+def get_agent_id() -> str:
+    return os.getenv("MISTRAL_AGENT_ID", "ag:9cb2eb21:20251005:hacktrackai:51b9f218")
+
+async def _call_agent(client, agent_id: str, messages, mode: str):
+    """Every agent request goes through here so latency and token usage are recorded."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        response = await client.agents.complete_async(agent_id=agent_id, messages=messages)
+        outcome = "ok"
+    finally:
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, mode=mode, outcome=outcome)
+    record_llm_usage(response)
+    return response
+
+def _is_valid_summary(output) -> bool:
+    return isinstance(output, dict) and all(k in output for k in ["summary", "attacker_country", "victim_country"])
+
+def build_prompt(event, savings: Optional[Dict[str, int]] = None) -> str:
+    """
+    Builds the user message sent to the Mistral agent for a single event.
+    Free text is compacted (IOCs and log noise removed) and cut to PROMPT_TOKEN_BUDGET;
+    pass `savings` to collect the estimated tokens that saved.
+    """
     if hasattr(event, 'source'):
-        if event.source == "OTX":
-            description = event.otx_description or 'No description provided'
-            victim_country = event.otx_country or 'None'
-            user_input_detail = textwrap.dedent(f"""
-                Attack Name: {event.otx_name or 'Unknown'}
-                Attack Description: {description}
-                Victim's Country: {victim_country}
-                Attacker's Country: {attacker_country} 
-            """).strip()
-        elif event.source == "AbuseIPDB":
-            description = event.abuse_attack or 'No description provided'
-            attacker_country = event.abuse_attacker_country or 'None'
-            victim_country = event.abuse_victim_country or 'None'
-            user_input_detail = textwrap.dedent(f"""
-                Attacker's Country: {attacker_country}
-                Victim's Country: {victim_country}
-                Attack Description: {description}
-            """).strip()
-        else:
-            raise ValueError(f"Unknown event source: {event.source!r}")
+        # the same normalised fields for every feed; feeds without a title skip that line
+        description = prepare_text(event.description, savings=savings) or 'No description provided'
+        lines = [f"Attack Name: {event.title}"] if event.title else []
+        lines += [
+            f"Attack Description: {description}",
+            f"Attacker's Country: {event.attacker_country or 'None'}",
+            f"Victim's Country: {event.victim_country or 'None'}",
+        ]
+        user_input_detail = "\n".join(lines)
     else:
         # Simulated event structure - pass as much context as possible
         raw_data = event.raw_data if hasattr(event, 'raw_data') and event.raw_data else {}
@@ -68,6 +84,31 @@ async def summarize_event(event) -> SummaryOutput:
             Attacker's Country: None
         """).strip()
 
+    return user_input_detail
+
+# Changed return type to SummaryOutput
+async def summarize_event(event) -> SummaryOutput:
+    """
+    Connects to the Mistral AI API to summarize event details.
+    Uses the modern Mistral SDK with async support.
+    Identical prompts are answered from the summary cache without a network call,
+    and events a template can describe never reach the agent.
+    """
+    templated = template_summary(event)
+    if templated is not None:
+        return templated
+
+    client = get_client()
+    agent_id = get_agent_id()
+    savings: Dict[str, int] = {}
+    user_input_detail = build_prompt(event, savings)
+
+    key = cache_key(user_input_detail, agent_id)
+    cached = await get_cached_summary(key)
+    if cached is not None:
+        return cached
+    record_savings(savings)
+
     messages = [
         {
             "role": "user",
@@ -77,74 +118,203 @@ async def summarize_event(event) -> SummaryOutput:
 
     response = None
     try:
-        agent_id = os.getenv("MISTRAL_AGENT_ID", "ag:9cb2eb21:20251005:hacktrackai:51b9f218")
-        
-        response = await client.agents.complete_async(
-            agent_id=agent_id,
-            messages=messages,
-        )
+        response = await _call_agent(client, agent_id, messages, mode="single")
         
         # Parse the JSON response
         json_content = response.choices[0].message.content.strip()
         summary_output: SummaryOutput = json.loads(json_content)
         
-        if not all(k in summary_output for k in ["summary", "attacker_country", "victim_country"]):
+        if not _is_valid_summary(summary_output):
             raise ValueError("Mistral agent returned invalid JSON structure.")
         
-        return summary_output
-        
     except Exception as e:
         raw_response = response.choices[0].message.content if response and response.choices else 'N/A'
         raise RuntimeError(f"Mistral Agent API call failed or returned unparsable JSON: {e}\nRaw AI Response: {raw_response}") from e
 
+    await store_summary(key, summary_output)
+    return summary_output
 
-# Signature changed to accept country names, not the event object
-def create_arc_json(attacker_country_name: str, victim_country_name: str) -> Optional[Dict[str, Any]]:
+# START OF BATCHED SUMMARISATION
+
+BATCH_INSTRUCTIONS = textwrap.dedent("""
+    You will receive several independent events as a JSON array of objects with "id" and "event" fields.
+    Handle each event exactly as you would on its own, then reply with ONLY a JSON array containing one
+    object per event: {"id": <id>, "summary": ..., "attacker_country": ..., "victim_country": ...}.
+""").strip()
+
+class AdaptiveBatchSize:
     """
-    Creates a JSON object for ARC visualization using AI-inferred full country names.
-    If a country name is not found in the centroids file, it uses a random country's coordinates.
-    The function returns a dictionary containing the 'arc' coordinates and the 
-    'resolved_names' (the actual country names used for plotting).
+    Picks how many events to pack into one agent call.
+    Grows additively while calls are fast and clean, halves on slow calls or high error rates.
     """
+    def __init__(self, initial: int = 10, minimum: int = 1, maximum: int = 25,
+                 target_latency: float = 20.0, max_error_rate: float = 0.2, smoothing: float = 0.3):
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+        self.smoothing = smoothing
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+
+    def record(self, latency: float, batch_size: int, errors: int):
+        rate = errors / batch_size if batch_size else 0.0
+        a = self.smoothing
+        self.latency = latency if self.latency is None else a * latency + (1 - a) * self.latency
+        self.error_rate = a * rate + (1 - a) * self.error_rate
+
+        if self.error_rate > self.max_error_rate or self.latency > self.target_latency:
+            self.size = max(self.minimum, self.size // 2)
+        elif batch_size >= self.size:
+            self.size = min(self.maximum, self.size + 1)
+
+batch_sizer = AdaptiveBatchSize(
+    initial=int(os.getenv("SUMMARY_BATCH_SIZE", 10)),
+    maximum=int(os.getenv("SUMMARY_BATCH_MAX", 25)),
+    target_latency=float(os.getenv("SUMMARY_BATCH_TARGET_LATENCY", 20.0)),
+)
+
+async def summarize_events_batch(events: List[Any]) -> List[Union[SummaryOutput, Exception]]:
+    """
+    Summarises several events with as few agent calls as possible.
+    Templated and cached events are answered locally; the rest are packed into one call whose
+    JSON array reply is matched back by event id. Items that come back missing, malformed or
+    under an id that wasn't asked for are split off and retried on their own, so one bad item
+    never costs the whole batch. Returns one summary or Exception per event, in order.
+    """
+    agent_id = get_agent_id()
+    results: List[Union[SummaryOutput, Exception, None]] = [None] * len(events)
+    # (position in events, event id, prompt, cache key)
+    pending: List[Tuple[int, int, str, str]] = []
+
+    for i, event in enumerate(events):
+        templated = template_summary(event)
+        if templated is not None:
+            results[i] = templated
+            continue
+        savings: Dict[str, int] = {}
+        try:
+            prompt = build_prompt(event, savings)
+        except Exception as e:
+            results[i] = e
+            continue
+        key = cache_key(prompt, agent_id)
+        cached = await get_cached_summary(key)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append((i, event.id, prompt, key))
+            # counted once per event, however many retries its prompt goes out in
+            record_savings(savings)
+
+    if pending:
+        started = time.monotonic()
+        stats = {"calls": 0}
+        answers = await _summarise_items([(event_id, prompt) for _, event_id, prompt, _ in pending], agent_id, stats)
+        errors = sum(isinstance(a, Exception) for a in answers.values())
+        batch_sizer.record(time.monotonic() - started, len(pending), errors)
+        print(f"[INFO] batched summarisation: {len(pending)} events in {stats['calls']} agent calls, "
+              f"next batch size {batch_sizer.size}")
+
+        for i, event_id, prompt, key in pending:
+            answer = answers[event_id]
+            if not isinstance(answer, Exception):
+                await store_summary(key, answer)
+            results[i] = answer
+
+    return results
+
+async def _summarise_items(items: List[Tuple[int, str]], agent_id: str,
+                           stats: Dict[str, int]) -> Dict[int, Union[SummaryOutput, Exception]]:
+    """Answers (event id, prompt) items, keyed by event id; every agent call made is counted in stats["calls"]."""
+    if len(items) == 1:
+        event_id, prompt = items[0]
+        stats["calls"] += 1
+        try:
+            return {event_id: await _complete_single(prompt, agent_id)}
+        except Exception as e:
+            return {event_id: e}
+
+    stats["calls"] += 1
     try:
-        with open("backend/utils/countries_centroids.json", "r") as f:
-            country_coords = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        print(f"Warning: Failed to load country coordinates: {e}")
-        return None
+        answers = await _complete_batch(items, agent_id)
+    except Exception:
+        # the whole reply was unusable, retry each half separately
+        answers = {}
 
-    # Get a list of all country names that have coordinates, excluding "Undetermined"
-    valid_country_names = [
-        name for name in country_coords.keys() 
-        if name.strip() != "Undetermined" and country_coords[name] is not None
-    ]
-    
-    # Helper to get coordinates AND the resolved country name
-    def get_coords_or_random(country_name: str, coords_map: Dict[str, Any], valid_names: list) -> ResolvedCoordTuple:
-        """Looks up coordinates, or returns coordinates of a random valid country, and the resolved name."""
-        
-        name_to_check = country_name.strip()
-        coords = coords_map.get(name_to_check)
-        
-        if coords:
-            # Found the specific country.
-            return coords, name_to_check
-        
-        if valid_names:
-            # Not found, prioritize randomization. Return the random country's name.
-            random_name = random.choice(valid_names)
-            return coords_map[random_name], random_name
-        
-        # Last resort: return None coordinates and 'Unknown' name.
-        return None, 'Unknown'
+    retry = [item for item in items if item[0] not in answers]
+    if retry:
+        if len(retry) == len(items):
+            mid = len(retry) // 2
+            answers.update(await _summarise_items(retry[:mid], agent_id, stats))
+            answers.update(await _summarise_items(retry[mid:], agent_id, stats))
+        else:
+            answers.update(await _summarise_items(retry, agent_id, stats))
+    return answers
+
+async def _complete_single(prompt: str, agent_id: str) -> SummaryOutput:
+    response = await _call_agent(get_client(), agent_id, [{"role": "user", "content": prompt}], mode="single")
+    summary_output = json.loads(response.choices[0].message.content.strip())
+    if not _is_valid_summary(summary_output):
+        raise ValueError(f"Mistral agent returned invalid JSON structure: {summary_output!r}")
+    return summary_output
+
+async def _complete_batch(items: List[Tuple[int, str]], agent_id: str) -> Dict[int, SummaryOutput]:
+    """
+    Sends one packed request and returns only the well-formed answers, keyed by event id.
+    An answer is only trusted under an id that was sent and that no other answer also claims,
+    so a reordered reply still lands on the right events and a garbled one is retried.
+    """
+    payload = json.dumps([{"id": event_id, "event": prompt} for event_id, prompt in items])
+    messages = [{"role": "user", "content": f"{BATCH_INSTRUCTIONS}\n\n{payload}"}]
+    response = await _call_agent(get_client(), agent_id, messages, mode="batch")
+    content = response.choices[0].message.content.strip()
+    # tolerate replies wrapped in a markdown code fence
+    if content.startswith("```"):
+        content = content.strip("`").partition("\n")[2]
+    parsed = json.loads(content)
+    if not isinstance(parsed, list):
+        raise ValueError("Mistral agent did not return a JSON array for a batch request.")
 
+    wanted = {event_id for event_id, _ in items}
+    answers: Dict[int, SummaryOutput] = {}
+    claimed = set()
+    for obj in parsed:
+        if not _is_valid_summary(obj):
+            continue
+        event_id = obj.get("id")
+        # ids go out as JSON numbers; agents sometimes quote them
+        if isinstance(event_id, str) and event_id.isdigit():
+            event_id = int(event_id)
+        if isinstance(event_id, bool) or event_id not in wanted:
+            continue
+        if event_id in claimed:
+            # two answers for one event: neither can be trusted
+            answers.pop(event_id, None)
+            continue
+        claimed.add(event_id)
+        answers[event_id] = {k: obj[k] for k in ("summary", "attacker_country", "victim_country")}
+    return answers
 
-    # Use the helper function for both source (attacker) and destination (victim)
-    final_src_coords, resolved_attacker_name = get_coords_or_random(attacker_country_name, country_coords, valid_country_names)
-    final_dst_coords, resolved_victim_name = get_coords_or_random(victim_country_name, country_coords, valid_country_names)
+# END OF BATCHED SUMMARISATION
+
+
+# Signature changed to accept country names, not the event object
+def create_arc_json(attacker_country_name: str, victim_country_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Creates a JSON object for ARC visualization using AI-inferred full country names.
+    Names are resolved through the process-wide country index (aliases, ISO codes,
+    loose spellings); only names it cannot place fall back to a random country.
+    The function returns a dictionary containing the 'arc' coordinates (plus the
+    precomputed great-circle 'path' when both ends are distinct countries) and the
+    'resolved_names' (the actual country names used for plotting).
+    """
+    final_src_coords, resolved_attacker_name = COUNTRY_INDEX.coords_or_random(attacker_country_name)
+    final_dst_coords, resolved_victim_name = COUNTRY_INDEX.coords_or_random(victim_country_name)
     
     # Fallback to "Undetermined" coordinates if random choice also failed (i.e., country_centroids was near empty)
-    default_coords = country_coords.get("Undetermined")
+    default_coords = COUNTRY_INDEX.centroids.get("Undetermined")
     
     # Apply Undetermined fallback coordinates if necessary
     final_src_coords = final_src_coords if final_src_coords else default_coords
@@ -157,7 +327,8 @@ def create_arc_json(attacker_country_name: str, victim_country_name: str) -> Opt
     return {
         "arc": {
             "src": final_src_coords, 
-            "dst": final_dst_coords
+            "dst": final_dst_coords,
+            "path": ARC_GEOMETRY.path(resolved_attacker_name, resolved_victim_name),
         },
         "resolved_names": {
             "attacker_country": resolved_attacker_name,
@@ -0,0 +1,110 @@
+from collections import defaultdict
+from typing import Any, List, Optional
+
+from sqlalchemy import desc, func, insert
+from sqlalchemy.future import select
+
+from backend.db.models import EventHistory, EventHistoryHourly
+from backend.db.session import dialect_insert
+from backend.utils.country_coords import COUNTRY_INDEX
+from backend.utils.timestamps import epoch_seconds
+
+HOUR = 3600
+# the rollup's key columns can't be NULL, so an unknown source or country is stored as ""
+UNKNOWN = ""
+
+def history_row(summary_id: Optional[int], payload: List[Any]) -> dict:
+    """Narrow history row for one serialised log entry ([event, arc, summary])."""
+    event, _, summary = payload
+    return {
+        "ts": epoch_seconds(event.get("timestamp")),
+        "source": event.get("source"),
+        "attacker_code": COUNTRY_INDEX.iso_code(event.get("resolved_attacker_country") or summary.get("attacker_country")),
+        "victim_code": COUNTRY_INDEX.iso_code(event.get("resolved_victim_country") or summary.get("victim_country")),
+        "summary_id": summary_id,
+        "duplicate_count": event.get("duplicate_count") or 1,
+    }
+
+def hourly_counts(rows: List[dict]) -> List[dict]:
+    """Folds history rows into one rollup increment per (hour, source, pair), weighted by duplicate_count."""
+    counts = defaultdict(int)
+    for row in rows:
+        key = (row["ts"] - row["ts"] % HOUR, row["source"] or UNKNOWN,
+               row["attacker_code"] or UNKNOWN, row["victim_code"] or UNKNOWN)
+        counts[key] += row.get("duplicate_count") or 1
+    # sorted, so concurrent publishers lock rollup rows in the same order
+    return [
+        {"hour": hour, "source": source, "attacker_code": attacker, "victim_code": victim, "count": count}
+        for (hour, source, attacker, victim), count in sorted(counts.items())
+    ]
+
+def _upsert_hourly():
+    stmt = dialect_insert(EventHistoryHourly)
+    return stmt.on_conflict_do_update(
+        index_elements=["hour", "source", "attacker_code", "victim_code"],
+        set_={"count": EventHistoryHourly.count + stmt.excluded["count"]},
+    )
+
+_UPSERT_HOURLY = _upsert_hourly()
+
+async def append_history(db, rows: List[dict]):
+    """Bulk-appends history rows and adds them to the hourly rollup; the caller commits."""
+    if rows:
+        await db.execute(insert(EventHistory), rows)
+        await db.execute(_UPSERT_HOURLY, hourly_counts(rows))
+
+# START OF AGGREGATES
+# every aggregate reads event_history_hourly, so its cost tracks the number of
+# hour/source/pair combinations in range rather than the number of events
+
+def _in_range(stmt, since: Optional[int], until: Optional[int]):
+    # hourly resolution: `since` includes the whole hour it falls in
+    if since is not None:
+        stmt = stmt.where(EventHistoryHourly.hour >= since - since % HOUR)
+    if until is not None:
+        stmt = stmt.where(EventHistoryHourly.hour < until)
+    return stmt
+
+def _total():
+    return func.sum(EventHistoryHourly.count).label("count")
+
+async def top_pairs(db, since: Optional[int] = None, until: Optional[int] = None, limit: int = 20):
+    """Most frequent attacker -> victim country pairs."""
+    count = _total()
+    stmt = (
+        select(EventHistoryHourly.attacker_code, EventHistoryHourly.victim_code, count)
+        .where(EventHistoryHourly.attacker_code != UNKNOWN, EventHistoryHourly.victim_code != UNKNOWN)
+        .group_by(EventHistoryHourly.attacker_code, EventHistoryHourly.victim_code)
+        .order_by(desc(count))
+        .limit(limit)
+    )
+    rows = await db.execute(_in_range(stmt, since, until))
+    return [{"attacker": a, "victim": v, "count": c} for a, v, c in rows.all()]
+
+async def country_counts(db, role: str = "attacker", since: Optional[int] = None,
+                         until: Optional[int] = None, limit: int = 50):
+    """Event counts per country, as attacker or as victim."""
+    column = EventHistoryHourly.attacker_code if role == "attacker" else EventHistoryHourly.victim_code
+    count = _total()
+    stmt = (
+        select(column, count)
+        .where(column != UNKNOWN)
+        .group_by(column)
+        .order_by(desc(count))
+        .limit(limit)
+    )
+    rows = await db.execute(_in_range(stmt, since, until))
+    return [{"country": code, "count": c} for code, c in rows.all()]
+
+async def time_buckets(db, bucket_seconds: int = HOUR, since: Optional[int] = None,
+                       until: Optional[int] = None, source: Optional[str] = None):
+    """Event counts per fixed-width time bucket (a multiple of an hour), oldest first."""
+    # integer modulo truncates the same way on SQLite and Postgres
+    bucket = (EventHistoryHourly.hour - EventHistoryHourly.hour % bucket_seconds).label("bucket")
+    stmt = select(bucket, _total()).group_by(bucket).order_by(bucket)
+    if source:
+        stmt = stmt.where(EventHistoryHourly.source == source)
+    rows = await db.execute(_in_range(stmt, since, until))
+    return [{"start": start, "count": c} for start, c in rows.all()]
+
+# END OF AGGREGATES
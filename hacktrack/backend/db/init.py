@@ -1,6 +1,6 @@
 from backend.db.session import engine
-from backend.db.models import Base
+from backend.db.migrations import run_migrations
 
 async def init_db():
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(run_migrations)
@@ -0,0 +1,176 @@
+"""
+Versioned schema migrations that run on both SQLite and Postgres.
+
+Each migration is a function taking a synchronous connection; init_db applies the
+ones newer than the version stored in schema_version, in order, inside one
+transaction. Add new schema changes by appending to MIGRATIONS, never by editing
+an already released entry.
+"""
+from sqlalchemy import Column, Integer, MetaData, String, Table, delete, func, insert, inspect, null, select, update
+
+from backend.db.models import Base, Event, EventHistory, EventHistoryHourly, LogEntry
+
+_version_metadata = MetaData()
+schema_version = Table(
+    "schema_version", _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String),
+)
+
+# START OF HELPERS
+
+def add_column(sync_conn, table_name: str, column_name: str):
+    """Adds a column declared on the models to an existing table, if it is missing."""
+    existing = {c["name"] for c in inspect(sync_conn).get_columns(table_name)}
+    if column_name in existing:
+        return
+    column = Base.metadata.tables[table_name].columns[column_name]
+    ddl = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column.type.compile(sync_conn.dialect)}"
+    if column.server_default is not None:
+        ddl += f" DEFAULT '{column.server_default.arg}'"
+    sync_conn.exec_driver_sql(ddl)
+
+def drop_column(sync_conn, table_name: str, column_name: str):
+    """Drops a column no longer on the models; SQLite before 3.35 can't, so there it is left unused."""
+    existing = {c["name"] for c in inspect(sync_conn).get_columns(table_name)}
+    if column_name not in existing:
+        return
+    if sync_conn.dialect.name == "sqlite" and sync_conn.dialect.server_version_info < (3, 35):
+        return
+    sync_conn.exec_driver_sql(f"ALTER TABLE {table_name} DROP COLUMN {column_name}")
+
+def create_missing_indexes(sync_conn):
+    # create_all skips indexes on tables that already exist; indexes on columns a
+    # later migration adds are left for that migration
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            if all(column.name in existing for column in index.columns):
+                index.create(sync_conn, checkfirst=True)
+
+# END OF HELPERS
+
+# START OF MIGRATIONS
+
+def _create_tables(sync_conn):
+    Base.metadata.create_all(sync_conn)
+
+def _events_work_queue_columns(sync_conn):
+    for name in ("status", "claimed_by", "lease_expires_at"):
+        add_column(sync_conn, "events", name)
+
+def _event_history(sync_conn):
+    Base.metadata.create_all(sync_conn, tables=[EventHistory.__table__, EventHistoryHourly.__table__])
+
+def _duplicate_counts(sync_conn):
+    add_column(sync_conn, "events", "duplicate_count")
+    add_column(sync_conn, "event_history", "duplicate_count")
+
+def _attacker_ip(sync_conn):
+    add_column(sync_conn, "events", "attacker_ip")
+
+def _log_entry_data(sync_conn):
+    from backend.utils.responses import encode_log_payload
+
+    add_column(sync_conn, "log_entries", "data")
+    rows = sync_conn.execute(select(LogEntry.id, LogEntry.payload).where(LogEntry.payload.is_not(None))).all()
+    for entry_id, payload in rows:
+        sync_conn.execute(update(LogEntry).where(LogEntry.id == entry_id).values(data=encode_log_payload(payload), payload=null()))
+
+def _priority_scheduling(sync_conn):
+    from backend.utils.priority import PairNovelty, assign_priorities
+
+    # the per-source columns of this release are no longer on the models (migration 9
+    # replaces them), so they are spelled out here rather than taken from Event
+    existing = {c["name"] for c in inspect(sync_conn).get_columns("events")}
+    legacy = "otx_name" in existing
+    if legacy and "abuse_confidence" not in existing:
+        sync_conn.exec_driver_sql("ALTER TABLE events ADD COLUMN abuse_confidence INTEGER")
+    add_column(sync_conn, "events", "sched_key")
+
+    # score the existing backlog as if it had all just arrived; tables created by
+    # migration 1 from the current models are new and have no backlog yet
+    if legacy:
+        rows = [dict(row._mapping) for row in sync_conn.exec_driver_sql(
+            "SELECT id, source, timestamp, abuse_attacker_country AS attacker_country, "
+            "COALESCE(abuse_victim_country, otx_country) AS victim_country, "
+            "abuse_confidence AS confidence, duplicate_count FROM events"
+        )]
+        assign_priorities(rows, tracker=PairNovelty())
+        for row in rows:
+            sync_conn.execute(update(Event).where(Event.id == row["id"]).values(sched_key=row["sched_key"]))
+
+    # claims no longer go by status and timestamp
+    sync_conn.exec_driver_sql("DROP INDEX IF EXISTS ix_events_status_timestamp")
+    create_missing_indexes(sync_conn)
+
+# per-source columns replaced by the normalised ones in migration 9
+_LEGACY_EVENT_COLUMNS = (
+    "abuse_attacker_country", "abuse_victim_country", "abuse_attack", "abuse_confidence",
+    "otx_name", "otx_description", "otx_country",
+)
+
+def _normalised_events(sync_conn):
+    for name in ("attacker_country", "victim_country", "confidence", "title", "description", "raw"):
+        add_column(sync_conn, "events", name)
+
+    existing = {c["name"] for c in inspect(sync_conn).get_columns("events")}
+    if "otx_name" in existing:
+        confidence = "abuse_confidence" if "abuse_confidence" in existing else "NULL"
+        sync_conn.exec_driver_sql(
+            "UPDATE events SET attacker_country = abuse_attacker_country, "
+            "victim_country = COALESCE(abuse_victim_country, otx_country), "
+            "title = otx_name, description = COALESCE(otx_description, abuse_attack), "
+            f"confidence = {confidence}"
+        )
+    for name in _LEGACY_EVENT_COLUMNS:
+        drop_column(sync_conn, "events", name)
+
+def _hourly_rollup(sync_conn):
+    from backend.db.history import HOUR, UNKNOWN
+
+    # the rollup table existed since migration 4 but was never written; build it from history
+    hour = (EventHistory.ts - EventHistory.ts % HOUR).label("hour")
+    keys = [
+        hour,
+        func.coalesce(EventHistory.source, UNKNOWN).label("source"),
+        func.coalesce(EventHistory.attacker_code, UNKNOWN).label("attacker_code"),
+        func.coalesce(EventHistory.victim_code, UNKNOWN).label("victim_code"),
+    ]
+    totals = select(*keys, func.sum(func.coalesce(EventHistory.duplicate_count, 1))).group_by(*keys)
+    sync_conn.execute(delete(EventHistoryHourly))
+    sync_conn.execute(insert(EventHistoryHourly).from_select(
+        ["hour", "source", "attacker_code", "victim_code", "count"], totals,
+    ))
+
+MIGRATIONS = [
+    (1, "create tables", _create_tables),
+    (2, "events work-queue columns", _events_work_queue_columns),
+    (3, "indexes on timestamp, status and caches", create_missing_indexes),
+    (4, "event_history tables", _event_history),
+    (5, "duplicate counts", _duplicate_counts),
+    (6, "events.attacker_ip", _attacker_ip),
+    (7, "log_entries.data", _log_entry_data),
+    (8, "events priority scheduling", _priority_scheduling),
+    (9, "normalised event columns", _normalised_events),
+    (10, "event_history_hourly backfill", _hourly_rollup),
+]
+
+# END OF MIGRATIONS
+
+def run_migrations(sync_conn) -> int:
+    """Applies pending migrations and returns the resulting schema version."""
+    _version_metadata.create_all(sync_conn)
+    current = sync_conn.execute(select(schema_version.c.version).order_by(schema_version.c.version.desc())).scalar() or 0
+
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        migrate(sync_conn)
+        sync_conn.execute(schema_version.insert().values(version=version, description=description))
+        print(f"[INFO] applied migration {version}: {description}")
+        current = version
+    return current
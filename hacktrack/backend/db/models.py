@@ -1,24 +1,119 @@
-from sqlalchemy import Column, Integer, String, JSON, UniqueConstraint
+import time
+
+from sqlalchemy import Column, Integer, Float, String, Boolean, JSON, LargeBinary, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
 from sqlalchemy import UniqueConstraint
 
+def _enqueue_time():
+    # rows inserted without a priority are claimed in arrival order
+    return time.time()
+
 class Event(Base):
     __tablename__ = "events"
-    __table_args__ = (UniqueConstraint("source", "timestamp", name="_source_ts_uc"),)
+    __table_args__ = (
+        UniqueConstraint("source", "timestamp", name="_source_ts_uc"),
+        # claim order, overall and within each source's share; there is deliberately no
+        # status index, which planners would pick and then sort every pending row
+        Index("ix_events_sched_key", "sched_key"),
+        Index("ix_events_source_sched_key", "source", "sched_key"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     source = Column(String)
-    timestamp = Column(String)
+    timestamp = Column(String, index=True)
+
+    # normalised fields every collector fills in (see backend.ingest.collectors)
+    attacker_country = Column(String, nullable=True)
+    victim_country = Column(String, nullable=True)
+    # reported IP, kept for local GeoIP lookups
+    attacker_ip = Column(String, nullable=True)
+    # the feed's confidence that the activity is malicious, 0-100
+    confidence = Column(Integer, nullable=True)
+    title = Column(String, nullable=True)
+    description = Column(String, nullable=True)
+    # feed-specific details, as the collector chose to keep them
+    raw = Column(JSON, nullable=True)
+
+    # work-queue state, so several summariser workers can share the table
+    status = Column(String, nullable=False, default="pending", server_default="pending")
+    claimed_by = Column(String, nullable=True)
+    lease_expires_at = Column(Float, nullable=True)
+    # claim order, lowest first: enqueue time pulled forward by the event's priority (see utils.priority)
+    sched_key = Column(Float, nullable=False, default=_enqueue_time, server_default="0")
+
+    # near-identical reports folded into this row before summarisation
+    duplicate_count = Column(Integer, nullable=False, default=1, server_default="1")
+
+# columns exposed by the API and in log entries (the work-queue state and raw feed payload stay internal)
+EVENT_PUBLIC_COLUMNS = (
+    Event.id, Event.source, Event.timestamp,
+    Event.attacker_country, Event.victim_country, Event.attacker_ip, Event.confidence,
+    Event.title, Event.description,
+    Event.duplicate_count,
+)
+
+# content-addressed cache of LLM summaries, keyed by a hash of the prompt
+class SummaryCache(Base):
+    __tablename__ = "summary_cache"
+
+    key = Column(String, primary_key=True)
+    summary = Column(JSON)
+    created_at = Column(Float, index=True)
+    last_used_at = Column(Float, index=True)
+    hits = Column(Integer, default=0)
+
+# small key/value store for ingest cursors such as the OTX modified-since watermark
+class SyncState(Base):
+    __tablename__ = "sync_state"
+
+    key = Column(String, primary_key=True)
+    value = Column(String, nullable=True)
+    updated_at = Column(Float)
+
+# summariser output shared by every worker process; ids double as stream sequence numbers
+class LogEntry(Base):
+    __tablename__ = "log_entries"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    created_at = Column(Float)
+    # set once GET /logs has handed the entry out
+    delivered = Column(Boolean, nullable=False, default=False, server_default="0", index=True)
+    # the serialised [event, arc, summary] as compact JSON bytes, served without re-encoding
+    data = Column(LargeBinary)
+    # rows written before migration 7 kept their payload here
+    payload = Column(JSON, nullable=True)
+
+# append-only, narrow record of every summarised event;
+# integer epoch seconds and ISO alpha-2 codes keep rows small
+class EventHistory(Base):
+    __tablename__ = "event_history"
+    __table_args__ = (
+        Index("ix_event_history_pair_ts", "attacker_code", "victim_code", "ts"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    ts = Column(Integer, nullable=False, index=True)
+    source = Column(String(16))
+    attacker_code = Column(String(2), nullable=True)
+    victim_code = Column(String(2), nullable=True)
+    # log_entries row holding the summary (trimmed from there after LOG_ENTRY_CAPACITY)
+    summary_id = Column(Integer, nullable=True)
+    # events this row stands for, after near-duplicate collapsing
+    duplicate_count = Column(Integer, nullable=False, default=1, server_default="1")
 
-    # AbuseIPDB-specific
-    abuse_attacker_country = Column(String, nullable=True)
-    abuse_victim_country = Column(String, nullable=True)
-    abuse_attack = Column(String, nullable=True)
+# hourly counts per source and country pair, upserted alongside every event_history append
+# (see db.history); the aggregate endpoints read only this, so they stay fast however long
+# history grows. hour is the epoch second the hour starts at; unknown values are ""
+class EventHistoryHourly(Base):
+    __tablename__ = "event_history_hourly"
 
-    # OTX-specific
-    otx_name = Column(String, nullable=True)
-    otx_description = Column(String, nullable=True)
-    otx_country = Column(String, nullable=True)
\ No newline at end of file
+    hour = Column(Integer, primary_key=True)
+    source = Column(String(16), primary_key=True)
+    attacker_code = Column(String(2), primary_key=True)
+    victim_code = Column(String(2), primary_key=True)
+    # events in the hour, weighted by duplicate_count
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,35 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, desc
+from sqlalchemy.future import select
+
+from backend.db.models import Event
+
+# keep at most this many unsummarised events
+MAX_EVENTS = int(os.getenv("MAX_EVENTS", 1000))
+# drop events older than this many hours (0 disables time-based retention)
+MAX_EVENT_AGE_HOURS = float(os.getenv("MAX_EVENT_AGE_HOURS", 0))
+
+async def trim_event_table(db, max_events: int = MAX_EVENTS, max_age_hours: float = MAX_EVENT_AGE_HOURS) -> int:
+    """
+    Applies retention to the events table and returns the number of rows deleted.
+    Both rules are single DELETE statements driven by the timestamp index, so the
+    cost depends on the cap rather than on how large the table has grown.
+    Events a worker has claimed are never deleted: their summary is already being paid for.
+    """
+    deleted = 0
+
+    if max_age_hours:
+        # timestamps are stored as ISO strings, which sort chronologically
+        cutoff = (datetime.now(timezone.utc) - timedelta(hours=max_age_hours)).replace(tzinfo=None).isoformat()
+        result = await db.execute(delete(Event).where(Event.timestamp < cutoff, Event.status != "claimed"))
+        deleted += max(result.rowcount or 0, 0)
+
+    # everything past the newest max_events rows
+    overflow = select(Event.id).order_by(desc(Event.timestamp)).offset(max_events)
+    result = await db.execute(delete(Event).where(Event.id.in_(overflow), Event.status != "claimed"))
+    deleted += max(result.rowcount or 0, 0)
+
+    await db.commit()
+    return deleted
@@ -0,0 +1,40 @@
+import time
+from typing import Optional
+
+from sqlalchemy import or_, update
+
+from backend.db.models import SyncState
+from backend.db.session import dialect_insert
+
+async def get_sync_state(db, key: str) -> Optional[str]:
+    state = await db.get(SyncState, key)
+    return state.value if state else None
+
+async def set_sync_state(db, key: str, value: Optional[str]):
+    await db.merge(SyncState(key=key, value=value, updated_at=time.time()))
+    await db.commit()
+
+# START OF LEASES
+
+async def acquire_lease(db, key: str, owner: str, seconds: float) -> bool:
+    """
+    Takes (or renews) a named lease for `owner` unless another owner holds an unexpired one.
+    The row's updated_at is the expiry; a single conditional UPDATE makes this safe across processes.
+    """
+    now = time.time()
+    await db.execute(
+        dialect_insert(SyncState).values(key=key, value=None, updated_at=0).on_conflict_do_nothing(index_elements=["key"])
+    )
+    result = await db.execute(
+        update(SyncState)
+        .where(SyncState.key == key, or_(SyncState.value == owner, SyncState.value.is_(None), SyncState.updated_at < now))
+        .values(value=owner, updated_at=now + seconds)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+async def release_lease(db, key: str, owner: str):
+    await db.execute(update(SyncState).where(SyncState.key == key, SyncState.value == owner).values(value=None, updated_at=0))
+    await db.commit()
+
+# END OF LEASES
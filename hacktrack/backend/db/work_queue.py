@@ -0,0 +1,174 @@
+import os
+import time
+import socket
+from typing import Any, List, Optional
+
+from sqlalchemy import and_, asc, delete, desc, or_, update
+from sqlalchemy.future import select
+
+from backend.db.session import AsyncSessionLocal
+from backend.db.models import EVENT_PUBLIC_COLUMNS, Event, LogEntry
+from backend.db.history import append_history, history_row
+from backend.utils.metrics import EVENTS_CLAIMED, LOG_ENTRIES_DROPPED
+from backend.utils.priority import QuotaRotation, source_rotation
+from backend.utils.responses import encode_log_payload
+
+# how long a claimed batch stays reserved before another worker may take it over
+LEASE_SECONDS = int(os.getenv("SUMMARY_LEASE_SECONDS", 300))
+# summarised entries kept in the shared output store
+LOG_ENTRY_CAPACITY = int(os.getenv("LOG_ENTRY_CAPACITY", 500))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# failed events wait this long before being retried
+RETRY_DELAY_SECONDS = int(os.getenv("SUMMARY_RETRY_DELAY", 30))
+
+def _claimable(now: float):
+    # lease_expires_at doubles as "not before" for released events
+    return or_(
+        and_(Event.status == "pending", or_(Event.lease_expires_at.is_(None), Event.lease_expires_at < now)),
+        and_(Event.status == "claimed", Event.lease_expires_at < now),
+    )
+
+def _claim(worker_id: str, now: float, lease_seconds: int, limit: int, source: Optional[str] = None):
+    # both forms walk a sched_key index in claim order and stop after `limit` claimable rows
+    candidates = select(Event.id).where(_claimable(now))
+    if source is not None:
+        candidates = candidates.where(Event.source == source)
+    candidates = candidates.order_by(asc(Event.sched_key)).limit(limit).with_for_update(skip_locked=True)
+    return (
+        update(Event)
+        .where(Event.id.in_(candidates))
+        .values(status="claimed", claimed_by=worker_id, lease_expires_at=now + lease_seconds)
+        .returning(Event)
+        .execution_options(synchronize_session=False)
+    )
+
+async def claim_events(db, limit: int = 50, worker_id: str = WORKER_ID, lease_seconds: int = LEASE_SECONDS,
+                       rotation: QuotaRotation = source_rotation) -> List[Event]:
+    """
+    Atomically leases up to `limit` of the most urgent unclaimed events to this worker.
+    Each source first gets its share of the batch (SCHEDULER_SOURCE_SHARES, rotated across
+    batches), so one busy feed cannot starve the others; any share left unused goes to the
+    lowest sched_key overall.
+    Rows whose lease ran out (their worker crashed or stalled) are claimable again.
+    """
+    now = time.time()
+    events = []
+    for source, quota in rotation.quotas(limit).items():
+        events += (await db.execute(_claim(worker_id, now, lease_seconds, quota, source))).scalars().all()
+    if len(events) < limit:
+        # rows claimed above are no longer claimable, so this only adds new ones
+        events += (await db.execute(_claim(worker_id, now, lease_seconds, limit - len(events)))).scalars().all()
+    await db.commit()
+    for event in events:
+        EVENTS_CLAIMED.inc(source=event.source)
+    return sorted(events, key=lambda e: e.sched_key)
+
+async def release_events(db, ids: List[int], worker_id: str = WORKER_ID, retry_delay: int = RETRY_DELAY_SECONDS):
+    """Hands events this worker could not finish back to the queue, claimable again after retry_delay."""
+    if not ids:
+        return
+    await db.execute(
+        update(Event)
+        .where(Event.id.in_(ids), Event.claimed_by == worker_id)
+        .values(status="pending", claimed_by=None, lease_expires_at=time.time() + retry_delay)
+    )
+    await db.commit()
+
+async def complete_events(db, ids: List[int], payloads: List[Any], worker_id: str = WORKER_ID) -> int:
+    """
+    Removes the finished events and stores their results (payloads[i] belongs to ids[i])
+    in the shared output store and the history table, in one transaction.
+    Only events this worker still holds are published: if its lease ran out and the
+    event was taken over, the other worker publishes it instead.
+    Returns the number of results stored.
+    """
+    if not ids:
+        return 0
+    deleted = await db.execute(
+        delete(Event).where(Event.id.in_(ids), Event.claimed_by == worker_id).returning(Event.id)
+    )
+    held = set(deleted.scalars().all())
+    if len(held) < len(ids):
+        print(f"[INFO] lost the lease on {len(ids) - len(held)} events before publishing; dropping those results")
+    payloads = [p for event_id, p in zip(ids, payloads) if event_id in held]
+
+    now = time.time()
+    entries = [LogEntry(created_at=now, data=encode_log_payload(p)) for p in payloads]
+    db.add_all(entries)
+    await db.flush()
+    await append_history(db, [history_row(entry.id, p) for entry, p in zip(entries, payloads)])
+    await _trim_log_entries(db)
+    await db.commit()
+    return len(entries)
+
+async def _trim_log_entries(db, capacity: int = LOG_ENTRY_CAPACITY):
+    """Bounds the store as a ring, oldest first; entries GET /logs never handed out are counted as dropped."""
+    overflow = select(LogEntry.id).order_by(desc(LogEntry.id)).offset(capacity)
+    trimmed = await db.execute(delete(LogEntry).where(LogEntry.id.in_(overflow)).returning(LogEntry.delivered))
+    dropped = sum(1 for (delivered,) in trimmed.all() if not delivered)
+    if dropped:
+        LOG_ENTRIES_DROPPED.inc(dropped)
+
+async def drain_log_entries(db, limit: int = 50) -> List[bytes]:
+    """Marks up to `limit` of the oldest undelivered entries as delivered and returns their encoded payloads."""
+    oldest = (
+        select(LogEntry.id)
+        .where(LogEntry.delivered.is_(False))
+        .order_by(asc(LogEntry.id))
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(LogEntry)
+        .where(LogEntry.id.in_(oldest))
+        .values(delivered=True)
+        .returning(LogEntry.id, LogEntry.data)
+    )
+    rows = sorted(result.all())
+    await db.commit()
+    return [data for _, data in rows]
+
+def _log_entries_page(after: Optional[int], limit: int):
+    stmt = select(LogEntry.id, LogEntry.data).order_by(asc(LogEntry.id)).limit(limit)
+    if after is not None:
+        stmt = stmt.where(LogEntry.id > after)
+    return stmt
+
+async def read_log_entries(db, after: Optional[int] = None, limit: int = 100):
+    """Returns (id, encoded payload) pairs newer than `after`, oldest first."""
+    return (await db.execute(_log_entries_page(after, limit))).all()
+
+async def stream_log_entries(after: Optional[int] = None, limit: int = 1000):
+    """Like read_log_entries, but yields from a server-side cursor in its own session."""
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(_log_entries_page(after, limit).execution_options(yield_per=200))
+        async for entry_id, data in result:
+            yield entry_id, data
+
+# START OF EVENT READS
+
+def _events_page(after: Optional[int], limit: int):
+    # column projection: plain rows, no ORM identity map or instance state
+    stmt = select(*EVENT_PUBLIC_COLUMNS).order_by(asc(Event.id)).limit(limit)
+    if after is not None:
+        stmt = stmt.where(Event.id > after)
+    return stmt
+
+async def read_events(db, after: Optional[int] = None, limit: int = 50) -> List[dict]:
+    """Pending or in-flight events with id greater than `after`, oldest id first."""
+    return [dict(row._mapping) for row in (await db.execute(_events_page(after, limit))).all()]
+
+async def stream_events(after: Optional[int] = None, limit: int = 1000):
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(_events_page(after, limit).execution_options(yield_per=200))
+        async for row in result:
+            yield dict(row._mapping)
+
+# END OF EVENT READS
+
+async def recent_log_entries(db, limit: int = 100):
+    """The newest `limit` (id, encoded payload) pairs, oldest first."""
+    rows = await db.execute(select(LogEntry.id, LogEntry.data).order_by(desc(LogEntry.id)).limit(limit))
+    return list(reversed(rows.all()))
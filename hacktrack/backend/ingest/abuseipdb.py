@@ -1,6 +1,11 @@
 import os, httpx, asyncio
 from datetime import datetime
 
+from backend.ingest.http import http_pool, ProviderClient, QuotaExceeded
+from backend.ingest.collectors import Collector, normalised_event
+from backend.utils.offload import offload_parse
+from backend.utils.responses import loads
+
 ABUSEIPDB_API_KEY = os.getenv("ABUSEIPDB_API_KEY")
 ABUSE_URL = "https://api.abuseipdb.com/api/v2/blacklist"
 CHECK_URL = "https://api.abuseipdb.com/api/v2/check"
@@ -9,23 +14,56 @@ HEADERS = {
     "Accept": "application/json"
 }
 
+# how many blacklisted IPs to look up per cycle, and how many lookups run at once
+CHECK_LIMIT = int(os.getenv("ABUSEIPDB_CHECK_LIMIT", 100))
+CHECK_CONCURRENCY = int(os.getenv("ABUSEIPDB_CHECK_CONCURRENCY", 10))
+
+# AbuseIPDB budgets each endpoint separately (and reports X-RateLimit-Remaining per endpoint),
+# so /blacklist and /check are separate providers with their own quota
+http_pool.register(
+    "abuseipdb",
+    headers=HEADERS,
+    timeout=30,
+    rate=float(os.getenv("ABUSEIPDB_RATE_PER_SEC", 5)),
+    burst=CHECK_CONCURRENCY,
+    concurrency=CHECK_CONCURRENCY,
+    # free tier allows 1000 /check calls a day
+    daily_quota=int(os.getenv("ABUSEIPDB_DAILY_QUOTA", 1000)),
+)
+http_pool.register(
+    "abuseipdb_blacklist",
+    headers=HEADERS,
+    timeout=60,
+    rate=float(os.getenv("ABUSEIPDB_RATE_PER_SEC", 5)),
+    burst=1,
+    concurrency=1,
+    # free tier allows 5 /blacklist calls a day; every retry spends one of them
+    daily_quota=int(os.getenv("ABUSEIPDB_BLACKLIST_DAILY_QUOTA", 5)),
+    max_retries=1,
+)
+
+def parse_blacklist(content: bytes) -> list[str]:
+    return [item["ipAddress"] for item in loads(content).get("data", [])]
+
+async def fetch_blacklist(confidence_min=90) -> list[str]:
+    client = http_pool.get("abuseipdb_blacklist")
+    resp = await client.get(ABUSE_URL, params={"confidenceMinimum": confidence_min})
+    resp.raise_for_status()
+    # the full blacklist runs to megabytes
+    return await offload_parse(parse_blacklist, resp.content)
+
 async def get_abuseipdb_events(confidence_min=90):
-    params = {"confidenceMinimum": confidence_min}
     try:
-        async with httpx.AsyncClient(headers=HEADERS, timeout=30) as client:
-            resp = await client.get(ABUSE_URL, params=params)
-            resp.raise_for_status()
-            data = resp.json().get("data", [])
-            ips = [item["ipAddress"] for item in data]
-            return await check_events(ips)
-    except httpx.HTTPError as e:
+        return await check_events(await fetch_blacklist(confidence_min))
+    except (httpx.HTTPError, QuotaExceeded) as e:
         print(f"[ERROR] AbuseIPDB blacklist fetch failed: {e}")
         return []
 
-async def check_events(ips: list[str]):
-    async with httpx.AsyncClient(headers=HEADERS, timeout=30) as client:
-        tasks = [fetch_report(client, ips[ip]) for ip in range(100)] # only 100 ips' for now, will increase with testing
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+async def check_events(ips: list[str], limit: int = CHECK_LIMIT):
+    client = http_pool.get("abuseipdb")
+    # concurrency and pacing are enforced by the shared client
+    tasks = [fetch_report(client, ip) for ip in ips[:limit]]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
 
     flat = []
     for res in results:
@@ -34,27 +72,45 @@ async def check_events(ips: list[str]):
         flat.extend(res)
     return flat
 
-async def fetch_report(client: httpx.AsyncClient, ip: str):
+async def fetch_report(client: ProviderClient, ip: str):
     params = {"ipAddress": ip, "maxAgeInDays": 1, "verbose": "true"}
     try:
         resp = await client.get(CHECK_URL, params=params)
         resp.raise_for_status()
-        data = resp.json()["data"]
+        # verbose reports for a noisy IP can be large too
+        data = (await offload_parse(loads, resp.content))["data"]
         # only fetch up to 5 reports for each IP (for now)
         reports = data.get("reports", [])[:5]
         out = []
         for rpt in reports:
-            out.append({
-                "source": "AbuseIPDB",
-                "timestamp": datetime.fromisoformat(data["lastReportedAt"]).isoformat(),
-                "abuse_attacker_country": data.get("countryName"),
-                "abuse_victim_country": rpt.get("reporterCountryName"),
-                "abuse_attack": rpt.get("comment"),
-                "otx_name": None,
-                "otx_description": None,
-                "otx_country": None,
-            })
+            out.append(normalised_event(
+                "AbuseIPDB",
+                datetime.fromisoformat(data["lastReportedAt"]).isoformat(),
+                attacker_country=data.get("countryName"),
+                victim_country=rpt.get("reporterCountryName"),
+                attacker_ip=data.get("ipAddress") or ip,
+                confidence=data.get("abuseConfidenceScore"),
+                description=rpt.get("comment"),
+                raw={
+                    "categories": rpt.get("categories"),
+                    "reported_at": rpt.get("reportedAt"),
+                    "isp": data.get("isp"),
+                    "usage_type": data.get("usageType"),
+                    "domain": data.get("domain"),
+                    "total_reports": data.get("totalReports"),
+                },
+            ))
         return out
-    except httpx.HTTPError as e:
+    except (httpx.HTTPError, QuotaExceeded) as e:
         print(f"[ERROR] Failed to fetch AbuseIPDB report for {ip}: {e}")
         return []
+
+class AbuseIPDBCollector(Collector):
+    name = "AbuseIPDB"
+    # free tier allows 5 blacklist calls a day
+    schedule = "21600"
+    jitter = 300
+
+    async def batches(self, db):
+        # a failed blacklist call fails the run; individual /check failures only lose that IP
+        yield await check_events(await fetch_blacklist())
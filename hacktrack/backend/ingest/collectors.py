@@ -0,0 +1,184 @@
+"""
+Collector plugins: one per threat feed.
+
+A collector turns a feed into normalised events (see `normalised_event`) and is
+run on its own schedule by backend.ingest.scheduler. Every collector shares the
+same write path (near-duplicate collapse, bulk insert, retention), so adding a
+feed means adding a Collector subclass and listing it in COLLECTORS, with no
+schema change.
+"""
+import os
+import importlib
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Type
+
+# "module:ClassName" of every collector to run, comma separated
+COLLECTORS = os.getenv("COLLECTORS", "backend.ingest.otx:OTXCollector,backend.ingest.abuseipdb:AbuseIPDBCollector")
+
+# START OF NORMALISED EVENTS
+
+# columns every collector fills (None when the feed doesn't say)
+EVENT_FIELDS = (
+    "source", "timestamp", "attacker_country", "victim_country", "attacker_ip",
+    "confidence", "title", "description", "raw",
+)
+
+def normalised_event(source: str, timestamp: str, **fields) -> Dict[str, Any]:
+    """
+    One event row in the shared schema. `timestamp` is an ISO string; countries are
+    names or codes as the feed gives them; `confidence` is 0-100; `raw` holds any
+    feed-specific details worth keeping, as JSON.
+    """
+    unknown = set(fields) - set(EVENT_FIELDS)
+    if unknown:
+        raise TypeError(f"unknown event fields: {', '.join(sorted(unknown))}")
+    event = dict.fromkeys(EVENT_FIELDS)
+    event.update(fields, source=source, timestamp=timestamp)
+    return event
+
+# END OF NORMALISED EVENTS
+
+# START OF SCHEDULES
+
+class IntervalSchedule:
+    """Runs every `seconds`, the first time straight away."""
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError("interval must be positive")
+        self.seconds = seconds
+
+    def first(self, now: float) -> float:
+        return now
+
+    def next_after(self, after: float) -> float:
+        return after + self.seconds
+
+def _cron_field(field: str, low: int, high: int) -> set:
+    values = set()
+    for part in field.split(","):
+        spec, _, step = part.partition("/")
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(v) for v in spec.split("-", 1))
+        else:
+            start = end = int(spec)
+            if step:
+                end = high
+        if start < low or end > high or start > end:
+            raise ValueError(f"cron field {field!r} is out of range {low}-{high}")
+        values.update(range(start, end + 1, int(step or 1)))
+    return values
+
+class CronSchedule:
+    """Five-field cron expression (minute hour day-of-month month day-of-week), in UTC."""
+    def __init__(self, spec: str):
+        fields = spec.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron schedule needs 5 fields, got {spec!r}")
+        self.spec = spec
+        self.minutes = _cron_field(fields[0], 0, 59)
+        self.hours = _cron_field(fields[1], 0, 23)
+        self.days = _cron_field(fields[2], 1, 31)
+        self.months = _cron_field(fields[3], 1, 12)
+        # 0 and 7 are both Sunday
+        self.weekdays = {d % 7 for d in _cron_field(fields[4], 0, 7)}
+        # as in cron, when both day fields are restricted either one may match
+        self._days_restricted = fields[2] != "*"
+        self._weekdays_restricted = fields[4] != "*"
+
+    def _day_matches(self, t: datetime) -> bool:
+        day = t.day in self.days
+        weekday = (t.weekday() + 1) % 7 in self.weekdays
+        if self._days_restricted and self._weekdays_restricted:
+            return day or weekday
+        return day and weekday
+
+    def first(self, now: float) -> float:
+        return self.next_after(now)
+
+    def next_after(self, after: float) -> float:
+        t = datetime.fromtimestamp(after, timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # long enough to reach any valid day, including 29 February
+        give_up = t + timedelta(days=366 * 8)
+        while t < give_up:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t.timestamp()
+        raise ValueError(f"cron schedule {self.spec!r} never fires")
+
+def parse_schedule(spec: str):
+    """"1800" runs every 1800 seconds; anything else is read as a cron expression."""
+    try:
+        return IntervalSchedule(float(spec))
+    except ValueError:
+        return CronSchedule(spec)
+
+# END OF SCHEDULES
+
+# START OF COLLECTORS
+
+class Collector(ABC):
+    """
+    Base class for feed plugins. Subclasses set `name` and a default `schedule`
+    (seconds or a cron expression) and implement `batches`.
+    Every setting can be overridden per deployment with COLLECTOR_<NAME>_SCHEDULE,
+    COLLECTOR_<NAME>_JITTER and COLLECTOR_<NAME>_ENABLED.
+    """
+    name: str = ""
+    schedule: str = "3600"
+    # up to this many seconds of random delay before each run, so feeds don't fire in lockstep
+    jitter: float = 0.0
+
+    def __init__(self):
+        self.schedule = self.setting("SCHEDULE", self.schedule)
+        self.jitter = float(self.setting("JITTER", self.jitter))
+        self.enabled = self.is_enabled()
+
+    @classmethod
+    def setting(cls, key: str, default: Any = None) -> Any:
+        return os.getenv(f"COLLECTOR_{cls.name.upper()}_{key}", default)
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """Checked before instantiating, so a disabled feed never needs its API key."""
+        return str(cls.setting("ENABLED", "true")).lower() in ("1", "true", "yes")
+
+    @abstractmethod
+    def batches(self, db) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Async generator of lists of normalised events; each list is written as soon
+        as it is yielded. Raise on failure so the run is reported as failed (and any
+        cursor the collector keeps in sync_state is left where it was).
+        """
+        raise NotImplementedError
+
+def collector_classes(spec: Optional[str] = None) -> List[Type[Collector]]:
+    """
+    Imports the collectors listed in `spec` (default COLLECTORS) and returns the enabled
+    ones. Collector modules must import without their API keys; a key is only required
+    (and checked) when the collector is created.
+    """
+    classes = []
+    for entry in filter(None, (e.strip() for e in (spec or COLLECTORS).split(","))):
+        module_name, _, class_name = entry.partition(":")
+        collector_class = getattr(importlib.import_module(module_name), class_name)
+        if collector_class.is_enabled():
+            classes.append(collector_class)
+        else:
+            print(f"[INFO] collector {collector_class.name} is disabled")
+    return classes
+
+def load_collectors(spec: Optional[str] = None) -> List[Collector]:
+    """Instantiates the enabled collectors listed in `spec` (default COLLECTORS)."""
+    return [collector_class() for collector_class in collector_classes(spec)]
+
+# END OF COLLECTORS
@@ -0,0 +1,172 @@
+import time
+import random
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import httpx
+
+from backend.utils.metrics import HTTP_REQUEST_SECONDS
+
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class QuotaExceeded(RuntimeError):
+    """Raised instead of sending a request once a provider's daily quota is used up."""
+
+class TokenBucket:
+    """Smooths requests to `rate` per second with bursts of up to `burst`; can be paused by Retry-After."""
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class DailyQuota:
+    """Counts requests per UTC day; trusts the provider's X-RateLimit-Remaining when it sends one."""
+    def __init__(self, limit: Optional[int]):
+        self.limit = limit
+        self.day = None
+        self.used = 0
+        self.remaining: Optional[int] = None
+
+    def _roll(self):
+        today = datetime.now(timezone.utc).date()
+        if today != self.day:
+            self.day, self.used, self.remaining = today, 0, None
+
+    def exhausted(self) -> bool:
+        self._roll()
+        if self.remaining is not None and self.remaining <= 0:
+            return True
+        return self.limit is not None and self.used >= self.limit
+
+    def consume(self):
+        self._roll()
+        self.used += 1
+
+    def update_from_headers(self, headers: httpx.Headers):
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is not None and remaining.isdigit():
+            self.remaining = int(remaining)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+class ProviderClient:
+    """
+    A long-lived httpx client for one provider, with a token-bucket rate limit,
+    a cap on in-flight requests, a daily quota, and retry-with-jitter that honours
+    429/Retry-After responses.
+    """
+    def __init__(self, name: str, client: httpx.AsyncClient, rate: float, burst: int,
+                 concurrency: int, daily_quota: Optional[int], max_retries: int = 3, backoff: float = 1.0):
+        self.name = name
+        self.client = client
+        self.bucket = TokenBucket(rate, burst)
+        self.quota = DailyQuota(daily_quota)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        attempt = 0
+        while True:
+            if self.quota.exhausted():
+                raise QuotaExceeded(f"{self.name} daily quota exhausted")
+            await self.bucket.acquire()
+
+            retry_after = None
+            async with self.semaphore:
+                started = time.perf_counter()
+                try:
+                    self.quota.consume()
+                    resp = await self.client.get(url, **kwargs)
+                except httpx.TransportError:
+                    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, provider=self.name, status="error")
+                    if attempt >= self.max_retries:
+                        raise
+                else:
+                    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, provider=self.name, status=resp.status_code)
+                    self.quota.update_from_headers(resp.headers)
+                    if resp.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                        return resp
+                    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                    if resp.status_code == 429 and retry_after:
+                        # the whole provider is throttled, not just this request
+                        self.bucket.pause(retry_after)
+
+            # exponential backoff with full jitter, unless the server told us how long to wait
+            delay = retry_after if retry_after is not None else random.uniform(0, self.backoff * 2 ** attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+class HttpClientPool:
+    """
+    Process-wide registry of provider clients. Clients are created on first use
+    and closed by the FastAPI lifespan, so connections are reused across cycles.
+    """
+    def __init__(self):
+        self._settings: Dict[str, dict] = {}
+        self._providers: Dict[str, ProviderClient] = {}
+        # optional transport override for every client (e.g. httpx.MockTransport in benchmarks)
+        self.transport: Optional[httpx.AsyncBaseTransport] = None
+
+    def register(self, name: str, headers: Dict[str, str], timeout: float = 30.0, rate: float = 5.0,
+                 burst: int = 10, concurrency: int = 10, daily_quota: Optional[int] = None, max_retries: int = 3):
+        self._settings[name] = dict(headers=headers, timeout=timeout, rate=rate, burst=burst,
+                                    concurrency=concurrency, daily_quota=daily_quota, max_retries=max_retries)
+
+    def get(self, name: str) -> ProviderClient:
+        provider = self._providers.get(name)
+        if provider is None:
+            cfg = self._settings[name]
+            client = httpx.AsyncClient(
+                headers={k: v for k, v in cfg["headers"].items() if v is not None},
+                timeout=cfg["timeout"],
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_connections=cfg["concurrency"], max_keepalive_connections=cfg["concurrency"]),
+                transport=self.transport,
+            )
+            provider = ProviderClient(name, client, cfg["rate"], cfg["burst"], cfg["concurrency"],
+                                      cfg["daily_quota"], cfg["max_retries"])
+            self._providers[name] = provider
+        return provider
+
+    async def aclose(self):
+        providers, self._providers = self._providers, {}
+        for provider in providers.values():
+            await provider.client.aclose()
+
+http_pool = HttpClientPool()
@@ -2,70 +2,139 @@ import os
 import asyncio
 from math import ceil
 from datetime import datetime
-import httpx
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
+from backend.ingest.http import http_pool, ProviderClient
+from backend.ingest.collectors import Collector, normalised_event
+from backend.db.sync_state import get_sync_state, set_sync_state
+from backend.utils.offload import offload_parse
+from backend.utils.responses import loads
+
+# checked when an OTXCollector is created, so COLLECTOR_OTX_ENABLED=false works without a key
 OTX_API_KEY = os.getenv("OTX_API_KEY")
-if not OTX_API_KEY:
-    raise RuntimeError("OTX_API_KEY environment variable is required")
 
 BASE = "https://otx.alienvault.com/api/v1"
 PAGE_SIZE = 50
-MAX_PAGES = 3 # will increase pages with testing, 
-# might also have to change timeout duration due to long fetch times
+# pages per run; incremental runs go oldest first from the watermark, so a backlog longer
+# than this is worked through over several runs rather than skipped
+MAX_PAGES = int(os.getenv("OTX_MAX_PAGES", 10))
+
+http_pool.register(
+    "otx",
+    headers={"X-OTX-API-KEY": OTX_API_KEY},
+    timeout=60.0,
+    rate=float(os.getenv("OTX_RATE_PER_SEC", 2)),
+    burst=MAX_PAGES,
+    concurrency=int(os.getenv("OTX_CONCURRENCY", 4)),
+)
 
 # 🔧 Transform OTX pulse into a valid Event record
 def transform_otx_pulse(pulse):
-    return {
-        "source": "OTX",
-        "timestamp": datetime.fromisoformat(pulse.get("modified")).isoformat(),
-        "abuse_attacker_country": None,
-        "abuse_victim_country": None,
-        "abuse_attack": None,
-        "otx_name": pulse.get("name"),
-        "otx_description": pulse.get("description"),
-        "otx_country": (pulse.get("targeted_countries") or [None])[0]
-    }
+    return normalised_event(
+        "OTX",
+        datetime.fromisoformat(pulse.get("modified")).isoformat(),
+        victim_country=(pulse.get("targeted_countries") or [None])[0],
+        title=pulse.get("name"),
+        description=pulse.get("description"),
+        raw={
+            "pulse_id": pulse.get("id"),
+            "adversary": pulse.get("adversary") or None,
+            "tags": pulse.get("tags"),
+            "malware_families": pulse.get("malware_families"),
+            "industries": pulse.get("industries"),
+            "targeted_countries": pulse.get("targeted_countries"),
+        },
+    )
+
+def parse_pulse_page(content: bytes) -> Tuple[List[Dict[str, Any]], int]:
+    """Decodes a /search/pulses page and transforms its pulses; runs in the offload executor for large pages."""
+    data = loads(content)
+    return [transform_otx_pulse(p) for p in data["results"]], data["count"]
 
-async def fetch_page(client: httpx.AsyncClient, page: int):
+async def fetch_page(client: ProviderClient, page: int, modified_since: Optional[str] = None,
+                     sort: str = "-modified"):
     params = {
         "limit": PAGE_SIZE,
         "page": page,
-        "sort": "-modified",
+        "sort": sort,
         "q": "",
     }
+    if modified_since:
+        params["modified_since"] = modified_since
     url = f"{BASE}/search/pulses"
     resp = await client.get(url, params=params)
     resp.raise_for_status()
-    data = resp.json()
-    return data["results"], data["count"]
+    # decode + transform in one hand-off, so a process pool returns finished events
+    return await offload_parse(parse_pulse_page, resp.content)
 
-async def get_pulse_events():
-    headers = {"X-OTX-API-KEY": OTX_API_KEY}
-    
-    try:
-        async with httpx.AsyncClient(headers=headers, timeout=60.0) as client:
-            first_page_results, total_count = await fetch_page(client, page=1)
+async def iter_pulse_pages(modified_since: Optional[str] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Streams transformed pulses page by page, up to MAX_PAGES pages.
+    Without a watermark the newest pulses come first. With a modified_since watermark
+    only newer pulses are fetched, oldest first, so a run that stops at MAX_PAGES has
+    covered everything from the watermark up to its last page. The next page is
+    fetched while the caller is still writing the current one.
+    """
+    client = http_pool.get("otx")
+    since = datetime.fromisoformat(modified_since) if modified_since else None
+    sort = "modified" if since else "-modified"
 
-            total_pages = ceil(total_count / PAGE_SIZE)
-            pages_to_fetch = min(total_pages, MAX_PAGES)
-
-            if pages_to_fetch <= 1:
-                return [transform_otx_pulse(p) for p in first_page_results]
+    next_page = asyncio.create_task(fetch_page(client, 1, modified_since, sort))
+    page = 1
+    try:
+        while next_page is not None:
+            events, total_count = await next_page
+            next_page = None
+            last_page = min(ceil(total_count / PAGE_SIZE), MAX_PAGES)
 
-            tasks = [
-                fetch_page(client, page=p)
-                for p in range(2, pages_to_fetch + 1)
-            ]
-            results = await asyncio.gather(*tasks)
+            if events and page < last_page:
+                page += 1
+                next_page = asyncio.create_task(fetch_page(client, page, modified_since, sort))
 
-            # Flatten and transform all pulses
-            all_pulses = first_page_results + [
-                item
-                for (page_results, _) in results
-                for item in page_results
-            ]
+            fresh = [e for e in events if since is None or datetime.fromisoformat(e["timestamp"]) > since]
+            if fresh:
+                yield fresh
+    finally:
+        if next_page is not None:
+            next_page.cancel()
 
-            return [transform_otx_pulse(p) for p in all_pulses]
+async def get_pulse_events():
+    """Full (non-incremental) fetch of up to MAX_PAGES pages, as one list."""
+    try:
+        return [event async for page in iter_pulse_pages() for event in page]
     except Exception as e:
         print(f"[ERROR] OTX FETCH FAILED: {e}")
         return []
+
+OTX_WATERMARK_KEY = "otx.modified_since"
+
+class OTXCollector(Collector):
+    name = "OTX"
+    schedule = "1800"
+    jitter = 60
+
+    def __init__(self):
+        if not OTX_API_KEY:
+            raise RuntimeError("OTX_API_KEY environment variable is required")
+        super().__init__()
+
+    async def batches(self, db):
+        """
+        Streams pulses modified since the stored watermark, oldest first, moving the
+        watermark up to each page once it has been written. A run cut short by
+        OTX_MAX_PAGES (or by a failure) leaves it at the last page written, so the
+        next run carries on from there. The first run, with no watermark, takes the
+        newest pulses and starts the watermark at the newest of them.
+        """
+        since = await get_sync_state(db, OTX_WATERMARK_KEY)
+        newest = since
+        async for page in iter_pulse_pages(since):
+            page_newest = max(e["timestamp"] for e in page)
+            newest = max(newest, page_newest) if newest else page_newest
+            yield page
+            # resumed only after the caller has committed the page
+            if since:
+                await set_sync_state(db, OTX_WATERMARK_KEY, newest)
+
+        if not since and newest:
+            await set_sync_state(db, OTX_WATERMARK_KEY, newest)
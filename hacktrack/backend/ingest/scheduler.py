@@ -0,0 +1,204 @@
+import os
+import time
+import random
+import asyncio
+import traceback
+from typing import Dict, List, Optional
+
+from backend.db.session import AsyncSessionLocal
+from backend.db.sync_state import acquire_lease, release_lease
+from backend.db.work_queue import WORKER_ID
+from backend.ingest.collectors import Collector, collector_classes, parse_schedule
+from backend.utils.ingestor import run_ingest_cycle
+from backend.utils.metrics import COLLECTOR_RUNS, COLLECTOR_RUN_SECONDS
+from backend.utils.timestamps import epoch_seconds
+
+# how long one process may hold a feed before another is allowed to run it; a running
+# collector renews it between batches, so only a single batch has to finish within it
+COLLECTOR_LEASE_SECONDS = int(os.getenv("COLLECTOR_LEASE_SECONDS", 900))
+
+class LeaseLost(RuntimeError):
+    """Raised to stop a run whose collector lease could not be renewed."""
+
+class CollectorHealth:
+    """What the last runs of one collector did, for GET /collectors and /metrics."""
+    def __init__(self, collector: Collector):
+        self.name = collector.name
+        self.schedule = collector.schedule
+        self.running = False
+        self.runs = 0
+        self.consecutive_failures = 0
+        self.overlaps_skipped = 0
+        self.leased_elsewhere = 0
+        self.next_run_at: Optional[float] = None
+        self.last_started_at: Optional[float] = None
+        self.last_success_at: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        # seconds between when the last run was due and when it started
+        self.start_delay: Optional[float] = None
+        self.last_fetched = 0
+        self.last_inserted = 0
+        # timestamp of the newest event the feed has given us
+        self.newest_event_at: Optional[int] = None
+
+    def status(self) -> str:
+        if self.running:
+            return "running"
+        if self.consecutive_failures:
+            return "failing"
+        return "ok" if self.last_success_at else "pending"
+
+    def snapshot(self, now: Optional[float] = None) -> dict:
+        now = now or time.time()
+        return {
+            "name": self.name,
+            "schedule": self.schedule,
+            "status": self.status(),
+            "runs": self.runs,
+            "consecutive_failures": self.consecutive_failures,
+            "overlaps_skipped": self.overlaps_skipped,
+            "leased_elsewhere": self.leased_elsewhere,
+            "next_run_at": self.next_run_at,
+            "last_started_at": self.last_started_at,
+            "last_success_at": self.last_success_at,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+            "start_delay": self.start_delay,
+            "last_fetched": self.last_fetched,
+            "last_inserted": self.last_inserted,
+            # how far behind the feed we are, and how old its newest event is
+            "seconds_since_success": now - self.last_success_at if self.last_success_at else None,
+            "event_lag": now - self.newest_event_at if self.newest_event_at else None,
+        }
+
+class CollectorScheduler:
+    """
+    Runs every collector concurrently, each on its own interval or cron schedule
+    plus a random jitter. A run still going when the next one is due makes that one
+    skip rather than pile up, and a lease in sync_state keeps each feed to one
+    process at a time when several workers share the database.
+    """
+    def __init__(self, collectors: Optional[List[Collector]] = None, lease_seconds: int = COLLECTOR_LEASE_SECONDS):
+        # loaded in run(), so importing this module doesn't need every feed's API key
+        self.collectors = collectors
+        self.lease_seconds = lease_seconds
+        self.health: Dict[str, CollectorHealth] = {}
+
+    async def run(self):
+        if self.collectors is None:
+            self.collectors = self._create_collectors()
+        for collector in self.collectors:
+            self.health.setdefault(collector.name, CollectorHealth(collector))
+        print(f"[INFO] collectors: {', '.join(f'{c.name} ({c.schedule})' for c in self.collectors) or 'none'}")
+        await asyncio.gather(*(self._loop(c) for c in self.collectors))
+
+    def _create_collectors(self) -> List[Collector]:
+        """
+        Instantiates each enabled collector on its own, so one that can't start (e.g. a
+        missing API key) shows up as failing in its health while the others are scheduled.
+        """
+        collectors = []
+        for collector_class in collector_classes():
+            try:
+                collector = collector_class()
+            except Exception as exc:
+                health = CollectorHealth(collector_class)
+                health.schedule = collector_class.setting("SCHEDULE", collector_class.schedule)
+                health.consecutive_failures = 1
+                health.last_error = f"{type(exc).__name__}: {exc}"
+                self.health[collector_class.name] = health
+                print(f"[ERROR] {collector_class.name} collector could not be created; it will not run:\n"
+                      f"{''.join(traceback.format_exception(exc))}")
+                continue
+            self.health[collector.name] = CollectorHealth(collector)
+            collectors.append(collector)
+        return collectors
+
+    def snapshot(self) -> List[dict]:
+        now = time.time()
+        return [health.snapshot(now) for health in self.health.values()]
+
+    async def _loop(self, collector: Collector):
+        schedule = parse_schedule(collector.schedule)
+        health = self.health[collector.name]
+        due = schedule.first(time.time())
+        current: Optional[asyncio.Task] = None
+        try:
+            while True:
+                start_at = due + random.uniform(0, collector.jitter)
+                health.next_run_at = start_at
+                await asyncio.sleep(max(start_at - time.time(), 0))
+
+                if current is not None and not current.done():
+                    health.overlaps_skipped += 1
+                    COLLECTOR_RUNS.inc(collector=collector.name, outcome="overlap_skipped")
+                    print(f"[INFO] {collector.name} collector is still running; skipping this run")
+                else:
+                    current = asyncio.create_task(self._run(collector, health, due))
+
+                due = schedule.next_after(due)
+                if due < time.time():
+                    # fell behind (e.g. the host was suspended): carry on from now, not with every missed run
+                    due = schedule.next_after(time.time())
+        finally:
+            if current is not None:
+                current.cancel()
+
+    async def _lease(self, key: str) -> bool:
+        """Takes or renews a collector lease for this process."""
+        async with AsyncSessionLocal() as db:
+            return await acquire_lease(db, key, WORKER_ID, self.lease_seconds)
+
+    async def _run(self, collector: Collector, health: CollectorHealth, due: float):
+        lease_key = f"collector.{collector.name}.lease"
+        started = None
+        # lease handling is inside the try, so database errors show up in the collector's health
+        try:
+            if not await self._lease(lease_key):
+                health.leased_elsewhere += 1
+                COLLECTOR_RUNS.inc(collector=collector.name, outcome="leased_elsewhere")
+                return
+
+            started = renewed_at = time.time()
+            health.running = True
+            health.runs += 1
+            health.last_started_at = started
+            health.start_delay = max(started - due, 0.0)
+
+            async def tracked_batches(db):
+                nonlocal renewed_at
+                async for batch in collector.batches(db):
+                    if batch:
+                        newest = max(epoch_seconds(event["timestamp"]) for event in batch)
+                        health.newest_event_at = max(health.newest_event_at or newest, newest)
+                    # renew well before expiry, so a long run keeps the feed to itself
+                    if time.time() - renewed_at > self.lease_seconds / 3:
+                        if not await self._lease(lease_key):
+                            raise LeaseLost(f"{collector.name} lease was taken over by another process")
+                        renewed_at = time.time()
+                    yield batch
+
+            try:
+                with COLLECTOR_RUN_SECONDS.time(collector=collector.name):
+                    fetched, inserted, _ = await run_ingest_cycle(collector.name, tracked_batches)
+            finally:
+                async with AsyncSessionLocal() as db:
+                    await release_lease(db, lease_key, WORKER_ID)
+        except Exception as exc:
+            health.consecutive_failures += 1
+            health.last_error = f"{type(exc).__name__}: {exc}"
+            COLLECTOR_RUNS.inc(collector=collector.name, outcome="failed")
+            print(f"[ERROR] {collector.name} collector failed:\n{''.join(traceback.format_exception(exc))}")
+        else:
+            health.consecutive_failures = 0
+            health.last_error = None
+            health.last_success_at = time.time()
+            health.last_fetched, health.last_inserted = fetched, inserted
+            COLLECTOR_RUNS.inc(collector=collector.name, outcome="ok")
+        finally:
+            if started is not None:
+                health.running = False
+                health.last_duration = time.time() - started
+
+collector_scheduler = CollectorScheduler()
@@ -1,132 +1,81 @@
 import asyncio
-from collections import deque
-import traceback
-import random
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Query, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from fastapi.concurrency import asynccontextmanager
-from sqlalchemy import asc, delete
+from sqlalchemy import func
 from sqlalchemy.future import select
 
 # database
-from backend.db.session import get_db
+from backend.db.session import get_db, AsyncSessionLocal
 from backend.db.init import init_db
-from backend.db.models import Event
-from typing import Dict, Any, Optional, Tuple
-from backend.ai.summarizer import SummaryOutput
+from backend.db.models import Event, LogEntry
+from typing import Optional
 
 # background ingest
-from backend.utils.ingestor import (
-    fetch_otx_loop,
-    fetch_abuseipdb_loop,
+from backend.ingest.http import http_pool
+from backend.ingest.scheduler import collector_scheduler
+
+# live log streaming
+from backend.utils.broadcast import log_broadcaster, tail_log_entries
+
+# continuous summariser
+from backend.utils.pipeline import summary_pipeline
+
+# shared work queue and output store
+from backend.db.work_queue import (
+    drain_log_entries, read_log_entries, stream_log_entries, read_events, stream_events,
 )
 
-# summarisation
-from backend.ai.summarizer import summarize_event, create_arc_json
+# response encoding
+from backend.utils.responses import FastJSONResponse, STREAM_PAGE_THRESHOLD, dumps, json_array, stream_json_array
 
-load_dotenv()
+# historical analytics
+from backend.db.history import top_pairs, country_counts, time_buckets
 
-log_and_arc_queue: deque[Tuple[Event, Optional[Dict[str, Any]], SummaryOutput]] = deque(maxlen=500)
+# map geometry
+from backend.utils.arc_geometry import ARC_GEOMETRY, warm_arc_geometry
+from backend.utils.priority import seed_pair_novelty
 
-from fastapi.middleware.cors import CORSMiddleware
+# instrumentation
+from backend.utils.offload import loop_lag_monitor, shutdown_executor
+from backend.utils.metrics import REGISTRY, QUEUE_DEPTH, COLLECTOR_LAG
 
-# START OF HELPER FUNCTIONS 
+load_dotenv()
 
-# function to continuously create arcs jsons, summarize, and log events
-async def arc_and_log_batch(db):
-    print("[INFO] started summarization of events")
-    # take 50 database entries
-    events = (await db.execute(select(Event).order_by(asc(Event.timestamp)).limit(50))).scalars().all()
-    if not events:
-        return
-    
-    # function to create summaries/arcs
-    sem = asyncio.Semaphore(10)
-    async def _wrapped_summary(event):
-        async with sem:
-            return await summarize_event(event)
-
-    summaries = await asyncio.gather(*[asyncio.create_task(_wrapped_summary(event)) for event in events], return_exceptions=True)
-    
-    arcs = []
-    
-    # We iterate over the results of the summary batch
-    for event, summary in zip(events, summaries):
-        if isinstance(summary, Exception):
-            arcs.append(summary)
-            continue
+from fastapi.middleware.cors import CORSMiddleware
 
-        try:
-            # arc will now be a dict like {"arc": {...}, "resolved_names": {...}} or None
-            resolved_arc_data = create_arc_json(
-                summary['attacker_country'],
-                summary['victim_country']
-            )
-            arcs.append(resolved_arc_data) 
-        except Exception as arc_exc:
-            arcs.append(arc_exc)
-
-    ids_to_delete = []
-    # resolved_arc_data is the full dict output of create_arc_json, or an Exception
-    for event, resolved_arc_data, summary in zip(events, arcs, summaries):
-        # Handle exceptions from summarization
-        if isinstance(summary, Exception):
-            print(f"[ERROR] summarising event {event.id}:\n{''.join(traceback.format_exception(summary))}")
-            continue # Skip to next event, do not delete
-
-        # Check if arc creation succeeded or failed
-        if isinstance(resolved_arc_data, Exception) or resolved_arc_data is None:
-            if isinstance(resolved_arc_data, Exception):
-                print(f"[ERROR] creating arc for event {event.id}:\n{''.join(traceback.format_exception(resolved_arc_data))}")
-            
-            arc = None
-            # If the arc logic failed, we fall back to the original AI summary for logging
-            event.resolved_attacker_country = summary.get('attacker_country')
-            event.resolved_victim_country = summary.get('victim_country')
-        else:
-            # Arc logic succeeded, use the resolved name for logging
-            arc = resolved_arc_data['arc']
-            resolved_names = resolved_arc_data['resolved_names']
-
-            # Use the RESOLVED country names (original or random fallback) for the log
-            event.resolved_attacker_country = resolved_names['attacker_country']
-            event.resolved_victim_country = resolved_names['victim_country']
-
-        # log_and_arc_queue is appended with the event, arc (or None), and the summary dictionary
-        log_and_arc_queue.append((event, arc, summary))
-        ids_to_delete.append(event.id)
-
-    if ids_to_delete:
-        await db.execute(delete(Event).where(Event.id.in_(ids_to_delete)))
-        await db.commit()
-        print("[INFO] summarised events deleted")
-
-async def summariser_loop(interval: int = 30):
-    while True:
-        try:
-            async for db in get_db():
-                await arc_and_log_batch(db)
-        except Exception as exc:
-            print(f"[ERROR] summariser loop: {exc}")
-        await asyncio.sleep(interval)
+# START OF HELPER FUNCTIONS 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("[INFO] initialising DB …")
     await init_db()
 
+    # precompute arcs for the pairs seen most often so far
+    async with AsyncSessionLocal() as db:
+        await warm_arc_geometry(db)
+        # so pairs summarised before the restart don't all score as novel
+        await seed_pair_novelty(db)
+    print(f"[INFO] precomputed arc geometry for {len(ARC_GEOMETRY)} country pairs")
+
     tasks = [
-        # REAL API FETCHING (COMMENTED OUT)
-        asyncio.create_task(fetch_otx_loop()),
-        asyncio.create_task(fetch_abuseipdb_loop()),
+        # REAL API FETCHING: every feed in COLLECTORS, each on its own schedule
+        asyncio.create_task(collector_scheduler.run()),
         
         # SIMULATED ATTACK GENERATION
         # asyncio.create_task(simulate_attacks_loop()),
         
-        # summarization loop
-        asyncio.create_task(summariser_loop()),
+        # continuous summarisation pipeline
+        asyncio.create_task(summary_pipeline.run()),
+
+        # live stream fed from the shared output store
+        asyncio.create_task(tail_log_entries()),
+
+        # samples how long anything holds the event loop
+        asyncio.create_task(loop_lag_monitor.run()),
     ]
 
     yield
@@ -140,6 +89,9 @@ async def lifespan(app: FastAPI):
             pass
     print("[INFO] background tasks shut down")
 
+    await http_pool.aclose()
+    shutdown_executor()
+
 app = FastAPI(lifespan=lifespan)
 
 # define server endpoints
@@ -160,20 +112,105 @@ async def read_root():
     return {"message": "ThreatEchoAI API Running"}
 
 @app.get("/events")
-async def get_events(db=Depends(get_db)):
-    res = await db.execute(select(Event).order_by(asc(Event.timestamp)).limit(50))
-    return [e.__dict__ for e in res.scalars().all()]
+async def get_events(after: Optional[int] = None, limit: int = Query(50, ge=1, le=10000), db=Depends(get_db)):
+    """Unsummarised events by ascending id; pass the last id seen as `?after=` for the next page."""
+    if limit <= STREAM_PAGE_THRESHOLD:
+        return FastJSONResponse(await read_events(db, after, limit))
+    return stream_json_array(stream_events(after, limit))
 
 @app.get("/logs")
-async def get_logs():
-    output = []
-    # drain 50 entries from queue
-    for _ in range(min(50, len(log_and_arc_queue))):
-        event, arc, summary = log_and_arc_queue.popleft()
-        event_dict = event.__dict__.copy()
-        event_dict.pop('_sa_instance_state', None) 
-        output.append((event_dict, arc, summary)) 
-
-    return {"logs": output}
+async def get_logs(after: Optional[int] = None, limit: int = Query(50, ge=1, le=10000), db=Depends(get_db)):
+    """
+    Without `after`, hands out the next undelivered entries from the shared output store.
+    With `?after=<id>`, pages through the store read-only; `next` is the cursor for the following page.
+    """
+    # payloads are stored pre-encoded, so pages are assembled without decoding them
+    if after is None:
+        drained = await drain_log_entries(db, limit=limit)
+        return Response(b'{"logs":' + json_array(drained) + b"}", media_type="application/json")
+
+    if limit <= STREAM_PAGE_THRESHOLD:
+        rows = await read_log_entries(db, after, limit)
+        next_id = rows[-1][0] if rows else after
+        body = b'{"logs":' + json_array([data for _, data in rows]) + b',"next":' + dumps(next_id) + b"}"
+        return Response(body, media_type="application/json")
+
+    cursor = {"next": after}
+
+    async def payloads():
+        async for entry_id, data in stream_log_entries(after, limit):
+            cursor["next"] = entry_id
+            yield data
+
+    return stream_json_array(payloads(), prefix=b'{"logs":[', suffix=lambda: b'],"next":' + dumps(cursor["next"]) + b"}")
+
+def _epoch_or_none(value: Optional[datetime]) -> Optional[int]:
+    return int(value.timestamp()) if value is not None else None
+
+@app.get("/history/pairs")
+async def get_top_pairs(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                        limit: int = Query(20, ge=1, le=500), db=Depends(get_db)):
+    """Most frequent attacker -> victim pairs (ISO alpha-2 codes), at hourly resolution."""
+    return {"pairs": await top_pairs(db, _epoch_or_none(since), _epoch_or_none(until), limit)}
+
+@app.get("/history/countries")
+async def get_country_counts(role: str = Query("attacker", pattern="^(attacker|victim)$"),
+                             since: Optional[datetime] = None, until: Optional[datetime] = None,
+                             limit: int = Query(50, ge=1, le=500), db=Depends(get_db)):
+    return {"countries": await country_counts(db, role, _epoch_or_none(since), _epoch_or_none(until), limit)}
+
+@app.get("/history/timeline")
+async def get_timeline(bucket: int = Query(3600, ge=3600, multiple_of=3600), since: Optional[datetime] = None,
+                       until: Optional[datetime] = None, source: Optional[str] = None, db=Depends(get_db)):
+    """Event counts per `bucket` seconds; bucket starts are epoch seconds."""
+    return {"bucket": bucket, "buckets": await time_buckets(db, bucket, _epoch_or_none(since), _epoch_or_none(until), source)}
+
+@app.get("/collectors")
+async def get_collectors():
+    """Schedule, health and lag of every feed collector."""
+    return FastJSONResponse({"collectors": collector_scheduler.snapshot()})
+
+@app.get("/metrics")
+async def get_metrics(db=Depends(get_db)):
+    """Prometheus-style metrics; queue depths are sampled at scrape time."""
+    backlog = await db.execute(select(Event.status, func.count(Event.id)).group_by(Event.status))
+    # statuses with no rows are missing from the GROUP BY but still need their gauge reset
+    depths = {"pending": 0, "claimed": 0}
+    depths.update(backlog.all())
+    for status, count in depths.items():
+        QUEUE_DEPTH.set(count, queue=f"events_{status}")
+    undelivered = await db.execute(select(func.count(LogEntry.id)).where(LogEntry.delivered.is_(False)))
+    QUEUE_DEPTH.set(undelivered.scalar() or 0, queue="log_entries_undelivered")
+    for name, depth in summary_pipeline.queue_depths().items():
+        QUEUE_DEPTH.set(depth, queue=name)
+    QUEUE_DEPTH.set(log_broadcaster.subscriber_count, queue="stream_subscribers")
+    loop_lag_monitor.report()
+    for health in collector_scheduler.snapshot():
+        if health["seconds_since_success"] is not None:
+            COLLECTOR_LAG.set(health["seconds_since_success"], collector=health["name"])
+
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/logs/stream")
+async def stream_logs(request: Request, after: Optional[int] = None):
+    """
+    Server-Sent Events stream of summarised logs, broadcast to every viewer.
+    Resumes after `?after=<id>` or the Last-Event-ID header sent on reconnect.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if after is None and last_event_id and last_event_id.isdigit():
+        after = int(last_event_id)
+
+    async def frames():
+        async for frame in log_broadcaster.subscribe(after):
+            if await request.is_disconnected():
+                break
+            yield frame
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # END OF API ENDPOINTS
\ No newline at end of file
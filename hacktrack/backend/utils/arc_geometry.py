@@ -0,0 +1,113 @@
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.db.history import top_pairs
+from backend.utils.country_coords import COUNTRY_INDEX
+
+# points per arc are ARC_SEGMENTS + 1
+ARC_SEGMENTS = int(os.getenv("ARC_SEGMENTS", 32))
+# peak altitude as a fraction of the ground distance (matches the frontend's arcHeight)
+ARC_HEIGHT_RATIO = 0.25
+# lon/lat are sent as integers in 1/ARC_COORD_SCALE degrees (0.01 deg is about 1 km)
+ARC_COORD_SCALE = 100
+EARTH_RADIUS_KM = 6371.0
+
+def _unit_vectors(lonlat: np.ndarray) -> np.ndarray:
+    lon, lat = np.radians(lonlat[:, 0]), np.radians(lonlat[:, 1])
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+def great_circle_paths(src: np.ndarray, dst: np.ndarray, segments: int = ARC_SEGMENTS) -> np.ndarray:
+    """
+    Samples the great circle between each (src, dst) row, vectorised over all pairs.
+    src/dst are (N, 2) arrays of lon/lat degrees; returns (N, segments + 1, 3) of
+    lon, lat (degrees) and altitude (km) on a sin-shaped profile.
+    """
+    a, b = _unit_vectors(src), _unit_vectors(dst)
+    omega = np.arccos(np.clip(np.einsum("ij,ij->i", a, b), -1.0, 1.0))[:, None, None]
+    t = np.linspace(0.0, 1.0, segments + 1)[None, :, None]
+
+    # spherical interpolation; near-identical or antipodal endpoints fall back to a straight blend
+    sin_omega = np.sin(omega)
+    safe = sin_omega > 1e-6
+    wa = np.where(safe, np.sin((1 - t) * omega) / np.where(safe, sin_omega, 1), 1 - t)
+    wb = np.where(safe, np.sin(t * omega) / np.where(safe, sin_omega, 1), t)
+    points = wa * a[:, None, :] + wb * b[:, None, :]
+    points /= np.linalg.norm(points, axis=-1, keepdims=True)
+
+    lon = np.degrees(np.arctan2(points[..., 1], points[..., 0]))
+    lat = np.degrees(np.arcsin(np.clip(points[..., 2], -1.0, 1.0)))
+    alt = np.sin(np.pi * t[..., 0]) * omega[..., 0] * EARTH_RADIUS_KM * ARC_HEIGHT_RATIO
+    return np.stack([lon, lat, alt], axis=-1)
+
+def quantise_paths(paths: np.ndarray) -> List[Tuple[int, ...]]:
+    """Flattens each path to [lon, lat, alt_km, ...] integers, lon/lat scaled by ARC_COORD_SCALE."""
+    scaled = paths * np.array([ARC_COORD_SCALE, ARC_COORD_SCALE, 1.0])
+    return [tuple(row) for row in np.rint(scaled).astype(np.int32).reshape(len(paths), -1).tolist()]
+
+class ArcGeometryCache:
+    """
+    Memoised, quantised great-circle geometry per (attacker, victim) country pair.
+    Frequent pairs are computed together at startup with `warm`; anything else is
+    computed on first use. Pairs are canonical country names from COUNTRY_INDEX.
+    """
+    def __init__(self, segments: int = ARC_SEGMENTS, max_pairs: int = 20000):
+        self.segments = segments
+        self.max_pairs = max_pairs
+        self._paths: Dict[Tuple[str, str], Tuple[int, ...]] = {}
+        # last pair computed while the cache was full
+        self._overflow: Dict[Tuple[str, str], Tuple[int, ...]] = {}
+
+    def __len__(self):
+        return len(self._paths)
+
+    def warm(self, pairs: Iterable[Tuple[str, str]]) -> int:
+        """Computes geometry for every uncached pair in one vectorised pass; returns how many were added."""
+        todo = []
+        for src_name, dst_name in pairs:
+            if (src_name, dst_name) in self._paths or src_name == dst_name:
+                continue
+            src, dst = COUNTRY_INDEX.centroids.get(src_name), COUNTRY_INDEX.centroids.get(dst_name)
+            if src and dst:
+                todo.append(((src_name, dst_name), src, dst))
+        if not todo:
+            return 0
+
+        paths = great_circle_paths(
+            np.array([src for _, src, _ in todo], dtype=float),
+            np.array([dst for _, _, dst in todo], dtype=float),
+            self.segments,
+        )
+        added = 0
+        for (key, _, _), path in zip(todo, quantise_paths(paths)):
+            # past the cap, pairs are still returned by `path` but recomputed on each use
+            if len(self._paths) >= self.max_pairs:
+                self._overflow = {key: path}
+                continue
+            self._paths[key] = path
+            added += 1
+        return added
+
+    def path(self, src_name: Optional[str], dst_name: Optional[str]) -> Optional[dict]:
+        """Arc geometry for the pair, or None for self-attacks and unknown countries."""
+        if not src_name or not dst_name or src_name == dst_name:
+            return None
+        key = (src_name, dst_name)
+        if key not in self._paths:
+            self.warm([key])
+        coords = self._paths.get(key) or self._overflow.get(key)
+        if coords is None:
+            return None
+        return {"scale": ARC_COORD_SCALE, "coords": coords}
+
+ARC_GEOMETRY = ArcGeometryCache()
+
+async def warm_arc_geometry(db, limit: int = 500) -> int:
+    """Precomputes geometry for the most frequent pairs in the event history."""
+    pairs = []
+    for row in await top_pairs(db, limit=limit):
+        src, dst = COUNTRY_INDEX.by_iso_code.get(row["attacker"]), COUNTRY_INDEX.by_iso_code.get(row["victim"])
+        if src and dst:
+            pairs.append((src, dst))
+    return ARC_GEOMETRY.warm(pairs)
@@ -0,0 +1,130 @@
+import os
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Optional, Set, Tuple
+
+from backend.db.session import AsyncSessionLocal
+from backend.db.work_queue import read_log_entries, recent_log_entries
+from backend.utils.responses import dumps
+
+def _log_frame(seq: int, data: bytes) -> bytes:
+    return b"id: %d\nevent: log\ndata: %s\n\n" % (seq, data)
+
+class _Subscriber:
+    """Bounded per-client buffer; when a slow client falls behind, the oldest frames are dropped."""
+    def __init__(self, maxlen: int):
+        self.frames: Deque[bytes] = deque(maxlen=maxlen)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, frame: bytes):
+        if len(self.frames) == self.frames.maxlen:
+            self.dropped += 1
+        self.frames.append(frame)
+        self.ready.set()
+
+class LogBroadcaster:
+    """
+    Fans summarised log entries out to every connected stream client.
+    Each entry is serialised once into a Server-Sent Events frame carrying a
+    sequence id, so reconnecting clients can resume with Last-Event-ID from
+    the recent history instead of losing events.
+    """
+    def __init__(self, history: int = 500, client_buffer: int = 200, keepalive: float = 15.0):
+        self.seq = 0
+        self.history: Deque[Tuple[int, bytes]] = deque(maxlen=history)
+        self.client_buffer = client_buffer
+        self.keepalive = keepalive
+        self._subscribers: Set[_Subscriber] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, entry: Any, seq: Optional[int] = None) -> int:
+        """Broadcasts an entry (bytes are taken as already-encoded JSON) and keeps it for resuming clients."""
+        # entries from the shared output store keep their row id as sequence number
+        self.seq = seq if seq is not None else self.seq + 1
+        frame = _log_frame(self.seq, entry if isinstance(entry, bytes) else dumps(entry))
+        self.history.append((self.seq, frame))
+        for sub in self._subscribers:
+            sub.push(frame)
+        return self.seq
+
+    def _oldest_kept(self) -> int:
+        return self.history[0][0] if self.history else self.seq + 1
+
+    def publish_transient(self, event_name: str, data: Any):
+        """Sends a frame to current subscribers only: no sequence id, not kept for resuming clients."""
+        frame = b"event: %s\ndata: %s\n\n" % (event_name.encode("ascii"), dumps(data))
+        for sub in self._subscribers:
+            sub.push(frame)
+
+    async def subscribe(self, after: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Yield frames newer than `after` (if given), then live frames until the caller stops."""
+        sub = _Subscriber(self.client_buffer)
+        if after is not None:
+            backlog = []
+            if after < self._oldest_kept() - 1:
+                # the client is further behind than the in-memory history (e.g. after a restart)
+                async with AsyncSessionLocal() as db:
+                    backlog = await read_log_entries(db, after=after, limit=self.client_buffer)
+            # no awaits from here until the subscriber is registered, so nothing is missed or repeated
+            oldest_kept = self._oldest_kept()
+            for entry_id, data in backlog:
+                if entry_id < oldest_kept:
+                    sub.push(_log_frame(entry_id, data))
+            for seq, frame in self.history:
+                if seq > after:
+                    sub.push(frame)
+        self._subscribers.add(sub)
+        try:
+            while True:
+                if not sub.frames:
+                    sub.ready.clear()
+                    try:
+                        await asyncio.wait_for(sub.ready.wait(), timeout=self.keepalive)
+                    except asyncio.TimeoutError:
+                        # comment frame keeps proxies from closing an idle stream
+                        yield b": keepalive\n\n"
+                        continue
+                yield sub.frames.popleft()
+        finally:
+            self._subscribers.discard(sub)
+
+# frames kept in memory for clients resuming with Last-Event-ID (older ones are read from the store)
+log_broadcaster = LogBroadcaster(history=int(os.getenv("LOG_STREAM_HISTORY", 500)))
+
+# set by the local summariser so the tailer doesn't wait for its next poll
+log_entries_written = asyncio.Event()
+
+async def tail_log_entries(broadcaster: LogBroadcaster = log_broadcaster, poll_interval: float = 1.0):
+    """
+    Feeds the broadcaster from the shared output store, so viewers connected to any
+    worker process see entries summarised by every worker. On startup the newest
+    stored entries are preloaded into the history, so clients resume across restarts.
+    """
+    last_id = 0
+    async with AsyncSessionLocal() as db:
+        for entry_id, data in await recent_log_entries(db, limit=broadcaster.history.maxlen):
+            broadcaster.publish(data, seq=entry_id)
+            last_id = entry_id
+
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                while True:
+                    rows = await read_log_entries(db, after=last_id)
+                    for entry_id, data in rows:
+                        broadcaster.publish(data, seq=entry_id)
+                        last_id = entry_id
+                    if len(rows) < 100:
+                        break
+        except Exception as exc:
+            print(f"[ERROR] log stream tailer: {exc}")
+
+        log_entries_written.clear()
+        try:
+            await asyncio.wait_for(log_entries_written.wait(), timeout=poll_interval)
+        except asyncio.TimeoutError:
+            pass
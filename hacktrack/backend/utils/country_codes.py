@@ -0,0 +1,247 @@
+# ISO 3166-1 alpha-2 / alpha-3 codes for every name used in countries_centroids.json
+# (Somaliland and N. Cyprus have no ISO code; Kosovo uses the common user-assigned XK/XKX)
+ISO_CODES = {
+    "Fiji": ("FJ", "FJI"),
+    "Tanzania": ("TZ", "TZA"),
+    "W. Sahara": ("EH", "ESH"),
+    "Canada": ("CA", "CAN"),
+    "United States of America": ("US", "USA"),
+    "Kazakhstan": ("KZ", "KAZ"),
+    "Uzbekistan": ("UZ", "UZB"),
+    "Papua New Guinea": ("PG", "PNG"),
+    "Indonesia": ("ID", "IDN"),
+    "Argentina": ("AR", "ARG"),
+    "Chile": ("CL", "CHL"),
+    "Dem. Rep. Congo": ("CD", "COD"),
+    "Somalia": ("SO", "SOM"),
+    "Kenya": ("KE", "KEN"),
+    "Sudan": ("SD", "SDN"),
+    "Chad": ("TD", "TCD"),
+    "Haiti": ("HT", "HTI"),
+    "Dominican Rep.": ("DO", "DOM"),
+    "Russia": ("RU", "RUS"),
+    "Bahamas": ("BS", "BHS"),
+    "Falkland Is.": ("FK", "FLK"),
+    "Norway": ("NO", "NOR"),
+    "Greenland": ("GL", "GRL"),
+    "Fr. S. Antarctic Lands": ("TF", "ATF"),
+    "Timor-Leste": ("TL", "TLS"),
+    "South Africa": ("ZA", "ZAF"),
+    "Lesotho": ("LS", "LSO"),
+    "Mexico": ("MX", "MEX"),
+    "Uruguay": ("UY", "URY"),
+    "Brazil": ("BR", "BRA"),
+    "Bolivia": ("BO", "BOL"),
+    "Peru": ("PE", "PER"),
+    "Colombia": ("CO", "COL"),
+    "Panama": ("PA", "PAN"),
+    "Costa Rica": ("CR", "CRI"),
+    "Nicaragua": ("NI", "NIC"),
+    "Honduras": ("HN", "HND"),
+    "El Salvador": ("SV", "SLV"),
+    "Guatemala": ("GT", "GTM"),
+    "Belize": ("BZ", "BLZ"),
+    "Venezuela": ("VE", "VEN"),
+    "Guyana": ("GY", "GUY"),
+    "Suriname": ("SR", "SUR"),
+    "France": ("FR", "FRA"),
+    "Ecuador": ("EC", "ECU"),
+    "Puerto Rico": ("PR", "PRI"),
+    "Jamaica": ("JM", "JAM"),
+    "Cuba": ("CU", "CUB"),
+    "Zimbabwe": ("ZW", "ZWE"),
+    "Botswana": ("BW", "BWA"),
+    "Namibia": ("NA", "NAM"),
+    "Senegal": ("SN", "SEN"),
+    "Mali": ("ML", "MLI"),
+    "Mauritania": ("MR", "MRT"),
+    "Benin": ("BJ", "BEN"),
+    "Niger": ("NE", "NER"),
+    "Nigeria": ("NG", "NGA"),
+    "Cameroon": ("CM", "CMR"),
+    "Togo": ("TG", "TGO"),
+    "Ghana": ("GH", "GHA"),
+    "Côte d'Ivoire": ("CI", "CIV"),
+    "Guinea": ("GN", "GIN"),
+    "Guinea-Bissau": ("GW", "GNB"),
+    "Liberia": ("LR", "LBR"),
+    "Sierra Leone": ("SL", "SLE"),
+    "Burkina Faso": ("BF", "BFA"),
+    "Central African Rep.": ("CF", "CAF"),
+    "Congo": ("CG", "COG"),
+    "Gabon": ("GA", "GAB"),
+    "Eq. Guinea": ("GQ", "GNQ"),
+    "Zambia": ("ZM", "ZMB"),
+    "Malawi": ("MW", "MWI"),
+    "Mozambique": ("MZ", "MOZ"),
+    "eSwatini": ("SZ", "SWZ"),
+    "Angola": ("AO", "AGO"),
+    "Burundi": ("BI", "BDI"),
+    "Israel": ("IL", "ISR"),
+    "Lebanon": ("LB", "LBN"),
+    "Madagascar": ("MG", "MDG"),
+    "Palestine": ("PS", "PSE"),
+    "Gambia": ("GM", "GMB"),
+    "Tunisia": ("TN", "TUN"),
+    "Algeria": ("DZ", "DZA"),
+    "Jordan": ("JO", "JOR"),
+    "United Arab Emirates": ("AE", "ARE"),
+    "Qatar": ("QA", "QAT"),
+    "Kuwait": ("KW", "KWT"),
+    "Iraq": ("IQ", "IRQ"),
+    "Oman": ("OM", "OMN"),
+    "Vanuatu": ("VU", "VUT"),
+    "Cambodia": ("KH", "KHM"),
+    "Thailand": ("TH", "THA"),
+    "Laos": ("LA", "LAO"),
+    "Myanmar": ("MM", "MMR"),
+    "Vietnam": ("VN", "VNM"),
+    "North Korea": ("KP", "PRK"),
+    "South Korea": ("KR", "KOR"),
+    "Mongolia": ("MN", "MNG"),
+    "India": ("IN", "IND"),
+    "Bangladesh": ("BD", "BGD"),
+    "Bhutan": ("BT", "BTN"),
+    "Nepal": ("NP", "NPL"),
+    "Pakistan": ("PK", "PAK"),
+    "Afghanistan": ("AF", "AFG"),
+    "Tajikistan": ("TJ", "TJK"),
+    "Kyrgyzstan": ("KG", "KGZ"),
+    "Turkmenistan": ("TM", "TKM"),
+    "Iran": ("IR", "IRN"),
+    "Syria": ("SY", "SYR"),
+    "Armenia": ("AM", "ARM"),
+    "Sweden": ("SE", "SWE"),
+    "Belarus": ("BY", "BLR"),
+    "Ukraine": ("UA", "UKR"),
+    "Poland": ("PL", "POL"),
+    "Austria": ("AT", "AUT"),
+    "Hungary": ("HU", "HUN"),
+    "Moldova": ("MD", "MDA"),
+    "Romania": ("RO", "ROU"),
+    "Lithuania": ("LT", "LTU"),
+    "Latvia": ("LV", "LVA"),
+    "Estonia": ("EE", "EST"),
+    "Germany": ("DE", "DEU"),
+    "Bulgaria": ("BG", "BGR"),
+    "Greece": ("GR", "GRC"),
+    "Turkey": ("TR", "TUR"),
+    "Albania": ("AL", "ALB"),
+    "Croatia": ("HR", "HRV"),
+    "Switzerland": ("CH", "CHE"),
+    "Luxembourg": ("LU", "LUX"),
+    "Belgium": ("BE", "BEL"),
+    "Netherlands": ("NL", "NLD"),
+    "Portugal": ("PT", "PRT"),
+    "Spain": ("ES", "ESP"),
+    "Ireland": ("IE", "IRL"),
+    "New Caledonia": ("NC", "NCL"),
+    "Solomon Is.": ("SB", "SLB"),
+    "New Zealand": ("NZ", "NZL"),
+    "Australia": ("AU", "AUS"),
+    "Sri Lanka": ("LK", "LKA"),
+    "China": ("CN", "CHN"),
+    "Taiwan": ("TW", "TWN"),
+    "Italy": ("IT", "ITA"),
+    "Denmark": ("DK", "DNK"),
+    "United Kingdom": ("GB", "GBR"),
+    "Iceland": ("IS", "ISL"),
+    "Azerbaijan": ("AZ", "AZE"),
+    "Georgia": ("GE", "GEO"),
+    "Philippines": ("PH", "PHL"),
+    "Malaysia": ("MY", "MYS"),
+    "Brunei": ("BN", "BRN"),
+    "Slovenia": ("SI", "SVN"),
+    "Finland": ("FI", "FIN"),
+    "Slovakia": ("SK", "SVK"),
+    "Czechia": ("CZ", "CZE"),
+    "Eritrea": ("ER", "ERI"),
+    "Japan": ("JP", "JPN"),
+    "Paraguay": ("PY", "PRY"),
+    "Yemen": ("YE", "YEM"),
+    "Saudi Arabia": ("SA", "SAU"),
+    "Cyprus": ("CY", "CYP"),
+    "Morocco": ("MA", "MAR"),
+    "Egypt": ("EG", "EGY"),
+    "Libya": ("LY", "LBY"),
+    "Ethiopia": ("ET", "ETH"),
+    "Djibouti": ("DJ", "DJI"),
+    "Uganda": ("UG", "UGA"),
+    "Rwanda": ("RW", "RWA"),
+    "Bosnia and Herz.": ("BA", "BIH"),
+    "Macedonia": ("MK", "MKD"),
+    "Serbia": ("RS", "SRB"),
+    "Montenegro": ("ME", "MNE"),
+    "Kosovo": ("XK", "XKX"),
+    "Trinidad and Tobago": ("TT", "TTO"),
+    "S. Sudan": ("SS", "SSD"),
+}
+
+# common spellings that normalisation alone cannot map onto the centroid names
+ALIASES = {
+    "United States": "United States of America",
+    "America": "United States of America",
+    "Russian Federation": "Russia",
+    "Western Sahara": "W. Sahara",
+    "Congo (Democratic Republic)": "Dem. Rep. Congo",
+    "DR Congo": "Dem. Rep. Congo",
+    "Congo, The Democratic Republic of the": "Dem. Rep. Congo",
+    "DRC": "Dem. Rep. Congo",
+    "Congo-Kinshasa": "Dem. Rep. Congo",
+    "Congo-Brazzaville": "Congo",
+    "Republic of the Congo": "Congo",
+    "Ivory Coast": "Côte d'Ivoire",
+    "Swaziland": "eSwatini",
+    "Eswatini": "eSwatini",
+    "East Timor": "Timor-Leste",
+    "Falkland Islands (Malvinas)": "Falkland Is.",
+    "French Southern Territories": "Fr. S. Antarctic Lands",
+    "Lao People's Democratic Republic": "Laos",
+    "Viet Nam": "Vietnam",
+    "Korea, Republic of": "South Korea",
+    "Republic of Korea": "South Korea",
+    "Korea": "South Korea",
+    "Korea, Democratic People's Republic of": "North Korea",
+    "Democratic People's Republic of Korea": "North Korea",
+    "DPRK": "North Korea",
+    "Iran, Islamic Republic of": "Iran",
+    "Islamic Republic of Iran": "Iran",
+    "Syrian Arab Republic": "Syria",
+    "Moldova, Republic of": "Moldova",
+    "Republic of Moldova": "Moldova",
+    "Tanzania, United Republic of": "Tanzania",
+    "United Republic of Tanzania": "Tanzania",
+    "Bolivia, Plurinational State of": "Bolivia",
+    "Venezuela, Bolivarian Republic of": "Venezuela",
+    "Taiwan, Province of China": "Taiwan",
+    "Republic of China": "Taiwan",
+    "People's Republic of China": "China",
+    "Hong Kong": "China",
+    "Macao": "China",
+    "Brunei Darussalam": "Brunei",
+    "Czech Republic": "Czechia",
+    "North Macedonia": "Macedonia",
+    "Republic of North Macedonia": "Macedonia",
+    "Bosnia and Herzegovina": "Bosnia and Herz.",
+    "Türkiye": "Turkey",
+    "Turkiye": "Turkey",
+    "Burma": "Myanmar",
+    "Palestine, State of": "Palestine",
+    "Palestinian Territory": "Palestine",
+    "State of Palestine": "Palestine",
+    "Northern Cyprus": "N. Cyprus",
+    "South Sudan": "S. Sudan",
+    "Great Britain": "United Kingdom",
+    "Britain": "United Kingdom",
+    "England": "United Kingdom",
+    "Scotland": "United Kingdom",
+    "Wales": "United Kingdom",
+    "Northern Ireland": "United Kingdom",
+    "UK": "United Kingdom",
+    "Holland": "Netherlands",
+    "The Netherlands": "Netherlands",
+    "Netherlands (Kingdom of the)": "Netherlands",
+    "Gambia, The": "Gambia",
+    "Bahamas, The": "Bahamas",
+    "UAE": "United Arab Emirates",
+}
@@ -1,12 +1,125 @@
-import json
 import os
+import re
+import json
+import random
+import difflib
+import unicodedata
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Optional, Tuple
+
+from backend.utils.country_codes import ISO_CODES, ALIASES
 
 HERE = os.path.dirname(__file__)
-JSON_PATH = os.path.join(HERE, "backend/utils/countries_centroids.json")
+JSON_PATH = os.path.join(HERE, "countries_centroids.json")
+
+# abbreviations used by the centroid names (e.g. "Dem. Rep. Congo", "Solomon Is.")
+_ABBREVIATIONS = {
+    "dem": "democratic",
+    "rep": "republic",
+    "is": "islands",
+    "eq": "equatorial",
+    "fr": "french",
+    "st": "saint",
+    "herz": "herzegovina",
+    "n": "north",
+    "s": "south",
+    "w": "western",
+}
+_FILLER_WORDS = {"the", "of"}
+
+def normalise_country_name(name: str) -> str:
+    """Lowercase, strip accents/punctuation, expand abbreviations and drop filler words."""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    name = name.lower().replace("&", " and ")
+    words = re.findall(r"[a-z0-9]+", name)
+    return " ".join(_ABBREVIATIONS.get(w, w) for w in words if w not in _FILLER_WORDS)
+
+class CountryIndex:
+    """
+    Immutable lookup of country centroids, built once per process.
+    Resolves canonical names, aliases, ISO alpha-2/alpha-3 codes and loosely
+    formatted names onto the canonical names used in countries_centroids.json.
+    """
+    def __init__(self, centroids: dict):
+        self.centroids = MappingProxyType({
+            name: coords for name, coords in centroids.items() if coords is not None
+        })
+        self.valid_names: Tuple[str, ...] = tuple(
+            name for name in self.centroids if name.strip() != "Undetermined"
+        )
+
+        lookup = {}
+        for name in self.valid_names:
+            lookup[normalise_country_name(name)] = name
+        for alias, name in ALIASES.items():
+            if name in self.centroids:
+                lookup.setdefault(normalise_country_name(alias), name)
+        self.by_normalised_name = MappingProxyType(lookup)
+
+        codes = {}
+        for name, (alpha2, alpha3) in ISO_CODES.items():
+            if name in self.centroids:
+                codes[alpha2] = name
+                codes[alpha3] = name
+        self.by_iso_code = MappingProxyType(codes)
+        self.iso_code_for = MappingProxyType({name: alpha2 for alpha2, name in codes.items() if len(alpha2) == 2})
+
+        self._normalised_names: List[str] = list(lookup)
+
+    def resolve(self, country_name: Optional[str]) -> Optional[str]:
+        """Return the canonical country name, or None if nothing plausible matches."""
+        if not country_name:
+            return None
+        return _resolve_cached(self, country_name.strip())
+
+    def _resolve_uncached(self, name: str) -> Optional[str]:
+        if name in self.centroids:
+            return name
+        if len(name) <= 3 and name.upper() in self.by_iso_code:
+            return self.by_iso_code[name.upper()]
+
+        key = normalise_country_name(name)
+        if key in self.by_normalised_name:
+            return self.by_normalised_name[key]
+
+        # last resort: close spelling, e.g. "Phillipines" or "Republic of Congo"
+        match = difflib.get_close_matches(key, self._normalised_names, n=1, cutoff=0.85)
+        return self.by_normalised_name[match[0]] if match else None
+
+    def iso_code(self, country_name: Optional[str]) -> Optional[str]:
+        """ISO alpha-2 code for a country name or code, or None if it doesn't resolve to one."""
+        name = self.resolve(country_name)
+        return self.iso_code_for.get(name) if name else None
+
+    def coords(self, country_name: Optional[str]):
+        name = self.resolve(country_name)
+        return self.centroids[name] if name else None
+
+    def coords_or_random(self, country_name: Optional[str]):
+        """Looks up coordinates, or returns coordinates of a random valid country, and the resolved name."""
+        name = self.resolve(country_name)
+        if name:
+            return self.centroids[name], name
+
+        if self.valid_names:
+            random_name = random.choice(self.valid_names)
+            return self.centroids[random_name], random_name
+
+        return None, 'Unknown'
+
+# memoised per (index, raw name); names seen in the feeds repeat constantly
+@lru_cache(maxsize=4096)
+def _resolve_cached(index: CountryIndex, name: str) -> Optional[str]:
+    return index._resolve_uncached(name)
+
+def _load_index() -> CountryIndex:
+    with open(JSON_PATH, "r", encoding="utf-8") as f:
+        return CountryIndex(json.load(f))
 
-with open(JSON_PATH, "r", encoding="utf-8") as f:
-    COUNTRY_CENTROIDS = json.load(f)
+COUNTRY_INDEX = _load_index()
+COUNTRY_CENTROIDS = COUNTRY_INDEX.centroids
 
 def get_country_centroid(country_name: str):
     """Return the centroid (lon, lat) for a given country name."""
-    return COUNTRY_CENTROIDS.get(country_name, [0.0, 0.0])
+    return COUNTRY_INDEX.coords(country_name) or [0.0, 0.0]
@@ -0,0 +1,164 @@
+import os
+import re
+import time
+import hashlib
+from collections import Counter, defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+# how long an ingested event stays a merge target, and how many are remembered
+DEDUPE_WINDOW_SECONDS = int(os.getenv("DEDUPE_WINDOW_SECONDS", 12 * 3600))
+DEDUPE_MAX_ENTRIES = int(os.getenv("DEDUPE_MAX_ENTRIES", 50000))
+# SimHash bit differences still treated as the same event (0 disables near matches)
+DEDUPE_MAX_DISTANCE = int(os.getenv("DEDUPE_MAX_DISTANCE", 3))
+DEDUPE_ENABLED = os.getenv("DEDUPE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# IPs, hashes, ports and counts differ between otherwise identical reports
+_NOISE = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b|\b[0-9a-f]{32,}\b|\d+")
+_WORD = re.compile(r"[a-z]{2,}")
+
+# START OF SIGNATURES
+
+def event_text(event: Dict[str, Any]) -> str:
+    return " ".join(filter(None, (event.get("title"), event.get("description"))))
+
+def partition_key(event: Dict[str, Any]) -> Tuple:
+    # only events that would draw the same arc may merge
+    return (event.get("source"), event.get("attacker_country"), event.get("victim_country"))
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over normalised words and word pairs."""
+    words = _WORD.findall(_NOISE.sub(" ", text.lower()))
+    features = Counter(words)
+    features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+
+    if not features:
+        return 0
+
+    digests = b"".join(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest() for f in features)
+    # one row of 64 bits per feature, most significant bit first
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(len(features), 64)
+    weights = np.fromiter(features.values(), dtype=np.int64, count=len(features))
+    votes = weights @ (bits.astype(np.int64) * 2 - 1)
+    return int.from_bytes(np.packbits(votes > 0).tobytes(), "big")
+
+# END OF SIGNATURES
+
+class _Entry:
+    __slots__ = ("partition", "signature", "key", "expires", "event_id", "event")
+
+    def __init__(self, partition, signature, key, expires, event):
+        self.partition = partition
+        self.signature = signature
+        # (source, timestamp): the same report fetched again is a repeat, not a near-duplicate
+        self.key = key
+        self.expires = expires
+        # the row id once inserted; until then, the event dict still waiting to be written
+        self.event_id: Optional[int] = None
+        self.event = event
+
+class NearDuplicateIndex:
+    """
+    In-memory SimHash index of recently ingested events.
+    Signatures are split into max_distance + 1 bands, so any two within
+    max_distance bits share at least one band exactly and are found through the
+    band buckets without comparing against every entry.
+    """
+    def __init__(self, window: int = DEDUPE_WINDOW_SECONDS, max_distance: int = DEDUPE_MAX_DISTANCE,
+                 max_entries: int = DEDUPE_MAX_ENTRIES):
+        self.window = window
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.bands = max_distance + 1
+        self.band_bits = 64 // self.bands
+        self._entries: Deque[_Entry] = deque()
+        self._buckets: Dict[Tuple, Set[_Entry]] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _band_keys(self, partition, signature: int):
+        mask = (1 << self.band_bits) - 1
+        for band in range(self.bands):
+            yield (partition, band, signature >> (band * self.band_bits) & mask)
+
+    def _expire(self, now: float):
+        while self._entries and (self._entries[0].expires < now or len(self._entries) > self.max_entries):
+            self._remove(self._entries.popleft())
+
+    def _remove(self, entry: _Entry):
+        for band_key in self._band_keys(entry.partition, entry.signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(entry)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def _find(self, partition, signature: int) -> Optional[_Entry]:
+        for band_key in self._band_keys(partition, signature):
+            for entry in self._buckets.get(band_key, ()):
+                if (entry.signature ^ signature).bit_count() <= self.max_distance:
+                    return entry
+        return None
+
+    def _add(self, partition, signature: int, key, now: float, event) -> _Entry:
+        entry = _Entry(partition, signature, key, now + self.window, event)
+        self._entries.append(entry)
+        for band_key in self._band_keys(partition, signature):
+            self._buckets.setdefault(band_key, set()).add(entry)
+        return entry
+
+    def collapse(self, events: List[Dict[str, Any]], now: Optional[float] = None,
+                 signatures: Optional[List[int]] = None):
+        """
+        Splits a batch into events to insert and merges into existing rows.
+        Returns (fresh, pending, merges): fresh event dicts (with duplicate_count
+        covering in-batch near-duplicates), their index entries to `bind` once
+        ids are known, and {event_id: [events]} to fold into rows already stored.
+        Exact repeats of a remembered (source, timestamp) are dropped.
+        `signatures` may be precomputed (simhash of event_text, in order) off the event loop.
+        """
+        now = now or time.time()
+        self._expire(now)
+        if signatures is None:
+            signatures = [simhash(event_text(event)) for event in events]
+        fresh, pending, merges = [], [], defaultdict(list)
+        for event, signature in zip(events, signatures):
+            partition = partition_key(event)
+            key = (event.get("source"), event.get("timestamp"))
+            match = self._find(partition, signature)
+            if match is None:
+                event["duplicate_count"] = event.get("duplicate_count") or 1
+                fresh.append(event)
+                pending.append(self._add(partition, signature, key, now, event))
+            elif match.key == key:
+                continue
+            elif match.event_id is None:
+                match.event["duplicate_count"] += 1
+            else:
+                merges[match.event_id].append(event)
+        return fresh, pending, merges
+
+    def bind(self, pending: List[_Entry], ids: Dict[Tuple, int]):
+        """Attaches inserted row ids to new entries; entries whose insert was skipped are dropped."""
+        for entry in pending:
+            entry.event_id = ids.get(entry.key)
+            entry.event = None
+            if entry.event_id is None:
+                self._forget(entry)
+
+    def forget(self, event_ids):
+        """Stops merging into rows that are no longer pending (claimed, summarised or trimmed)."""
+        event_ids = set(event_ids)
+        for entry in [e for e in self._entries if e.event_id in event_ids]:
+            self._forget(entry)
+
+    def _forget(self, entry: _Entry):
+        self._remove(entry)
+        try:
+            self._entries.remove(entry)
+        except ValueError:
+            pass
+
+near_duplicates = NearDuplicateIndex()
@@ -0,0 +1,112 @@
+import os
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from backend.utils.country_coords import COUNTRY_INDEX, normalise_country_name
+
+# offline GeoIP lookups need the optional geoip2 package (pip install geoip2) and a
+# MaxMind/DB-IP country or city .mmdb file at GEOIP_DB_PATH
+try:
+    import geoip2.database
+    import geoip2.errors
+    GEOIP_AVAILABLE = True
+except ImportError:
+    GEOIP_AVAILABLE = False
+
+GEOIP_DB_PATH = os.getenv("GEOIP_DB_PATH")
+
+# START OF GEOIP
+
+_reader = None
+
+def _get_reader():
+    global _reader
+    if _reader is None and GEOIP_AVAILABLE and GEOIP_DB_PATH and os.path.exists(GEOIP_DB_PATH):
+        _reader = geoip2.database.Reader(GEOIP_DB_PATH)
+        print(f"[INFO] GeoIP database loaded from {GEOIP_DB_PATH}")
+    return _reader
+
+@lru_cache(maxsize=65536)
+def country_for_ip(ip: Optional[str]) -> Optional[str]:
+    """Canonical country name for an IP from the local GeoIP database, or None."""
+    reader = _get_reader()
+    if reader is None or not ip:
+        return None
+    try:
+        # country() only works on Country databases; City databases answer city() too
+        lookup = reader.country if "Country" in reader.metadata().database_type else reader.city
+        iso_code = lookup(ip).country.iso_code
+    except (geoip2.errors.AddressNotFoundError, ValueError):
+        return None
+    return COUNTRY_INDEX.by_iso_code.get(iso_code) if iso_code else None
+
+# END OF GEOIP
+
+# START OF TEXT MENTIONS
+
+# longest n-grams are tried first at each word, so "South Korea" wins over "Korea"
+_MAX_NAME_WORDS = max(len(name.split()) for name in COUNTRY_INDEX.by_normalised_name)
+
+# only mentions with an explicit direction are trusted; bare lists of countries are ambiguous
+_ATTACKER_CUES = ("from", "originating in", "originating from", "based in", "operating from", "sponsored by")
+_ATTACKER_SUFFIXES = ("based", "linked", "nexus", "sponsored", "backed")
+_VICTIM_CUES = ("targeting", "targets", "targeted", "against", "victims in", "organizations in", "entities in")
+
+def country_mentions(text: str) -> List[Tuple[int, int, str]]:
+    """(start word, end word, canonical name) for every country named in the text."""
+    words = normalise_country_name(text).split()
+    found, i = [], 0
+    while i < len(words):
+        for size in range(min(_MAX_NAME_WORDS, len(words) - i), 0, -1):
+            name = COUNTRY_INDEX.by_normalised_name.get(" ".join(words[i:i + size]))
+            if name:
+                found.append((i, i + size, name))
+                i += size
+                break
+        else:
+            i += 1
+    return found
+
+def _preceded_by(words: List[str], start: int, cues) -> bool:
+    before = " " + " ".join(words[max(0, start - 3):start])
+    return any(before.endswith(" " + cue) for cue in cues)
+
+def countries_from_text(text: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Attacker and victim countries stated in free text, e.g. "China-nexus actor targeting Vietnam"."""
+    if not text:
+        return None, None
+    # "China-nexus" normalises to "china nexus", so a suffix is just the following word
+    words = normalise_country_name(text).split()
+    attacker = victim = None
+    for start, end, name in country_mentions(text):
+        follower = words[end] if end < len(words) else ""
+        if attacker is None and (_preceded_by(words, start, _ATTACKER_CUES) or follower in _ATTACKER_SUFFIXES):
+            attacker = name
+        elif victim is None and _preceded_by(words, start, _VICTIM_CUES):
+            victim = name
+    return attacker, victim
+
+# END OF TEXT MENTIONS
+
+def infer_countries(event) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Attacker and victim countries worked out locally, as canonical names (None when unknown).
+    Uses the feed's own country fields first, then GeoIP for the attacker IP,
+    then direction cues in the event text.
+    """
+    if not hasattr(event, "source"):
+        return None, None
+    attacker = COUNTRY_INDEX.resolve(event.attacker_country) or country_for_ip(event.attacker_ip)
+    victim = COUNTRY_INDEX.resolve(event.victim_country)
+    if attacker and victim:
+        return attacker, victim
+    text_attacker, text_victim = countries_from_text(" ".join(filter(None, (event.title, event.description))))
+    return attacker or text_attacker, victim or text_victim
+
+def inferred_countries(event) -> Tuple[Optional[str], Optional[str]]:
+    """infer_countries, remembered on the event for the rest of its trip through the summariser."""
+    pair = getattr(event, "inferred_country_pair", None)
+    if pair is None:
+        pair = infer_countries(event)
+        event.inferred_country_pair = pair
+    return pair
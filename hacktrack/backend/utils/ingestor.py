@@ -1,63 +1,126 @@
-import asyncio
+from sqlalchemy import case, update
 from backend.db.session import get_db
 from backend.db.models import Event
-from backend.ingest.otx import get_pulse_events
-from backend.ingest.abuseipdb import get_abuseipdb_events
-from sqlalchemy import select, delete, asc
+from backend.db.retention import trim_event_table
+from backend.utils.pipeline import notify_ingest
+from backend.utils.metrics import EVENTS_INGESTED, stage_timer
+from backend.utils.dedupe import DEDUPE_ENABLED, NearDuplicateIndex, event_text, near_duplicates, simhash
+from backend.utils.offload import offload_map
+from backend.utils.priority import assign_priorities
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+from backend.db.session import dialect_insert
 
 
-# helper function to delete old entries in database if it goes over limit
-MAX_EVENTS = 1000
+# START OF BULK INGESTION
 
-async def trim_event_table(db, max_events=MAX_EVENTS):
-    result = await db.execute(select(Event.id).order_by(asc(Event.timestamp)))
-    all_ids = [row[0] for row in result.fetchall()]
-    
-    if len(all_ids) > max_events:
-        ids_to_delete = all_ids[:len(all_ids) - max_events]
-        await db.execute(delete(Event).where(Event.id.in_(ids_to_delete)))
+# rows per INSERT statement; a dozen bound columns per row keeps us well under SQLite's variable limit
+INGEST_CHUNK_SIZE = 100
+
+# one statement for every batch: rows go in as executemany parameters, which SQLAlchemy
+# sends as multi-row VALUES while compiling the statement once (a .values(rows) insert
+# is a new statement, compiled on the event loop, for every chunk)
+_INSERT_EVENTS = (
+    dialect_insert(Event)
+    .on_conflict_do_nothing(index_elements=["source", "timestamp"])
+    .returning(Event.id, Event.source, Event.timestamp)
+)
+
+async def insert_events(db, events: List[Dict[str, Any]], chunk_size: int = INGEST_CHUNK_SIZE) -> Dict[Tuple, int]:
+    """
+    Writes events in multi-row INSERT ... ON CONFLICT DO NOTHING statements,
+    letting the _source_ts_uc constraint drop rows we already have.
+    Returns {(source, timestamp): id} for the rows actually inserted.
+    """
+    ids = {}
+    for i in range(0, len(events), chunk_size):
+        result = await db.execute(_INSERT_EVENTS, events[i:i + chunk_size])
+        for event_id, source, timestamp in result.all():
+            ids[(source, timestamp)] = event_id
+    return ids
+
+async def add_duplicates(db, counts: Dict[int, int]) -> set:
+    """Adds to duplicate_count of still-pending rows in one statement; returns the ids updated."""
+    result = await db.execute(
+        update(Event)
+        .where(Event.id.in_(counts), Event.status == "pending")
+        .values(duplicate_count=Event.duplicate_count + case(counts, value=Event.id, else_=0))
+        .returning(Event.id)
+    )
+    return set(result.scalars().all())
+
+async def ingest_events(db, events: List[Dict[str, Any]], chunk_size: int = INGEST_CHUNK_SIZE,
+                        index: NearDuplicateIndex = near_duplicates) -> Tuple[int, int, int]:
+    """
+    Collapses near-duplicates (within the batch and against recently ingested,
+    still-pending rows), then bulk-inserts the rest.
+    Returns (inserted, skipped, merged).
+    """
+    if not DEDUPE_ENABLED:
+        assign_priorities(events)
+        ids = await insert_events(db, events, chunk_size)
         await db.commit()
+        return len(ids), len(events) - len(ids), 0
+
+    # hashing is the CPU-heavy part of a batch; the index itself stays on the loop
+    signatures = await offload_map(simhash, [event_text(event) for event in events])
+    fresh, pending, merges = index.collapse(events, signatures=signatures)
+    merged = 0
+    while merges:
+        counts = {event_id: len(dupes) for event_id, dupes in merges.items()}
+        updated = await add_duplicates(db, counts)
+        merged += sum(counts[event_id] for event_id in updated)
+        stale = set(merges) - updated
+        if not stale:
+            break
+        # the target was claimed or deleted meanwhile; these events start a new row instead
+        index.forget(stale)
+        more_fresh, more_pending, merges = index.collapse([e for i in stale for e in merges[i]])
+        fresh += more_fresh
+        pending += more_pending
+
+    assign_priorities(fresh)
+    ids = await insert_events(db, fresh, chunk_size)
+    await db.commit()
+    index.bind(pending, ids)
+
+    merged += sum(event["duplicate_count"] - 1 for event in fresh if (event["source"], event["timestamp"]) in ids)
+    inserted = len(ids)
+    return inserted, len(events) - inserted - merged, merged
+
+async def run_ingest_cycle(name: str, fetch_batches: Callable[[Any], AsyncIterator[List[Dict[str, Any]]]]) -> Tuple[int, int, int]:
+    """
+    One fetch -> bulk insert -> trim pass for a feed.
+    fetch_batches(db) yields lists of events; each list is written as soon as it arrives.
+    Returns (fetched, inserted, skipped); near-duplicates merged into other rows count as neither.
+    """
+    print(f"[INFO] FETCHING {name} EVENTS")
+    fetched = inserted = skipped = merged = 0
+    async for db in get_db():
+        batches = fetch_batches(db).__aiter__()
+        while True:
+            # time spent waiting on the feed (network + transform), per batch
+            with stage_timer("fetch"):
+                try:
+                    batch = await batches.__anext__()
+                except StopAsyncIteration:
+                    break
+            with stage_timer("dedupe_insert"):
+                added, dropped, folded = await ingest_events(db, batch)
+            fetched += len(batch)
+            inserted += added
+            skipped += dropped
+            merged += folded
+        print(f"[INFO] {name} EVENTS COMMITTED: {fetched} fetched, {inserted} inserted, "
+              f"{merged} merged as near-duplicates, {skipped} skipped")
+        EVENTS_INGESTED.inc(inserted, source=name, result="inserted")
+        EVENTS_INGESTED.inc(skipped, source=name, result="skipped")
+        EVENTS_INGESTED.inc(merged, source=name, result="merged")
+        if inserted:
+            notify_ingest()
+        with stage_timer("trim"):
+            trimmed = await trim_event_table(db)
+        if trimmed:
+            print(f"[INFO] retention trimmed {trimmed} events")
+    return fetched, inserted, skipped
 
-# START OF FUNCTIONS TO CONTINUOUSLY FETCH FROM OTX AND ABUSEIPDB
-
-async def fetch_otx_loop():
-    while True:
-        print("[INFO] FETCHING OTX EVENTS")
-        otx_events = await get_pulse_events()
-        print("[INFO] FETCHED OTX EVENTS")
-        async for db in get_db():
-            for e in otx_events:
-                exists = await db.execute(
-                    select(Event).where(
-                        Event.source == e["source"],
-                        Event.timestamp == e["timestamp"]
-                    )
-                )
-                if not exists.scalar():
-                    db.add(Event(**e))
-            await db.commit()
-            print("[INFO] OTX EVENTS COMMITTED")
-            await trim_event_table(db)
-        await asyncio.sleep(1800)  # 30 mins = 1800 seconds (may make this more frequent)
-
-async def fetch_abuseipdb_loop():
-    while True:
-        print("[INFO] FETCHING AbuseIPDB EVENTS")
-        abuse_events = await get_abuseipdb_events()
-        print("[INFO] FETCHED AbuseIPDB EVENTS")
-        async for db in get_db():
-            for e in abuse_events:
-                exists = await db.execute(
-                    select(Event).where(
-                        Event.source == e["source"],
-                        Event.timestamp == e["timestamp"]
-                    )
-                )
-                if not exists.scalar():
-                    db.add(Event(**e))
-            await db.commit()
-            print("[INFO] AbuseIPDB EVENTS COMMITTED")
-            await trim_event_table(db)
-        await asyncio.sleep(21600)  # 6 hours = 21600 seconds (can only call 5 times a day due to free tier)
-
-# END OF CONTINUOUS FUNCTIONS
\ No newline at end of file
+# END OF BULK INGESTION
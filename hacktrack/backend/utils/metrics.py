@@ -0,0 +1,215 @@
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# START OF METRIC TYPES
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in self.values.items()]
+
+class Gauge(_Metric):
+    """A settable value, or one read from `callback` at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, *args, callback: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[LabelValues, float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels):
+        self.values[self._key(labels)] = value
+
+    def _samples(self):
+        if self.callback is not None:
+            return [f"{self.name} {self.callback()}"]
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in self.values.items()]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self.values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        counts, total = self.values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        lines = []
+        for key, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total[0]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# END OF METRIC TYPES
+
+REGISTRY = Registry()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+TOKEN_BUCKETS = (50, 100, 200, 400, 800, 1600, 3200, 6400)
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "hacktrack_stage_seconds", "Time spent per pipeline stage",
+    ["stage"], buckets=LATENCY_BUCKETS,
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "hacktrack_http_request_seconds", "Upstream feed request latency",
+    ["provider", "status"], buckets=LATENCY_BUCKETS,
+))
+LLM_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "hacktrack_llm_request_seconds", "Mistral agent call latency",
+    ["mode", "outcome"], buckets=LATENCY_BUCKETS,
+))
+LLM_TOKENS = REGISTRY.register(Histogram(
+    "hacktrack_llm_tokens", "Tokens per Mistral agent call",
+    ["kind"], buckets=TOKEN_BUCKETS,
+))
+LLM_TOKENS_TOTAL = REGISTRY.register(Counter(
+    "hacktrack_llm_tokens_total", "Tokens used by Mistral agent calls", ["kind"],
+))
+PROMPT_TOKENS_SAVED = REGISTRY.register(Counter(
+    "hacktrack_prompt_tokens_saved_total", "Estimated prompt tokens removed before calling the agent", ["stage"],
+))
+LLM_CALLS_SKIPPED = REGISTRY.register(Counter(
+    "hacktrack_llm_calls_skipped_total", "Events summarised without an agent call", ["reason"],
+))
+SUMMARY_CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "hacktrack_summary_cache_lookups_total", "Summary cache lookups", ["result"],
+))
+EVENTS_INGESTED = REGISTRY.register(Counter(
+    "hacktrack_events_ingested_total", "Events written or skipped by ingestion", ["source", "result"],
+))
+COLLECTOR_RUNS = REGISTRY.register(Counter(
+    "hacktrack_collector_runs_total", "Scheduled collector runs", ["collector", "outcome"],
+))
+COLLECTOR_RUN_SECONDS = REGISTRY.register(Histogram(
+    "hacktrack_collector_run_seconds", "Duration of collector runs, fetch to commit",
+    ["collector"], buckets=LATENCY_BUCKETS,
+))
+COLLECTOR_LAG = REGISTRY.register(Gauge(
+    "hacktrack_collector_lag_seconds", "Seconds since each collector last succeeded", ["collector"],
+))
+EVENTS_CLAIMED = REGISTRY.register(Counter(
+    "hacktrack_events_claimed_total", "Events leased to summariser workers", ["source"],
+))
+EVENTS_SUMMARISED = REGISTRY.register(Counter(
+    "hacktrack_events_summarised_total", "Events taken through summarisation", ["outcome"],
+))
+LOG_ENTRIES_DROPPED = REGISTRY.register(Counter(
+    "hacktrack_log_entries_dropped_total", "Undelivered log entries trimmed from the full output store",
+))
+DB_STATEMENTS = REGISTRY.register(Counter(
+    "hacktrack_db_statements_total", "SQL statements executed", ["operation"],
+))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "hacktrack_queue_depth", "Items waiting in each queue", ["queue"],
+))
+
+EVENT_LOOP_LAG = REGISTRY.register(Histogram(
+    "hacktrack_event_loop_lag_seconds", "How late the event loop woke a sleeping task", buckets=LOOP_LAG_BUCKETS,
+))
+EVENT_LOOP_LAG_MAX = REGISTRY.register(Gauge(
+    "hacktrack_event_loop_lag_max_seconds", "Worst event loop lag since the previous scrape",
+))
+OFFLOAD_SECONDS = REGISTRY.register(Histogram(
+    "hacktrack_offload_seconds", "Wall time of work handed to the offload executor, queueing included",
+    ["executor"], buckets=LATENCY_BUCKETS,
+))
+
+def stage_timer(stage: str):
+    """`with stage_timer("trim"): ...` records the block's duration under hacktrack_stage_seconds."""
+    return STAGE_SECONDS.time(stage=stage)
+
+def record_llm_usage(response):
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        tokens = getattr(usage, kind, None)
+        if tokens:
+            LLM_TOKENS.observe(tokens, kind=kind)
+            LLM_TOKENS_TOTAL.inc(tokens, kind=kind)
+
+def instrument_engine(engine):
+    """Counts every statement the engine sends, by leading SQL keyword."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        DB_STATEMENTS.inc(operation=statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER")
@@ -0,0 +1,113 @@
+import os
+import asyncio
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence
+
+from backend.utils.metrics import EVENT_LOOP_LAG, EVENT_LOOP_LAG_MAX, OFFLOAD_SECONDS
+
+# where bulk parse/transform work runs: "thread", "process", or "inline" (on the event loop)
+OFFLOAD_EXECUTOR = os.getenv("OFFLOAD_EXECUTOR", "thread").lower()
+OFFLOAD_WORKERS = int(os.getenv("OFFLOAD_WORKERS", min(4, os.cpu_count() or 1)))
+# payloads smaller than this are parsed inline; handing them off would cost more than it saves
+OFFLOAD_MIN_BYTES = int(os.getenv("OFFLOAD_MIN_BYTES", 32 * 1024))
+# items per executor hand-off in offload_map
+OFFLOAD_BATCH_SIZE = int(os.getenv("OFFLOAD_BATCH_SIZE", 250))
+
+# how often the loop-lag monitor wakes, and the stall worth a log line
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", 0.1))
+LOOP_LAG_WARN_SECONDS = float(os.getenv("LOOP_LAG_WARN_SECONDS", 0.25))
+
+# START OF EXECUTOR
+
+_executor: Optional[Executor] = None
+
+def get_executor() -> Optional[Executor]:
+    """The shared executor, created on first use; None when OFFLOAD_EXECUTOR is "inline"."""
+    global _executor
+    if _executor is None and OFFLOAD_EXECUTOR != "inline":
+        if OFFLOAD_EXECUTOR == "process":
+            # spawn, not fork: forking a process that runs an event loop and DB connections is unsafe.
+            # functions sent to it must be importable module-level functions
+            _executor = ProcessPoolExecutor(OFFLOAD_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        elif OFFLOAD_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(OFFLOAD_WORKERS, thread_name_prefix="offload")
+        else:
+            raise ValueError(f"OFFLOAD_EXECUTOR must be thread, process or inline, not {OFFLOAD_EXECUTOR!r}")
+        print(f"[INFO] offloading parse work to a {OFFLOAD_EXECUTOR} pool of {OFFLOAD_WORKERS}")
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def offload(fn: Callable, *args) -> Any:
+    """Runs fn(*args) in the executor (or inline when offloading is off) and returns its result."""
+    executor = get_executor()
+    if executor is None:
+        return fn(*args)
+    with OFFLOAD_SECONDS.time(executor=OFFLOAD_EXECUTOR):
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+async def offload_parse(fn: Callable[[bytes], Any], content: bytes) -> Any:
+    """fn(content) for a raw response body: inline when small, in the executor when large."""
+    if len(content) < OFFLOAD_MIN_BYTES:
+        return fn(content)
+    return await offload(fn, content)
+
+def _apply(fn: Callable, items: Sequence) -> list:
+    return [fn(item) for item in items]
+
+async def offload_map(fn: Callable, items: Sequence, batch_size: int = OFFLOAD_BATCH_SIZE) -> List[Any]:
+    """[fn(item) for item in items], handed to the executor in batches of `batch_size`."""
+    if not items:
+        return []
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    results = await asyncio.gather(*(offload(_apply, fn, batch) for batch in batches))
+    return [result for batch in results for result in batch]
+
+# END OF EXECUTOR
+
+# START OF LOOP LAG MONITOR
+
+class LoopLagMonitor:
+    """
+    Sleeps for a fixed interval and measures how late it wakes up. Anything that
+    holds the event loop (parsing, hashing, a sync call) delays every request by
+    that much, so the overshoot is the loop's responsiveness.
+    """
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, warn_after: float = LOOP_LAG_WARN_SECONDS,
+                 keep: int = 1000):
+        self.interval = interval
+        self.warn_after = warn_after
+        # recent samples, oldest first
+        self.samples: deque = deque(maxlen=keep)
+        self._worst = 0.0
+
+    def take_worst(self) -> float:
+        """Largest lag since the last call (reported as a gauge at scrape time)."""
+        worst, self._worst = self._worst, 0.0
+        return worst
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - started - self.interval, 0.0)
+            self.samples.append(lag)
+            self._worst = max(self._worst, lag)
+            EVENT_LOOP_LAG.observe(lag)
+            if lag >= self.warn_after:
+                print(f"[INFO] event loop was blocked for {lag * 1000:.0f} ms")
+
+    def report(self):
+        """Sets the max-lag gauge; called from /metrics."""
+        EVENT_LOOP_LAG_MAX.set(self.take_worst())
+
+loop_lag_monitor = LoopLagMonitor()
+
+# END OF LOOP LAG MONITOR
@@ -0,0 +1,272 @@
+import os
+import time
+import asyncio
+import traceback
+from typing import Dict
+
+from backend.db.session import AsyncSessionLocal
+from backend.db.models import EVENT_PUBLIC_COLUMNS
+from backend.db.work_queue import claim_events, complete_events, release_events
+from backend.ai.summarizer import summarize_event, summarize_events_batch, batch_sizer, create_arc_json
+from backend.utils.broadcast import log_broadcaster, log_entries_written
+from backend.utils.geo import inferred_countries
+from backend.utils.metrics import EVENTS_SUMMARISED, stage_timer
+
+# pack several events into one agent call instead of one call per event
+SUMMARY_BATCH_MODE = os.getenv("SUMMARY_BATCH_MODE", "false").lower() in ("1", "true", "yes")
+
+# pause before restarting a pipeline stage that raised, so a persistent fault doesn't spin
+STAGE_RESTART_DELAY = float(os.getenv("SUMMARY_STAGE_RESTART_DELAY", 1.0))
+
+# set by the ingestor whenever new rows land, so the pipeline wakes without waiting for a poll
+ingest_notifier = asyncio.Event()
+
+def notify_ingest():
+    ingest_notifier.set()
+
+# START OF LOG ENTRY HELPERS
+
+def serialise_log_entry(event, arc, summary):
+    event_dict = {column.key: getattr(event, column.key) for column in EVENT_PUBLIC_COLUMNS}
+    event_dict['resolved_attacker_country'] = getattr(event, 'resolved_attacker_country', None)
+    event_dict['resolved_victim_country'] = getattr(event, 'resolved_victim_country', None)
+    return [event_dict, arc, summary]
+
+def publish_arc_preview(event) -> bool:
+    """
+    Streams the arc for an event whose countries are known locally, before it is summarised.
+    Viewers draw it straight away; the log entry that follows carries the same arc.
+    """
+    attacker, victim = inferred_countries(event)
+    if not attacker or not victim:
+        return False
+    arc_data = create_arc_json(attacker, victim)
+    if arc_data is None:
+        return False
+    log_broadcaster.publish_transient("arc", {"id": event.id, "arc": arc_data['arc']})
+    return True
+
+def build_log_entry(event, summary):
+    """Resolves the arc for a summarised event and returns the serialised log entry."""
+    # countries known locally (feed fields, GeoIP, text cues) win over the agent's guess
+    attacker, victim = inferred_countries(event)
+    try:
+        # dict like {"arc": {...}, "resolved_names": {...}} or None
+        resolved_arc_data = create_arc_json(attacker or summary['attacker_country'], victim or summary['victim_country'])
+    except Exception as arc_exc:
+        print(f"[ERROR] creating arc for event {event.id}:\n{''.join(traceback.format_exception(arc_exc))}")
+        resolved_arc_data = None
+
+    if resolved_arc_data is None:
+        arc = None
+        # If the arc logic failed, we fall back to the original AI summary for logging
+        event.resolved_attacker_country = summary.get('attacker_country')
+        event.resolved_victim_country = summary.get('victim_country')
+    else:
+        arc = resolved_arc_data['arc']
+        resolved_names = resolved_arc_data['resolved_names']
+        # Use the RESOLVED country names (original or random fallback) for the log
+        event.resolved_attacker_country = resolved_names['attacker_country']
+        event.resolved_victim_country = resolved_names['victim_country']
+
+    return serialise_log_entry(event, arc, summary)
+
+# END OF LOG ENTRY HELPERS
+
+class SummaryPipeline:
+    """
+    Continuous summariser: claim -> summarise -> resolve arc -> publish.
+    Stages are connected by bounded queues, so a slow LLM backs up into fewer
+    claims rather than unbounded memory, and each stage has its own concurrency.
+    The claimer only leases what the summarise workers are about to start on (see
+    capacity), so nothing waits in a queue until its lease runs out and another
+    worker takes it over. It keeps going while there is backlog and sleeps on ingest notifications
+    (or a short poll, for rows written by other processes) when idle.
+    """
+    def __init__(self, claim_size: int = 20, summarise_workers: int = 10, queue_size: int = 100,
+                 publish_batch: int = 50, publish_linger: float = 0.5, idle_poll: float = 5.0):
+        self.claim_size = claim_size
+        self.summarise_workers = summarise_workers
+        self.publish_batch = publish_batch
+        self.publish_linger = publish_linger
+        self.idle_poll = idle_poll
+        self.summarise_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.resolve_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.publish_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # claimed, not yet summarised: event id -> lease expiry
+        self.in_flight: Dict[int, float] = {}
+        self._slot_freed = asyncio.Event()
+
+    def capacity(self) -> int:
+        """
+        Events claimed ahead of the summarise workers: what they can take on at once
+        (a batch each in batch mode), twice over so the next claim is waiting when they finish.
+        """
+        return 2 * self.summarise_workers * (batch_sizer.size if SUMMARY_BATCH_MODE else 1)
+
+    def free_slots(self) -> int:
+        # an event lost to a crashed stage is re-claimable once its lease runs out, so it stops counting then
+        now = time.time()
+        for event_id in [i for i, expires in self.in_flight.items() if expires < now]:
+            del self.in_flight[event_id]
+        return self.capacity() - len(self.in_flight)
+
+    def _done(self, event_ids):
+        for event_id in event_ids:
+            self.in_flight.pop(event_id, None)
+        self._slot_freed.set()
+
+    def queue_depths(self):
+        return {
+            "pipeline_summarise": self.summarise_queue.qsize(),
+            "pipeline_resolve": self.resolve_queue.qsize(),
+            "pipeline_publish": self.publish_queue.qsize(),
+        }
+
+    async def run(self):
+        stages = [("claim", self._claim)]
+        stages += [("summarise", self._summarise)] * self.summarise_workers
+        stages += [("resolve", self._resolve), ("publish", self._publish)]
+        await asyncio.gather(*(self._supervise(name, stage) for name, stage in stages))
+
+    async def _supervise(self, name: str, stage):
+        """Runs one stage forever, restarting it after a crash so the pipeline never silently stalls."""
+        while True:
+            try:
+                await stage()
+            except Exception as exc:
+                # whatever the stage held is re-claimable once its lease runs out
+                print(f"[ERROR] summariser {name} stage crashed; restarting in {STAGE_RESTART_DELAY}s:\n"
+                      f"{''.join(traceback.format_exception(exc))}")
+                await asyncio.sleep(STAGE_RESTART_DELAY)
+
+    async def _claim(self):
+        while True:
+            free = self.free_slots()
+            if free <= 0:
+                self._slot_freed.clear()
+                try:
+                    await asyncio.wait_for(self._slot_freed.wait(), timeout=self.idle_poll)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            events = []
+            try:
+                async with AsyncSessionLocal() as db:
+                    events = await claim_events(db, limit=min(self.claim_size, free))
+            except Exception as exc:
+                print(f"[ERROR] summariser claim: {exc}")
+            for event in events:
+                self.in_flight[event.id] = event.lease_expires_at
+
+            if not events:
+                ingest_notifier.clear()
+                try:
+                    await asyncio.wait_for(ingest_notifier.wait(), timeout=self.idle_poll)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            queued = 0
+            try:
+                for event in events:
+                    try:
+                        publish_arc_preview(event)
+                    except Exception as exc:
+                        # the preview is only a head start; the log entry still carries the arc
+                        print(f"[ERROR] arc preview for event {event.id}: {exc}")
+                    # blocks while downstream is saturated
+                    await self.summarise_queue.put(event)
+                    queued += 1
+            finally:
+                # on a crash or shutdown part way, the rest go back now rather than when their lease runs out
+                if queued < len(events):
+                    await self._release_unqueued(events[queued:])
+
+    async def _release_unqueued(self, events):
+        """Hands claimed events that never reached a summarise worker straight back to the queue."""
+        ids = [event.id for event in events]
+        self._done(ids)
+        try:
+            async with AsyncSessionLocal() as db:
+                await release_events(db, ids, retry_delay=0)
+        except Exception as exc:
+            # their leases still run out, so they are picked up again later either way
+            print(f"[ERROR] summariser release: {exc}")
+
+    async def _summarise(self):
+        while True:
+            event = await self.summarise_queue.get()
+            if not SUMMARY_BATCH_MODE:
+                try:
+                    with stage_timer("llm_call"):
+                        summary = await summarize_event(event)
+                except Exception as exc:
+                    summary = exc
+                await self._forward_summary(event, summary)
+                continue
+
+            # take whatever else is already waiting, up to the adaptive batch size
+            batch = [event]
+            while len(batch) < batch_sizer.size and not self.summarise_queue.empty():
+                batch.append(self.summarise_queue.get_nowait())
+            try:
+                with stage_timer("llm_call"):
+                    summaries = await summarize_events_batch(batch)
+            except Exception as exc:
+                summaries = [exc] * len(batch)
+            for item, summary in zip(batch, summaries):
+                await self._forward_summary(item, summary)
+
+    async def _forward_summary(self, event, summary):
+        self._done([event.id])
+        if isinstance(summary, Exception):
+            print(f"[ERROR] summarising event {event.id}:\n{''.join(traceback.format_exception(summary))}")
+            EVENTS_SUMMARISED.inc(outcome="failed")
+            await self.publish_queue.put((event.id, None))
+        else:
+            EVENTS_SUMMARISED.inc(outcome="ok")
+            await self.resolve_queue.put((event, summary))
+
+    async def _resolve(self):
+        while True:
+            event, summary = await self.resolve_queue.get()
+            with stage_timer("arc_resolve"):
+                entry = build_log_entry(event, summary)
+            await self.publish_queue.put((event.id, entry))
+
+    async def _publish(self):
+        while True:
+            batch = [await self.publish_queue.get()]
+            # linger briefly so one transaction covers several results
+            deadline = asyncio.get_running_loop().time() + self.publish_linger
+            while len(batch) < self.publish_batch:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.publish_queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            done_ids = [event_id for event_id, payload in batch if payload is not None]
+            payloads = [payload for _, payload in batch if payload is not None]
+            failed_ids = [event_id for event_id, payload in batch if payload is None]
+            try:
+                async with AsyncSessionLocal() as db:
+                    if done_ids:
+                        with stage_timer("publish"):
+                            await complete_events(db, done_ids, payloads)
+                        log_entries_written.set()
+                    # hand failures back to the queue for a later pass
+                    await release_events(db, failed_ids)
+            except Exception as exc:
+                # leases expire, so unpublished events are picked up again later
+                print(f"[ERROR] summariser publish: {exc}")
+
+summary_pipeline = SummaryPipeline(
+    claim_size=int(os.getenv("SUMMARY_CLAIM_SIZE", 20)),
+    summarise_workers=int(os.getenv("SUMMARY_WORKERS", 10)),
+    idle_poll=float(os.getenv("SUMMARY_IDLE_POLL", 5.0)),
+)
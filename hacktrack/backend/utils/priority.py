@@ -0,0 +1,154 @@
+import os
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from backend.db.history import top_pairs
+from backend.utils.country_coords import COUNTRY_INDEX
+from backend.utils.geo import infer_countries
+from backend.utils.timestamps import epoch_seconds
+
+def _parse_weights(spec: str) -> Dict[str, float]:
+    # "AbuseIPDB:0.6,OTX:0.4"
+    weights = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, value = part.partition(":")
+        weights[name.strip()] = float(value)
+    return weights
+
+# how far ahead of its arrival a top-scoring event may jump; a low-scoring event
+# is never overtaken by work that arrived more than this many seconds after it
+PRIORITY_HORIZON_SECONDS = float(os.getenv("PRIORITY_HORIZON_SECONDS", 3600))
+# events lose half of their recency score every RECENCY_HALF_LIFE_SECONDS after their feed timestamp
+RECENCY_HALF_LIFE_SECONDS = float(os.getenv("RECENCY_HALF_LIFE_SECONDS", 6 * 3600))
+# a country pair's ingest count halves every NOVELTY_HALF_LIFE_SECONDS
+NOVELTY_HALF_LIFE_SECONDS = float(os.getenv("NOVELTY_HALF_LIFE_SECONDS", 24 * 3600))
+# how much each source is worth on the map, 0..1; unknown sources get DEFAULT_SOURCE_WEIGHT
+SOURCE_WEIGHTS = _parse_weights(os.getenv("PRIORITY_SOURCE_WEIGHTS", "AbuseIPDB:1.0,OTX:0.6"))
+DEFAULT_SOURCE_WEIGHT = 0.5
+# share of every claimed batch reserved for each source; whatever a source leaves unused
+# goes to the most urgent remaining events of any source
+SOURCE_SHARES = _parse_weights(os.getenv("SCHEDULER_SOURCE_SHARES", "AbuseIPDB:0.5,OTX:0.5"))
+
+# weights of the score components, summing to 1
+_WEIGHTS = {"source": 0.3, "confidence": 0.3, "recency": 0.2, "novelty": 0.2}
+# feeds without a confidence score (e.g. OTX) sit in the middle
+_NEUTRAL_CONFIDENCE = 0.5
+
+# START OF PAIR NOVELTY
+
+# what infer_countries reads from an event
+_PAIR_FIELDS = ("source", "attacker_country", "victim_country", "attacker_ip", "title", "description")
+
+def pair_key(event: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    (attacker, victim) ISO alpha-2 codes for an event dict, inferred locally like the
+    published arc's countries, so ingest counts line up with the history codes.
+    """
+    attacker, victim = infer_countries(SimpleNamespace(**{field: event.get(field) for field in _PAIR_FIELDS}))
+    return COUNTRY_INDEX.iso_code(attacker), COUNTRY_INDEX.iso_code(victim)
+
+class PairNovelty:
+    """
+    Exponentially decaying count of recently ingested events per country pair.
+    Pairs rarely seen lately score close to 1, the usual suspects close to 0.
+    """
+    def __init__(self, half_life: float = NOVELTY_HALF_LIFE_SECONDS, max_pairs: int = 20000):
+        self.half_life = half_life
+        self.max_pairs = max_pairs
+        self._counts: Dict[Tuple, Tuple[float, float]] = {}
+
+    def __len__(self):
+        return len(self._counts)
+
+    def _decayed(self, pair, now: float) -> float:
+        count, updated = self._counts.get(pair, (0.0, now))
+        return count * 0.5 ** (max(now - updated, 0.0) / self.half_life)
+
+    def novelty(self, pair, now: Optional[float] = None) -> float:
+        return 1.0 / (1.0 + self._decayed(pair, now or time.time()))
+
+    def observe(self, pair, weight: float = 1, now: Optional[float] = None) -> float:
+        """Records `weight` events for the pair and returns its novelty from before they were seen."""
+        now = now or time.time()
+        count = self._decayed(pair, now)
+        if pair not in self._counts and len(self._counts) >= self.max_pairs:
+            self._prune(now)
+        self._counts[pair] = (count + weight, now)
+        return 1.0 / (1.0 + count)
+
+    def _prune(self, now: float):
+        # forget pairs that have faded to almost nothing; if none have, start over
+        self._counts = {p: v for p, v in self._counts.items() if self._decayed(p, now) >= 0.5}
+        if len(self._counts) >= self.max_pairs:
+            self._counts.clear()
+
+pair_novelty = PairNovelty()
+
+async def seed_pair_novelty(db, tracker: PairNovelty = pair_novelty, limit: int = 1000) -> int:
+    """Primes the tracker with the last half-life of summarised history, so a restart doesn't make every pair look new."""
+    now = time.time()
+    rows = await top_pairs(db, since=int(now - tracker.half_life), limit=limit)
+    for row in rows:
+        # history stores the same ISO codes pair_key gives
+        tracker.observe((row["attacker"], row["victim"]), weight=row["count"] / 2, now=now)
+    return len(rows)
+
+# END OF PAIR NOVELTY
+
+# START OF SCORING
+
+def priority_score(event: Dict[str, Any], novelty: float, now: Optional[float] = None) -> float:
+    """Urgency in 0..1 from the event's source, confidence, age and pair novelty."""
+    now = now or time.time()
+    source = SOURCE_WEIGHTS.get(event.get("source"), DEFAULT_SOURCE_WEIGHT)
+    confidence = event.get("confidence")
+    confidence = _NEUTRAL_CONFIDENCE if confidence is None else min(max(confidence / 100, 0.0), 1.0)
+    age = max(now - epoch_seconds(event.get("timestamp")), 0.0)
+    recency = 0.5 ** (age / RECENCY_HALF_LIFE_SECONDS)
+    return (_WEIGHTS["source"] * source + _WEIGHTS["confidence"] * confidence
+            + _WEIGHTS["recency"] * recency + _WEIGHTS["novelty"] * novelty)
+
+def schedule_key(score: float, enqueued_at: float, horizon: float = PRIORITY_HORIZON_SECONDS) -> float:
+    """
+    Claim order for the work queue, lowest first: the enqueue time pulled forward by
+    up to `horizon` seconds for urgent events. Because the key never changes, every
+    waiting event eventually sorts ahead of anything new (aging), and picking the
+    next batch is an ordered index scan.
+    """
+    return enqueued_at - score * horizon
+
+def assign_priorities(events: Iterable[Dict[str, Any]], now: Optional[float] = None,
+                      tracker: PairNovelty = pair_novelty):
+    """Sets sched_key on event dicts about to be inserted; near-duplicates folded in count towards the pair."""
+    now = now or time.time()
+    for event in events:
+        novelty = tracker.observe(pair_key(event), weight=event.get("duplicate_count") or 1, now=now)
+        event["sched_key"] = schedule_key(priority_score(event, novelty, now), now)
+
+class QuotaRotation:
+    """
+    Splits claimed batches between sources by their shares (smooth weighted round-robin).
+    Each row of a batch adds every source's share to its credit and goes to the source
+    with the most, which pays one row back. Credit carries over between batches, so
+    small claims, down to a single free slot, still rotate through every source.
+    """
+    def __init__(self, shares: Dict[str, float] = SOURCE_SHARES):
+        total = sum(share for share in shares.values() if share > 0)
+        self.shares = {source: share / total for source, share in shares.items() if share > 0}
+        self._credit = dict.fromkeys(self.shares, 0.0)
+
+    def quotas(self, limit: int) -> Dict[str, int]:
+        """Rows of a `limit`-sized batch reserved per source, summing to `limit`."""
+        quotas: Dict[str, int] = {}
+        for _ in range(limit if self.shares else 0):
+            for source, share in self.shares.items():
+                self._credit[source] += share
+            source = max(self._credit, key=self._credit.get)
+            self._credit[source] -= 1
+            quotas[source] = quotas.get(source, 0) + 1
+        return quotas
+
+source_rotation = QuotaRotation()
+
+# END OF SCORING
@@ -0,0 +1,68 @@
+import json
+from typing import Any, AsyncIterator, Callable, List, Union
+
+from fastapi.responses import Response, StreamingResponse
+
+# orjson is optional; without it responses fall back to the stdlib encoder
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# pages larger than this are streamed in chunks instead of built in memory
+STREAM_PAGE_THRESHOLD = 200
+
+def dumps(obj: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), default=str).encode("utf-8")
+
+def loads(data: bytes) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def encode_log_payload(payload: Any) -> bytes:
+    """Compact bytes for a stored [event, arc, summary] entry; empty event fields are left out."""
+    event, arc, summary = payload
+    if isinstance(event, dict):
+        event = {key: value for key, value in event.items() if value is not None}
+    return dumps([event, arc, summary])
+
+def json_array(encoded: List[bytes]) -> bytes:
+    """Joins already-encoded JSON values into an array without decoding them."""
+    return b"[" + b",".join(encoded) + b"]"
+
+class FastJSONResponse(Response):
+    """JSON response that skips FastAPI's jsonable_encoder; content must already be plain data."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def stream_json_array(items: AsyncIterator[Any], prefix: bytes = b"[",
+                      suffix: Union[bytes, Callable[[], bytes]] = b"]",
+                      chunk_size: int = 100) -> StreamingResponse:
+    """
+    Streams `prefix` + a JSON array of `items` + `suffix`, encoding `chunk_size`
+    items per write so memory stays flat however many rows the page has.
+    Items that are bytes are taken as already-encoded JSON.
+    `suffix` may be a callable, evaluated once the items are exhausted (e.g. for a cursor).
+    """
+    async def body():
+        yield prefix
+        first = True
+        buffer = []
+        async for item in items:
+            buffer.append(item if isinstance(item, bytes) else dumps(item))
+            if len(buffer) >= chunk_size:
+                yield (b"" if first else b",") + b",".join(buffer)
+                first = False
+                buffer = []
+        if buffer:
+            yield (b"" if first else b",") + b",".join(buffer)
+        yield suffix() if callable(suffix) else suffix
+
+    return StreamingResponse(body(), media_type="application/json")
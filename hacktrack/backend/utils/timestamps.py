@@ -0,0 +1,13 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+def epoch_seconds(timestamp: Optional[str]) -> int:
+    """Integer epoch seconds for a feed timestamp; unparsable ones count as now."""
+    # feed timestamps are ISO strings, with or without an offset; naive ones are UTC
+    try:
+        parsed = datetime.fromisoformat(str(timestamp).replace("Z", "+00:00"))
+    except ValueError:
+        return int(datetime.now(timezone.utc).timestamp())
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
@@ -0,0 +1,139 @@
+"""
+Local stand-ins for the services the backend talks to.
+
+FakeFeeds is an httpx transport that answers the OTX /search/pulses and
+AbuseIPDB /blacklist and /check endpoints with the same JSON shapes as the real
+APIs. FakeMistral mimics `client.agents.complete_async`, including packed batch
+requests. Both take a per-request latency and an error rate so scenarios can
+inject slow or failing upstreams.
+"""
+import json
+import random
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+import httpx
+
+COUNTRIES = [
+    "United States of America", "China", "Russia", "Germany", "Brazil", "India",
+    "United Kingdom", "France", "Netherlands", "Vietnam", "Iran", "South Korea",
+]
+ATTACKS = ["SSH brute force", "port scan", "web app exploit attempt", "SMTP spam relay", "DDoS probe"]
+
+class FakeFeeds:
+    def __init__(self, pulses: int = 150, blacklist: int = 100, reports_per_ip: int = 5,
+                 latency: float = 0.05, error_rate: float = 0.0, seed: int = 1):
+        self.rng = random.Random(seed)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+        # newest first, like sort=-modified
+        self.pulses = [
+            {
+                "id": f"pulse-{i}",
+                "name": f"Campaign {i}: {self.rng.choice(ATTACKS)}",
+                "description": f"Activity cluster {i} targeting {self.rng.choice(COUNTRIES)} infrastructure. " * 5,
+                "modified": (now - timedelta(minutes=i)).isoformat(),
+                "targeted_countries": [self.rng.choice(COUNTRIES)],
+            }
+            for i in range(pulses)
+        ]
+        self.ips = [f"203.0.{i // 256}.{i % 256}" for i in range(blacklist)]
+        self.reports_per_ip = reports_per_ip
+        self._now = now
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.rng.random() < self.error_rate:
+            return httpx.Response(503, json={"error": "injected failure"})
+
+        path = urlparse(str(request.url)).path
+        params = request.url.params
+        if path.endswith("/search/pulses"):
+            return self._pulses(int(params.get("page", 1)), int(params.get("limit", 50)),
+                                params.get("sort", "-modified"), params.get("modified_since"))
+        if path.endswith("/blacklist"):
+            return httpx.Response(200, json={"data": [{"ipAddress": ip, "abuseConfidenceScore": 100} for ip in self.ips]})
+        if path.endswith("/check"):
+            return self._check(params["ipAddress"])
+        return httpx.Response(404, json={"error": f"no fake for {path}"})
+
+    def _pulses(self, page: int, limit: int, sort: str, modified_since) -> httpx.Response:
+        pulses = [p for p in self.pulses if not modified_since or p["modified"] > modified_since]
+        if sort == "modified":
+            pulses.reverse()
+        start = (page - 1) * limit
+        return httpx.Response(200, json={"results": pulses[start:start + limit], "count": len(pulses)})
+
+    def _check(self, ip: str) -> httpx.Response:
+        index = self.ips.index(ip) if ip in self.ips else 0
+        data = {
+            "ipAddress": ip,
+            "abuseConfidenceScore": self.rng.randint(75, 100),
+            "countryCode": "XX",
+            "countryName": self.rng.choice(COUNTRIES),
+            "lastReportedAt": (self._now - timedelta(seconds=index)).isoformat() + "+00:00",
+            "reports": [
+                {
+                    "reporterCountryName": self.rng.choice(COUNTRIES),
+                    "comment": f"{self.rng.choice(ATTACKS)} from {ip} port {self.rng.randint(1, 65535)}",
+                }
+                for _ in range(self.reports_per_ip)
+            ],
+        }
+        return httpx.Response(200, json={"data": data}, headers={"X-RateLimit-Remaining": "100000"})
+
+class FakeMistral:
+    """Answers like the summary agent: one JSON object per event, or a JSON array for packed batches."""
+    def __init__(self, latency: float = 0.5, error_rate: float = 0.0, malformed_rate: float = 0.0, seed: int = 2):
+        self.rng = random.Random(seed)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.calls = 0
+        self.prompt_chars = 0
+        self.agents = SimpleNamespace(complete_async=self.complete_async)
+
+    async def complete_async(self, agent_id, messages):
+        self.calls += 1
+        content = messages[-1]["content"]
+        self.prompt_chars += len(content)
+        if self.latency:
+            await asyncio.sleep(self.latency * self.rng.uniform(0.5, 1.5))
+        if self.rng.random() < self.error_rate:
+            raise RuntimeError("injected Mistral failure")
+
+        head, sep, payload = content.partition("\n\n")
+        if sep and payload.startswith("["):
+            items = json.loads(payload)
+            answer = json.dumps([
+                {"id": item["id"], **self._summarise(item["event"])}
+                for item in items
+                if self.rng.random() >= self.malformed_rate
+            ])
+        elif self.rng.random() < self.malformed_rate:
+            answer = "Sorry, I cannot help with that."
+        else:
+            answer = json.dumps(self._summarise(content))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=answer))])
+
+    @staticmethod
+    def _summarise(prompt: str) -> dict:
+        fields = {}
+        for line in prompt.splitlines():
+            key, _, value = line.partition(":")
+            fields[key.strip()] = value.strip()
+        return {
+            "summary": f"A simulated attack: {fields.get('Attack Description', fields.get('Attack Name', 'unknown'))[:60]}",
+            "attacker_country": fields.get("Attacker's Country", "None"),
+            "victim_country": fields.get("Victim's Country", "None"),
+        }
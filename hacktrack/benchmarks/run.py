@@ -0,0 +1,273 @@
+"""
+Offline throughput benchmarks for the backend.
+
+Runs the real ingest, summarisation and API code against the local fakes in
+benchmarks/fakes.py and a throwaway SQLite database, then reports events/sec,
+p50/p99 latency, DB statements per cycle and peak Python memory per scenario.
+
+    cd hacktrack
+    python -m benchmarks.run                       # all scenarios
+    python -m benchmarks.run otx summarise --mistral-latency 0.2 --error-rate 0.05
+    python -m benchmarks.run --json results.json   # keep numbers to compare between commits
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+from statistics import median
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# the backend reads these at import time; never let a benchmark reach the real services
+os.environ["OTX_API_KEY"] = "bench"
+os.environ["ABUSEIPDB_API_KEY"] = "bench"
+os.environ["MISTRAL_API_KEY"] = "bench"
+for key, value in {
+    "OTX_RATE_PER_SEC": "1000",
+    "ABUSEIPDB_RATE_PER_SEC": "1000",
+    "ABUSEIPDB_DAILY_QUOTA": "1000000",
+}.items():
+    os.environ.setdefault(key, value)
+
+SCENARIOS = ["otx", "abuseipdb", "ingest", "summarise", "logs"]
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.count = 0
+        from sqlalchemy import event
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+async def measure(name, run, counter, items_of):
+    """Runs `run()` (which returns (items, per-op latencies)) and collects the report row."""
+    tracemalloc.start()
+    statements = counter.count
+    started = time.perf_counter()
+    result, latencies = await run()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    items = items_of(result)
+    return {
+        "scenario": name,
+        "items": items,
+        "seconds": round(elapsed, 3),
+        "events_per_sec": round(items / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(median(latencies) * 1000, 1) if latencies else 0.0,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "db_statements": counter.count - statements,
+        "peak_mem_mb": round(peak / 1e6, 2),
+    }
+
+def lag_row(name, samples):
+    """Report row for event loop lag samples; latency columns are the lag itself."""
+    return {
+        "scenario": name,
+        "items": len(samples),
+        "seconds": round(sum(samples), 3),
+        "events_per_sec": 0.0,
+        "p50_ms": round(median(samples) * 1000, 1) if samples else 0.0,
+        "p99_ms": round(percentile(samples, 99) * 1000, 1),
+        "db_statements": 0,
+        "peak_mem_mb": 0.0,
+    }
+
+async def main(args):
+    if args.json:
+        args.json = os.path.abspath(args.json)
+    workdir = tempfile.mkdtemp(prefix="hacktrack-bench-")
+    os.chdir(workdir)
+    # never benchmark against a configured DATABASE_URL; pass --database-url to test another backend
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{workdir}/bench.db"
+
+    from sqlalchemy import func
+    from sqlalchemy.future import select
+    from benchmarks.fakes import FakeFeeds, FakeMistral
+    from backend.db.session import engine, AsyncSessionLocal
+    from backend.db.init import init_db
+    from backend.ingest.http import http_pool
+    from backend.ingest.otx import get_pulse_events
+    from backend.ingest.abuseipdb import get_abuseipdb_events
+    from backend.ai.summarizer import set_client
+    from backend.utils.ingestor import run_ingest_cycle
+    from backend.utils import pipeline
+    from backend.utils.metrics import EVENTS_SUMMARISED
+    from backend.utils.offload import OFFLOAD_EXECUTOR, LoopLagMonitor, shutdown_executor
+    from backend.ingest.otx import OTXCollector
+    from backend.ingest.abuseipdb import AbuseIPDBCollector
+    from backend.db.models import Event, LogEntry
+    from backend.utils.responses import encode_log_payload
+    from backend.db.retention import MAX_EVENTS
+    from backend import main as app_module
+
+    feeds = FakeFeeds(pulses=args.pulses, blacklist=args.ips, latency=args.feed_latency, error_rate=args.error_rate)
+    mistral = FakeMistral(latency=args.mistral_latency, error_rate=args.error_rate, malformed_rate=args.malformed_rate)
+    http_pool.transport = feeds.transport()
+    set_client(mistral)
+
+    await init_db()
+    counter = StatementCounter(engine)
+    results = []
+
+    async def timed(coro_fn, *a):
+        t0 = time.perf_counter()
+        out = await coro_fn(*a)
+        return out, time.perf_counter() - t0
+
+    if "otx" in args.scenarios:
+        async def run():
+            out, took = await timed(get_pulse_events)
+            return out, [took]
+        results.append(await measure("otx fetch", run, counter, len))
+
+    if "abuseipdb" in args.scenarios:
+        async def run():
+            out, took = await timed(get_abuseipdb_events)
+            return out, [took]
+        results.append(await measure("abuseipdb fetch", run, counter, len))
+
+    if "ingest" in args.scenarios:
+        # how long the loop is held while ingesting, i.e. the delay an API request would see
+        lag = LoopLagMonitor(interval=0.005, warn_after=float("inf"))
+
+        async def run():
+            totals, latencies = [], []
+            monitor = asyncio.create_task(lag.run())
+            for collector in (OTXCollector(), AbuseIPDBCollector()):
+                (fetched, inserted, skipped), took = await timed(run_ingest_cycle, collector.name, collector.batches)
+                totals.append(fetched)
+                latencies.append(took)
+            monitor.cancel()
+            return sum(totals), latencies
+        results.append(await measure("ingest cycle", run, counter, lambda n: n))
+        results.append(lag_row(f"loop lag ({OFFLOAD_EXECUTOR})", list(lag.samples)))
+
+    if "summarise" in args.scenarios:
+        if "ingest" not in args.scenarios:
+            # seed the backlog outside the measurement
+            for collector in (OTXCollector(), AbuseIPDBCollector()):
+                await run_ingest_cycle(collector.name, collector.batches)
+
+        async def run():
+            # the path the app runs: claim -> summarise -> resolve arc -> publish, capped by in-flight capacity
+            summary_pipeline = pipeline.SummaryPipeline(claim_size=args.claim_size,
+                                                        summarise_workers=args.summary_workers, idle_poll=0.05)
+            async with AsyncSessionLocal() as db:
+                backlog = (await db.execute(select(func.count(Event.id)).where(Event.status == "pending"))).scalar()
+            failed_before = EVENTS_SUMMARISED.values.get(("failed",), 0)
+            claim_events, complete_events = pipeline.claim_events, pipeline.complete_events
+            claimed_at, latencies = {}, []
+
+            def settled():
+                # failed summaries are released with a retry delay, so they are done for this run
+                return len(latencies) + EVENTS_SUMMARISED.values.get(("failed",), 0) - failed_before >= backlog
+
+            async def timed_claim(db, *a, **kw):
+                events = await claim_events(db, *a, **kw)
+                now = time.perf_counter()
+                for event in events:
+                    claimed_at.setdefault(event.id, now)
+                return events
+
+            async def timed_complete(db, ids, *a, **kw):
+                stored = await complete_events(db, ids, *a, **kw)
+                now = time.perf_counter()
+                # per event: first claim to published log entry
+                latencies.extend(now - claimed_at[i] for i in ids)
+                return stored
+
+            pipeline.claim_events, pipeline.complete_events = timed_claim, timed_complete
+            task = asyncio.create_task(summary_pipeline.run())
+            deadline = time.perf_counter() + args.summarise_timeout
+            try:
+                while not settled():
+                    if time.perf_counter() > deadline:
+                        print(f"[ERROR] summary pipeline left {backlog - len(latencies)} events after {args.summarise_timeout}s")
+                        break
+                    await asyncio.sleep(0.05)
+            finally:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                pipeline.claim_events, pipeline.complete_events = claim_events, complete_events
+            return len(latencies), latencies
+        results.append(await measure("summary pipeline", run, counter, lambda n: n))
+
+    if "logs" in args.scenarios:
+        async with AsyncSessionLocal() as db:
+            payload = [{"id": 0, "source": "OTX", "timestamp": "2025-01-01T00:00:00"}, None, {"summary": "x" * 120}]
+            db.add_all([LogEntry(created_at=time.time(), data=encode_log_payload(payload))
+                        for _ in range(min(args.log_entries, 500))])
+            await db.commit()
+
+        async def run():
+            import httpx
+            transport = httpx.ASGITransport(app=app_module.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                async def one():
+                    t0 = time.perf_counter()
+                    resp = await client.get("/logs")
+                    resp.raise_for_status()
+                    return len(resp.json()["logs"]), time.perf_counter() - t0
+                outs = await asyncio.gather(*[one() for _ in range(args.viewers)])
+            return sum(n for n, _ in outs), [t for _, t in outs]
+        results.append(await measure(f"/logs x{args.viewers}", run, counter, lambda n: n))
+
+    await http_pool.aclose()
+    await engine.dispose()
+    shutdown_executor()
+
+    header = f"{'scenario':<20}{'items':>8}{'sec':>9}{'ev/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'stmts':>8}{'peak MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['scenario']:<20}{r['items']:>8}{r['seconds']:>9}{r['events_per_sec']:>10}"
+              f"{r['p50_ms']:>10}{r['p99_ms']:>10}{r['db_statements']:>8}{r['peak_mem_mb']:>9}")
+    print(f"\nfake feed requests: {feeds.requests}, fake Mistral calls: {mistral.calls} "
+          f"({mistral.prompt_chars} prompt chars), retention cap: {MAX_EVENTS}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline HackTrack backend benchmarks")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--pulses", type=int, default=500)
+    parser.add_argument("--ips", type=int, default=100)
+    parser.add_argument("--feed-latency", type=float, default=0.05, help="seconds per fake feed request")
+    parser.add_argument("--mistral-latency", type=float, default=0.5, help="mean seconds per fake agent call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream calls that fail")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of agent answers that are unusable")
+    parser.add_argument("--claim-size", type=int, default=20, help="events per summary pipeline claim")
+    parser.add_argument("--summary-workers", type=int, default=10, help="concurrent summarise workers")
+    parser.add_argument("--summarise-timeout", type=float, default=120.0,
+                        help="stop the summary pipeline after this many seconds if the backlog is not done")
+    parser.add_argument("--log-entries", type=int, default=500)
+    parser.add_argument("--viewers", type=int, default=50, help="concurrent /logs requests")
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument("--database-url", help="throwaway database to run against (default: temp SQLite file)")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    args.scenarios = args.scenarios or SCENARIOS
+    return args
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useMemo, useRef } from 'react';
 import DeckGL from '@deck.gl/react';
-import { GeoJsonLayer, ArcLayer, ScatterplotLayer } from '@deck.gl/layers';
+import { GeoJsonLayer, ArcLayer, PathLayer, ScatterplotLayer } from '@deck.gl/layers';
 import { COORDINATE_SYSTEM } from '@deck.gl/core';
 import { countriesGeoJson } from './data/countries';
 import { geoCentroid, geoDistance } from 'd3-geo';
@@ -28,6 +28,17 @@ function arcHeight(src, dst) {
   return Math.max(0, km * 0.25);
 }
 
+// Decode the backend's precomputed great-circle path: flat ints [lon, lat, alt_km, ...],
+// lon/lat scaled by path.scale
+function decodeArcPath(path) {
+  if (!path || !path.coords) return null;
+  const points = [];
+  for (let i = 0; i + 2 < path.coords.length; i += 3) {
+    points.push([path.coords[i] / path.scale, path.coords[i + 1] / path.scale, path.coords[i + 2] * 1000]);
+  }
+  return points;
+}
+
 // Hook to pre-calculate country centroids
 const useCountryCentroids = () =>
   useMemo(
@@ -39,9 +50,9 @@ const useCountryCentroids = () =>
     []
   );
 
-// log and fetch timings
+// log stream and timings
 const MAX_LOGS = 4
-const INTERVAL_FETCH = 10000;
+const LOG_STREAM_URL = 'http://localhost:8000/logs/stream';
 // INTERVAL_DRAIN is removed, now handled by getRandomDrainInterval
 
 /* Animation Timing */
@@ -100,6 +111,8 @@ export default function App() {
   const [arcs, setArcs] = useState([]);
   const centroids = useCountryCentroids();
   const logQueue = useRef([]);
+  // event ids whose arc was already drawn from an early "arc" preview
+  const previewedArcs = useRef(new Set());
   const logRefs = useRef(new Map());
 
   // Helper function to get a random delay between 2000ms (2s) and 5000ms (5s)
@@ -108,28 +121,32 @@ export default function App() {
     return Math.floor(Math.random() * 3000) + 2000;
   };
 
-  // Fetch logs periodically and add to queue
+  // Subscribe to the live log stream and add entries to the queue
   useEffect(() => {
-    const fetchLiveLogs = async () => {
+    // EventSource reconnects on its own and resumes via Last-Event-ID
+    const source = new EventSource(LOG_STREAM_URL);
+    source.addEventListener('log', e => {
       try {
-        const res = await fetch('http://localhost:8000/logs');
-        console.log("Fetching Logs")
-        const text = await res.text();
-        if (!text) return;
-        const data = JSON.parse(text);
-        if (!data.logs) return;
-
-        logQueue.current.push(...data.logs);
+        logQueue.current.push(JSON.parse(e.data));
       } catch (err) {
-        console.error("Failed to fetch logs:", err);
+        console.error("Failed to parse log entry:", err);
       }
-    };
-
-    const fetchInterval = setInterval(fetchLiveLogs, INTERVAL_FETCH);
-    fetchLiveLogs(); // run once immediately
+    });
+    // arcs for events whose countries the backend already knows, sent before the summary
+    source.addEventListener('arc', e => {
+      try {
+        const { id, arc } = JSON.parse(e.data);
+        if (previewedArcs.current.has(id) || !arc || !arc.src || !arc.dst) return;
+        previewedArcs.current.add(id);
+        setArcs(prev => [...prev, { src: arc.src, dst: arc.dst, path: decodeArcPath(arc.path), t0: Date.now() }]);
+      } catch (err) {
+        console.error("Failed to parse arc preview:", err);
+      }
+    });
+    source.onerror = err => console.error("Log stream error:", err);
 
-    return () => clearInterval(fetchInterval);
-  }, [centroids]);
+    return () => source.close();
+  }, []);
 
   // Drain queue and add entries one by one
   useEffect(() => {
@@ -147,11 +164,13 @@ export default function App() {
       const [event, arc, summary] = logQueue.current.shift();
       const t0 = Date.now();
 
-      // 2. Add arc
-      if (arc && JSON.stringify(arc.src) === JSON.stringify([0, 0]) && arc.dst) {
+      // 2. Add arc (unless its preview is already on the map)
+      if (previewedArcs.current.delete(event.id)) {
+        // drawn when the preview arrived
+      } else if (arc && JSON.stringify(arc.src) === JSON.stringify([0, 0]) && arc.dst) {
         setArcs(prev => [...prev, { src: arc.dst, dst: arc.dst, t0 }]);
       } else if (arc && arc.src && arc.dst) {
-        setArcs(prev => [...prev, { src: arc.src, dst: arc.dst, t0 }]);
+        setArcs(prev => [...prev, { src: arc.src, dst: arc.dst, path: decodeArcPath(arc.path), t0 }]);
       } 
 
       // 3. Add log to use resolved countries
@@ -164,8 +183,10 @@ export default function App() {
             attackerCountry: event.resolved_attacker_country,
             // Use the AI-resolved victim country
             victimCountry: event.resolved_victim_country, 
-            attack: event.abuse_attack || event.otx_name,
-            timestamp: event.timestamp
+            attack: event.title || event.description,
+            timestamp: event.timestamp,
+            // near-identical reports merged into this one by the backend
+            count: event.duplicate_count || 1
           }
         };
         return [newLog, ...prev].slice(0, MAX_LOGS);
@@ -221,10 +242,10 @@ export default function App() {
     opacity: 0.9
   });
 
-  /* Arc Layer — white fading arcs */
+  /* Arc Layer — white fading arcs (only for arcs without a precomputed path) */
   const arcLayer = new ArcLayer({
     id: 'attack-arcs',
-    data: arcs,
+    data: arcs.filter(d => !d.path),
     getSourcePosition: d => d.src,
     getTargetPosition: d => d.dst,
     getHeight: d => arcHeight(d.src, d.dst),
@@ -242,6 +263,18 @@ export default function App() {
     updateTriggers: { getSourceColor: time, getTargetColor: time }
   });
 
+  /* Path Layer — same arcs, drawn from the backend's precomputed geometry */
+  const pathLayer = new PathLayer({
+    id: 'attack-paths',
+    data: arcs.filter(d => d.path),
+    getPath: d => d.path,
+    wrapLongitude: true,
+    widthUnits: 'pixels',
+    getWidth: 3,
+    getColor: d => [255, 255, 255, arcAlphaAtAge(time - d.t0)],
+    updateTriggers: { getColor: time }
+  });
+
   /* Flare Layer – white endpoint glows */
   const flareLayer = new ScatterplotLayer({
     id: 'endpoint-flares',
@@ -342,7 +375,7 @@ export default function App() {
         <DeckGL
           viewState={getViewState()}
           controller
-          layers={[countryLayer, arcLayer, flareLayer]}
+          layers={[countryLayer, arcLayer, pathLayer, flareLayer]}
           glOptions={{ alpha: true }}
           style={{
             filter: 'drop-shadow(1px 1px 10px rgba(0,174,255,1))',
@@ -371,7 +404,7 @@ export default function App() {
                 <div ref={ref} className="log-entry">
                   <div>{log.text}</div>
                   <div style={{ fontSize: '0.7em', color: 'var(--text-dim)', marginTop: '0.2em' }}>
-                    {log.meta?.attackerCountry || 'Unknown'} • {log.meta?.victimCountry || 'Unknown'} • {new Date(log.meta?.timestamp).toLocaleString()}
+                    {log.meta?.attackerCountry || 'Unknown'} • {log.meta?.victimCountry || 'Unknown'} • {new Date(log.meta?.timestamp).toLocaleString()}{log.meta?.count > 1 ? ` • ×${log.meta.count}` : ''}
                   </div>
                 </div>
               </CSSTransition>
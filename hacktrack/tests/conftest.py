@@ -0,0 +1,30 @@
+import os
+import asyncio
+import tempfile
+
+import pytest
+
+# a throwaway SQLite database per test run; set before backend.db.session creates its engine
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='hacktrack-test-')}/test.db"
+
+@pytest.fixture
+def run_db():
+    """Runs an async test body against a migrated database with every table emptied."""
+    from backend.db.init import init_db
+    from backend.db.models import Base
+    from backend.db.session import engine
+
+    async def runner(body):
+        # every table is emptied below, so never run against a database this file didn't pick
+        assert engine.url.render_as_string(hide_password=False) == os.environ["DATABASE_URL"], engine.url
+        await init_db()
+        async with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                await conn.execute(table.delete())
+        try:
+            return await body()
+        finally:
+            # pooled aiosqlite connections belong to this test's event loop
+            await engine.dispose()
+
+    return lambda body: asyncio.run(runner(body))
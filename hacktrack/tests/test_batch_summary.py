@@ -0,0 +1,84 @@
+import json
+from types import SimpleNamespace
+
+from backend.ai import summarizer
+from backend.ai.summarizer import summarize_events_batch
+
+def _event(event_id):
+    return SimpleNamespace(id=event_id, source="OTX", title=None, description=f"Activity cluster {event_id}",
+                           attacker_country=None, victim_country=None, attacker_ip=None)
+
+def _summary(prompt):
+    description = next(line for line in prompt.splitlines() if line.startswith("Attack Description:"))
+    return {"summary": description.partition(": ")[2], "attacker_country": "None", "victim_country": "None"}
+
+class ScriptedAgent:
+    """Stands in for the Mistral client: `reply(items)` answers packed requests, single prompts always succeed."""
+    def __init__(self, reply):
+        self.reply = reply
+        self.requests = []
+        self.agents = SimpleNamespace(complete_async=self.complete_async)
+
+    async def complete_async(self, agent_id, messages):
+        content = messages[-1]["content"]
+        _, sep, payload = content.partition("\n\n")
+        if sep and payload.startswith("["):
+            items = json.loads(payload)
+            self.requests.append([item["id"] for item in items])
+            answer = self.reply(items)
+        else:
+            self.requests.append("single")
+            answer = json.dumps(_summary(content))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=answer))])
+
+def _answers(items):
+    return [{"id": item["id"], **_summary(item["event"])} for item in items]
+
+def _run(run_db, monkeypatch, reply, ids):
+    agent = ScriptedAgent(reply)
+    monkeypatch.setattr(summarizer, "_client", agent)
+
+    async def body():
+        return await summarize_events_batch([_event(event_id) for event_id in ids])
+
+    results = run_db(body)
+    return [r["summary"] if isinstance(r, dict) else r for r in results], agent.requests
+
+IDS = [101, 205, 37, 4]
+EXPECTED = [f"Activity cluster {event_id}" for event_id in IDS]
+
+def test_reordered_reply_is_matched_by_event_id(run_db, monkeypatch):
+    results, requests = _run(run_db, monkeypatch, lambda items: json.dumps(_answers(items)[::-1]), IDS)
+    assert results == EXPECTED
+    # the request carries the event ids themselves, not positions
+    assert requests == [IDS]
+
+def test_missing_answers_are_retried_on_their_own(run_db, monkeypatch, capsys):
+    def reply(items):
+        # only ever answers the first item
+        return json.dumps(_answers(items)[:1])
+
+    results, requests = _run(run_db, monkeypatch, reply, IDS)
+    assert results == EXPECTED
+    assert requests == [IDS, [205, 37, 4], [37, 4], "single"]
+    assert "4 events in 4 agent calls" in capsys.readouterr().out
+
+def test_unknown_and_duplicated_ids_are_not_trusted(run_db, monkeypatch):
+    def reply(items):
+        answers = _answers(items)
+        if len(items) < len(IDS):
+            return json.dumps(answers)
+        # 101's summary also under 205, a second answer for 37, an id that was never sent, and a quoted id
+        return json.dumps([answers[0], dict(answers[0], id=205), answers[1], answers[2], dict(answers[1], id=37),
+                           dict(answers[0], id=999), dict(answers[3], id="4")])
+
+    results, requests = _run(run_db, monkeypatch, reply, IDS)
+    assert results == EXPECTED
+    # 101 and the quoted 4 were accepted; 205 and 37 each had two answers, so both went back out
+    assert requests == [IDS, [205, 37]]
+
+def test_unusable_reply_splits_the_batch_down_to_single_calls(run_db, monkeypatch, capsys):
+    results, requests = _run(run_db, monkeypatch, lambda items: "Sorry, I cannot help with that.", IDS)
+    assert results == EXPECTED
+    assert requests == [IDS, [101, 205], "single", "single", [37, 4], "single", "single"]
+    assert "4 events in 7 agent calls" in capsys.readouterr().out
@@ -0,0 +1,56 @@
+import time
+
+from sqlalchemy.future import select
+
+from backend.ai import cache
+from backend.ai.cache import cache_key, cache_stats, get_cached_summary, store_summary
+from backend.db.models import SummaryCache
+from backend.db.session import AsyncSessionLocal
+
+async def _keys():
+    async with AsyncSessionLocal() as db:
+        return set((await db.execute(select(SummaryCache.key))).scalars().all())
+
+def test_cache_key_covers_prompt_and_agent():
+    assert cache_key("prompt", "agent-a") == cache_key("prompt", "agent-a")
+    assert cache_key("prompt", "agent-a") != cache_key("prompt", "agent-b")
+    assert cache_key("prompt", "agent-a") != cache_key("prompt.", "agent-a")
+
+def test_expired_entry_is_a_miss_and_is_evicted(run_db):
+    async def body():
+        async with AsyncSessionLocal() as db:
+            stale = time.time() - cache.SUMMARY_CACHE_TTL - 1
+            db.add(SummaryCache(key="old", summary={"summary": "stale"}, created_at=stale, last_used_at=stale, hits=0))
+            await db.commit()
+
+        misses = cache_stats["misses"]
+        cached = await get_cached_summary("old")
+        missed = cache_stats["misses"] - misses
+        # any store runs eviction, which drops expired entries whatever the size cap
+        await store_summary("new", {"summary": "fresh"})
+        return cached, missed, await _keys(), await get_cached_summary("new")
+
+    cached, missed, keys, fresh = run_db(body)
+    assert cached is None and missed == 1
+    assert keys == {"new"}
+    assert fresh == {"summary": "fresh"}
+
+def test_least_recently_used_entries_are_evicted_first(run_db, monkeypatch):
+    monkeypatch.setattr(cache, "SUMMARY_CACHE_MAX_ENTRIES", 3)
+
+    async def body():
+        for key in ("a", "b", "c"):
+            await store_summary(key, {"summary": key})
+        # a hit makes "a" the most recently used, so "b" is now the oldest
+        assert await get_cached_summary("a") == {"summary": "a"}
+
+        evictions = cache_stats["evictions"]
+        await store_summary("d", {"summary": "d"})
+        after_d = await _keys()
+        await store_summary("e", {"summary": "e"})
+        return after_d, await _keys(), cache_stats["evictions"] - evictions
+
+    after_d, after_e, evicted = run_db(body)
+    assert after_d == {"a", "c", "d"}
+    assert after_e == {"a", "d", "e"}
+    assert evicted == 2
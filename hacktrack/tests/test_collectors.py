@@ -0,0 +1,125 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from backend.ingest.collectors import (
+    Collector, CronSchedule, IntervalSchedule, _cron_field, load_collectors, normalised_event, parse_schedule,
+)
+
+def _ts(*args) -> float:
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+def _next(spec, *after):
+    return datetime.fromtimestamp(CronSchedule(spec).next_after(_ts(*after)), timezone.utc)
+
+# START OF CRON FIELDS
+
+@pytest.mark.parametrize("field, low, high, expected", [
+    ("*", 0, 6, set(range(7))),
+    ("*/15", 0, 59, {0, 15, 30, 45}),
+    ("1-5", 0, 59, {1, 2, 3, 4, 5}),
+    ("10-20/5", 0, 59, {10, 15, 20}),
+    ("5/20", 0, 59, {5, 25, 45}),
+    ("1,3,7", 0, 59, {1, 3, 7}),
+    ("0-2,30", 0, 59, {0, 1, 2, 30}),
+])
+def test_cron_field(field, low, high, expected):
+    assert _cron_field(field, low, high) == expected
+
+@pytest.mark.parametrize("field", ["60", "5-1", "0-60", "x", "1-"])
+def test_cron_field_rejects_invalid(field):
+    with pytest.raises(ValueError):
+        _cron_field(field, 0, 59)
+
+def test_cron_needs_five_fields():
+    with pytest.raises(ValueError):
+        CronSchedule("0 3 * *")
+
+# END OF CRON FIELDS
+
+# START OF NEXT RUN
+
+def test_next_after_same_day():
+    assert _next("0 3 * * *", 2026, 1, 1, 2, 59, 30) == datetime(2026, 1, 1, 3, 0, tzinfo=timezone.utc)
+
+def test_next_after_is_strictly_later():
+    assert _next("0 3 * * *", 2026, 1, 1, 3, 0) == datetime(2026, 1, 2, 3, 0, tzinfo=timezone.utc)
+
+def test_next_after_steps():
+    assert _next("*/15 * * * *", 2026, 1, 1, 10, 7) == datetime(2026, 1, 1, 10, 15, tzinfo=timezone.utc)
+    assert _next("*/15 * * * *", 2026, 1, 1, 10, 50) == datetime(2026, 1, 1, 11, 0, tzinfo=timezone.utc)
+
+def test_next_after_weekday():
+    # 2026-01-01 is a Thursday; 1 is Monday, and both 0 and 7 are Sunday
+    assert _next("0 0 * * 1", 2026, 1, 1) == datetime(2026, 1, 5, tzinfo=timezone.utc)
+    assert _next("0 0 * * 0", 2026, 1, 1) == datetime(2026, 1, 4, tzinfo=timezone.utc)
+    assert _next("0 0 * * 7", 2026, 1, 1) == datetime(2026, 1, 4, tzinfo=timezone.utc)
+
+def test_next_after_either_day_field_matches_when_both_are_restricted():
+    # the 13th or any Friday, as in cron; Friday 2 January comes first
+    assert _next("0 0 13 * 5", 2026, 1, 1) == datetime(2026, 1, 2, tzinfo=timezone.utc)
+
+def test_next_after_rolls_over_year_and_month():
+    assert _next("30 23 31 12 *", 2026, 12, 31, 23, 30) == datetime(2027, 12, 31, 23, 30, tzinfo=timezone.utc)
+    assert _next("0 0 1 * *", 2026, 1, 31, 12) == datetime(2026, 2, 1, tzinfo=timezone.utc)
+
+def test_next_after_leap_day():
+    assert _next("0 0 29 2 *", 2026, 1, 1) == datetime(2028, 2, 29, tzinfo=timezone.utc)
+
+def test_schedule_that_never_fires():
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 31 2 *").next_after(_ts(2026, 1, 1))
+
+def test_parse_schedule():
+    interval = parse_schedule("1800")
+    assert isinstance(interval, IntervalSchedule)
+    assert interval.first(1000.0) == 1000.0
+    assert interval.next_after(1000.0) == 2800.0
+    assert isinstance(parse_schedule("*/5 * * * *"), CronSchedule)
+    with pytest.raises(ValueError):
+        parse_schedule("-5")
+
+# END OF NEXT RUN
+
+# START OF COLLECTORS
+
+class Example(Collector):
+    name = "Example"
+    schedule = "600"
+    jitter = 5
+
+    async def batches(self, db):
+        yield []
+
+def test_collector_must_implement_batches():
+    class Incomplete(Collector):
+        name = "Incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_collector_settings_from_env(monkeypatch):
+    monkeypatch.setenv("COLLECTOR_EXAMPLE_SCHEDULE", "0 * * * *")
+    monkeypatch.setenv("COLLECTOR_EXAMPLE_JITTER", "30")
+    collector = Example()
+    assert (collector.schedule, collector.jitter, collector.enabled) == ("0 * * * *", 30.0, True)
+
+class NeedsKey(Example):
+    created = 0
+
+    def __init__(self):
+        NeedsKey.created += 1
+        raise RuntimeError("no API key")
+
+def test_disabled_collector_is_never_created(monkeypatch):
+    monkeypatch.setenv("COLLECTOR_EXAMPLE_ENABLED", "false")
+    assert load_collectors(f"{__name__}:NeedsKey") == []
+    assert NeedsKey.created == 0
+
+def test_normalised_event_rejects_unknown_fields():
+    event = normalised_event("OTX", "2026-01-01T00:00:00", title="x")
+    assert event["title"] == "x" and event["attacker_country"] is None
+    with pytest.raises(TypeError):
+        normalised_event("OTX", "2026-01-01T00:00:00", otx_name="x")
+
+# END OF COLLECTORS
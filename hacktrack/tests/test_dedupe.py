@@ -0,0 +1,96 @@
+import random
+
+from backend.utils.dedupe import NearDuplicateIndex, event_text, simhash
+
+NOW = 1_700_000_000.0
+
+def _event(n, source="AbuseIPDB", attacker="China", victim="Germany"):
+    return {"source": source, "timestamp": f"2026-01-01T00:00:{n:02d}",
+            "attacker_country": attacker, "victim_country": victim, "title": None, "description": None}
+
+def _flip(signature, *bits):
+    for bit in bits:
+        signature ^= 1 << bit
+    return signature
+
+# START OF SIGNATURES
+
+def test_simhash_ignores_ips_and_numbers():
+    a = simhash("SSH brute force from 203.0.113.7 port 2201, 53 attempts")
+    b = simhash("SSH brute force from 198.51.100.20 port 40122, 7 attempts")
+    assert a == b
+
+def test_simhash_separates_unrelated_text():
+    a = simhash("SSH brute force login attempts against the mail server")
+    b = simhash("Phishing campaign impersonating a parcel delivery service")
+    assert (a ^ b).bit_count() > 10
+    assert simhash("") == 0
+
+def test_event_text_joins_title_and_description():
+    assert event_text({"title": "Scan", "description": None}) == "Scan"
+    assert event_text({"title": "Scan", "description": "of port 22"}) == "Scan of port 22"
+
+# END OF SIGNATURES
+
+# START OF INDEX
+
+def test_near_duplicates_in_a_batch_fold_into_the_first():
+    index = NearDuplicateIndex(max_distance=3)
+    sig = random.Random(1).getrandbits(64)
+    events = [_event(1), _event(2), _event(3), _event(4, victim="France")]
+    fresh, pending, merges = index.collapse(events, NOW, signatures=[sig, _flip(sig, 0, 40), _flip(sig, 1, 2, 3, 4), sig])
+    # within distance -> folded; beyond it, or a different country pair -> a new row
+    assert [e["timestamp"] for e in fresh] == [events[0]["timestamp"], events[2]["timestamp"], events[3]["timestamp"]]
+    assert fresh[0]["duplicate_count"] == 2
+    assert len(pending) == 3 and not merges
+
+def test_bound_entries_become_merge_targets_and_repeats_are_dropped():
+    index = NearDuplicateIndex(max_distance=3)
+    sig = random.Random(2).getrandbits(64)
+    first = _event(1)
+    _, pending, _ = index.collapse([first], NOW, signatures=[sig])
+    index.bind(pending, {("AbuseIPDB", first["timestamp"]): 42})
+
+    fresh, _, merges = index.collapse([dict(first), _event(2)], NOW + 60, signatures=[sig, _flip(sig, 63)])
+    assert fresh == []
+    assert [e["timestamp"] for e in merges[42]] == [_event(2)["timestamp"]]
+
+def test_skipped_inserts_and_forgotten_rows_stop_matching():
+    index = NearDuplicateIndex(max_distance=3)
+    sig = random.Random(3).getrandbits(64)
+    _, pending, _ = index.collapse([_event(1), _event(2, victim="France")], NOW, signatures=[sig, sig])
+    # only the first row was inserted
+    index.bind(pending, {("AbuseIPDB", _event(1)["timestamp"]): 7})
+    assert len(index) == 1
+    index.forget([7])
+    assert len(index) == 0
+    fresh, _, merges = index.collapse([_event(3)], NOW, signatures=[sig])
+    assert len(fresh) == 1 and not merges
+
+def test_entries_expire_after_the_window():
+    index = NearDuplicateIndex(window=3600, max_distance=3)
+    sig = random.Random(4).getrandbits(64)
+    _, pending, _ = index.collapse([_event(1)], NOW, signatures=[sig])
+    index.bind(pending, {("AbuseIPDB", _event(1)["timestamp"]): 1})
+    fresh, _, merges = index.collapse([_event(2)], NOW + 3601, signatures=[sig])
+    assert len(fresh) == 1 and not merges
+
+def test_banding_finds_exactly_what_a_full_scan_would():
+    rng = random.Random(5)
+    index = NearDuplicateIndex(max_distance=3)
+    stored = [rng.getrandbits(64) for _ in range(300)]
+    partition = ("AbuseIPDB", "China", "Germany")
+    for n, sig in enumerate(stored):
+        index._add(partition, sig, ("AbuseIPDB", n), NOW, None)
+
+    for _ in range(500):
+        base = rng.choice(stored)
+        probe = _flip(base, *rng.sample(range(64), rng.randint(0, 5)))
+        found = index._find(partition, probe)
+        within = [s for s in stored if (s ^ probe).bit_count() <= 3]
+        if within:
+            assert found is not None and (found.signature ^ probe).bit_count() <= 3
+        else:
+            assert found is None
+
+# END OF INDEX
@@ -0,0 +1,98 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy.future import select
+
+from backend.db.history import append_history, time_buckets
+from backend.db.models import EventHistory, EventHistoryHourly
+from backend.db.session import AsyncSessionLocal
+
+# 2026-01-01T00:00:00Z, a multiple of every bucket width used below
+BASE = 1_767_225_600
+HOUR = 3600
+
+def _row(offset, source="OTX", attacker="CN", victim="DE", duplicates=1):
+    return {"ts": BASE + offset, "source": source, "attacker_code": attacker,
+            "victim_code": victim, "summary_id": None, "duplicate_count": duplicates}
+
+# last and first second of neighbouring hours, so every bucket boundary is straddled
+ROWS = [
+    _row(0), _row(HOUR - 1, duplicates=3), _row(HOUR), _row(2 * HOUR - 1, attacker="RU"),
+    _row(2 * HOUR, source="AbuseIPDB", duplicates=2), _row(3 * HOUR - 1, source="AbuseIPDB"),
+    _row(3 * HOUR, attacker=None, victim=None), _row(4 * HOUR + 1, source=None, duplicates=5),
+]
+
+async def _seed():
+    async with AsyncSessionLocal() as db:
+        # two appends, so hours already in the rollup are added to rather than replaced
+        await append_history(db, ROWS[:3])
+        await append_history(db, ROWS[3:] + [_row(30)])
+        await db.commit()
+
+async def _raw_counts(width):
+    """The aggregate straight from event_history, for comparison with the rollup."""
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(select(EventHistory.ts, EventHistory.source, EventHistory.attacker_code,
+                                        EventHistory.victim_code, EventHistory.duplicate_count))).all()
+    counts = defaultdict(int)
+    for ts, source, attacker, victim, duplicates in rows:
+        counts[(ts - ts % width, source or "", attacker or "", victim or "")] += duplicates
+    return counts
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+def test_rollup_matches_the_raw_history(run_db):
+    async def body():
+        await _seed()
+        async with AsyncSessionLocal() as db:
+            rollup = (await db.execute(select(EventHistoryHourly.hour, EventHistoryHourly.source,
+                                              EventHistoryHourly.attacker_code, EventHistoryHourly.victim_code,
+                                              EventHistoryHourly.count))).all()
+        return {tuple(row[:4]): row[4] for row in rollup}, await _raw_counts(HOUR)
+
+    rollup, raw = run_db(body)
+    assert rollup == raw
+    assert raw[(BASE, "OTX", "CN", "DE")] == 5
+    assert raw[(BASE + 4 * HOUR, "", "CN", "DE")] == 5
+
+def test_time_buckets_match_the_raw_history_for_every_width(run_db):
+    async def body():
+        await _seed()
+        results = {}
+        async with AsyncSessionLocal() as db:
+            for width in (HOUR, 2 * HOUR, 3 * HOUR):
+                buckets = await time_buckets(db, width)
+                raw = defaultdict(int)
+                for (start, *_), count in (await _raw_counts(width)).items():
+                    raw[start] += count
+                results[width] = (buckets, [{"start": s, "count": c} for s, c in sorted(raw.items())])
+            by_source = await time_buckets(db, 2 * HOUR, source="AbuseIPDB")
+        return results, by_source
+
+    results, by_source = run_db(body)
+    for width, (buckets, raw) in results.items():
+        assert buckets == raw, width
+    assert results[2 * HOUR][0] == [{"start": BASE, "count": 7}, {"start": BASE + 2 * HOUR, "count": 4},
+                                     {"start": BASE + 4 * HOUR, "count": 5}]
+    assert by_source == [{"start": BASE + 2 * HOUR, "count": 3}]
+
+def test_timeline_endpoint_buckets_and_ranges(run_db):
+    from backend.main import app
+
+    async def body():
+        await _seed()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            two_hours = (await client.get("/history/timeline", params={"bucket": 7200})).json()
+            # `since` mid-hour still counts that whole hour; `until` excludes the hour starting there
+            ranged = (await client.get("/history/timeline", params={
+                "since": _iso(BASE + HOUR + 1800), "until": _iso(BASE + 3 * HOUR)})).json()
+            rejected = [(await client.get("/history/timeline", params={"bucket": b})).status_code for b in (1800, 5400)]
+        return two_hours, ranged, rejected
+
+    two_hours, ranged, rejected = run_db(body)
+    assert two_hours == {"bucket": 7200, "buckets": [
+        {"start": BASE, "count": 7}, {"start": BASE + 2 * HOUR, "count": 4}, {"start": BASE + 4 * HOUR, "count": 5}]}
+    assert ranged == {"bucket": 3600, "buckets": [{"start": BASE + HOUR, "count": 2}, {"start": BASE + 2 * HOUR, "count": 3}]}
+    assert rejected == [422, 422]
@@ -0,0 +1,98 @@
+import time
+import asyncio
+
+import httpx
+import pytest
+
+from backend.ingest.http import ProviderClient, QuotaExceeded, parse_retry_after
+
+def _provider(handler, daily_quota=None, max_retries=3, rate=1000.0, burst=100):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return ProviderClient("test", client, rate=rate, burst=burst, concurrency=4,
+                          daily_quota=daily_quota, max_retries=max_retries, backoff=0.01)
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Thu, 01 Jan 1970 00:00:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+def test_retry_after_on_429_delays_every_request_to_the_provider():
+    sent = []
+
+    def handler(request):
+        sent.append((request.url.path, time.monotonic()))
+        if len(sent) == 1:
+            return httpx.Response(429, headers={"Retry-After": "1"})
+        return httpx.Response(200)
+
+    async def body():
+        provider = _provider(handler)
+        throttled = asyncio.create_task(provider.get("http://feed/a"))
+        while not sent:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        # sent after the 429 came back, so it waits out the same pause as the retry
+        other = await provider.get("http://feed/b")
+        retried = await throttled
+        await provider.client.aclose()
+        return retried, other
+
+    retried, other = asyncio.run(body())
+    assert retried.status_code == 200 and other.status_code == 200
+    path, first = sent[0]
+    assert path == "/a"
+    assert sorted(path for path, _ in sent[1:]) == ["/a", "/b"]
+    assert all(at - first >= 0.95 for _, at in sent[1:])
+
+def test_429_without_retry_after_backs_off_and_gives_up():
+    sent = []
+
+    def handler(request):
+        sent.append(request)
+        return httpx.Response(429)
+
+    async def body():
+        provider = _provider(handler, max_retries=2)
+        resp = await provider.get("http://feed/a")
+        await provider.client.aclose()
+        return resp
+
+    assert asyncio.run(body()).status_code == 429
+    assert len(sent) == 3
+
+def test_exhausted_daily_quota_blocks_requests():
+    sent = []
+
+    def handler(request):
+        sent.append(request)
+        return httpx.Response(200)
+
+    async def body():
+        provider = _provider(handler, daily_quota=2)
+        await provider.get("http://feed/a")
+        await provider.get("http://feed/a")
+        with pytest.raises(QuotaExceeded):
+            await provider.get("http://feed/a")
+        await provider.client.aclose()
+
+    asyncio.run(body())
+    assert len(sent) == 2
+
+def test_provider_reported_remaining_quota_blocks_requests():
+    sent = []
+
+    def handler(request):
+        sent.append(request)
+        return httpx.Response(200, headers={"X-RateLimit-Remaining": "0"})
+
+    async def body():
+        # the local count allows plenty more; the provider says none are left
+        provider = _provider(handler, daily_quota=1000)
+        await provider.get("http://feed/a")
+        with pytest.raises(QuotaExceeded):
+            await provider.get("http://feed/a")
+        await provider.client.aclose()
+
+    asyncio.run(body())
+    assert len(sent) == 1
@@ -0,0 +1,45 @@
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from backend.db.models import Event
+from backend.db.session import AsyncSessionLocal
+from backend.ingest.collectors import normalised_event
+from backend.utils.ingestor import insert_events
+
+def _events(*timestamps, source="OTX"):
+    return [normalised_event(source, ts, title=f"pulse {ts}") for ts in timestamps]
+
+def test_insert_events_returns_ids_of_inserted_rows_only(run_db):
+    async def body():
+        async with AsyncSessionLocal() as db:
+            first = await insert_events(db, _events("2026-01-01T00:00:01", "2026-01-01T00:00:03"))
+            await db.commit()
+
+            # existing keys interleaved with new ones, across several executemany chunks
+            batch = _events(*(f"2026-01-01T00:00:0{i}" for i in range(1, 8)))
+            ids = await insert_events(db, batch, chunk_size=3)
+            await db.commit()
+
+            stored = dict(((s, ts), i) for i, s, ts in (await db.execute(select(Event.id, Event.source, Event.timestamp))).all())
+            count = (await db.execute(select(func.count(Event.id)))).scalar()
+        return first, ids, stored, count
+
+    first, ids, stored, count = run_db(body)
+    assert count == 7
+    assert set(ids) == {("OTX", f"2026-01-01T00:00:0{i}") for i in (2, 4, 5, 6, 7)}
+    # every returned id is the row stored under that key, and the conflicting rows kept theirs
+    assert all(stored[key] == event_id for key, event_id in ids.items())
+    assert all(stored[key] == event_id for key, event_id in first.items())
+
+def test_insert_events_same_timestamp_different_sources(run_db):
+    async def body():
+        async with AsyncSessionLocal() as db:
+            ids = await insert_events(db, _events("2026-01-01T00:00:00") + _events("2026-01-01T00:00:00", source="AbuseIPDB"))
+            again = await insert_events(db, _events("2026-01-01T00:00:00", source="AbuseIPDB"))
+            await db.commit()
+        return ids, again
+
+    ids, again = run_db(body)
+    assert set(ids) == {("OTX", "2026-01-01T00:00:00"), ("AbuseIPDB", "2026-01-01T00:00:00")}
+    assert len(set(ids.values())) == 2
+    assert again == {}
@@ -0,0 +1,61 @@
+import time
+
+from sqlalchemy.future import select
+
+from backend.db.models import LogEntry
+from backend.db.session import AsyncSessionLocal
+from backend.db.work_queue import _trim_log_entries, drain_log_entries, read_log_entries
+from backend.utils.metrics import LOG_ENTRIES_DROPPED
+from backend.utils.responses import encode_log_payload
+
+def _entries(*numbers):
+    return [LogEntry(created_at=time.time(), data=encode_log_payload([{"id": n}, None, {"summary": f"event {n}"}]))
+            for n in numbers]
+
+def _dropped():
+    return LOG_ENTRIES_DROPPED.values.get((), 0)
+
+async def _stored_ids(db):
+    return (await db.execute(select(LogEntry.id).order_by(LogEntry.id))).scalars().all()
+
+def test_trim_keeps_the_newest_entries_and_counts_undelivered_drops(run_db):
+    async def body():
+        async with AsyncSessionLocal() as db:
+            entries = _entries(*range(6))
+            db.add_all(entries)
+            await db.commit()
+            ids = [entry.id for entry in entries]
+            # the two oldest have been handed out by GET /logs; the third has not
+            await drain_log_entries(db, limit=2)
+
+            dropped = _dropped()
+            await _trim_log_entries(db, capacity=3)
+            await db.commit()
+            return ids, await _stored_ids(db), _dropped() - dropped
+
+    ids, kept, dropped = run_db(body)
+    assert kept == ids[3:]
+    assert dropped == 1
+
+def test_cursor_behind_the_trimmed_range_resumes_at_the_oldest_kept_entry(run_db):
+    async def body():
+        async with AsyncSessionLocal() as db:
+            db.add_all(_entries(*range(5)))
+            await db.commit()
+            first = (await _stored_ids(db))[0]
+            await _trim_log_entries(db, capacity=2)
+            await db.commit()
+            behind = await read_log_entries(db, after=first, limit=10)
+
+            # ids are never reused, so a cursor at the newest entry only sees later ones even after a full trim
+            newest = (await _stored_ids(db))[-1]
+            await _trim_log_entries(db, capacity=0)
+            db.add_all(_entries(5))
+            await db.commit()
+            after_newest = await read_log_entries(db, after=newest, limit=10)
+        return first, behind, newest, after_newest
+
+    first, behind, newest, after_newest = run_db(body)
+    assert [entry_id for entry_id, _ in behind] == [first + 3, first + 4]
+    assert len(after_newest) == 1 and after_newest[0][0] > newest
+    assert b"event 5" in after_newest[0][1]
@@ -0,0 +1,68 @@
+import time
+
+import httpx
+from sqlalchemy.future import select
+
+from backend.db.models import LogEntry
+from backend.db.session import AsyncSessionLocal
+from backend.utils.responses import STREAM_PAGE_THRESHOLD, encode_log_payload
+
+def _payload(n):
+    return [{"id": n, "source": "OTX", "timestamp": f"2026-01-01T00:00:{n:02d}"}, None, {"summary": f"event {n}"}]
+
+async def _seed(count):
+    async with AsyncSessionLocal() as db:
+        entries = [LogEntry(created_at=time.time(), data=encode_log_payload(_payload(n))) for n in range(count)]
+        db.add_all(entries)
+        await db.commit()
+        return [entry.id for entry in entries]
+
+async def _pages(client, after, limit):
+    """Follows `next` until a page comes back empty; returns every page and the final cursor."""
+    pages = []
+    while True:
+        body = (await client.get("/logs", params={"after": after, "limit": limit})).json()
+        pages.append([log[2]["summary"] for log in body["logs"]])
+        if not body["logs"]:
+            return pages, body["next"]
+        assert body["next"] > after
+        after = body["next"]
+
+def test_cursor_pages_advance_and_hold_on_an_empty_page(run_db):
+    from backend.main import app
+
+    async def body():
+        ids = await _seed(5)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            pages, last = await _pages(client, 0, 2)
+            # asking again past the end keeps handing back the same cursor
+            again = (await client.get("/logs", params={"after": last, "limit": 2})).json()
+            streamed, streamed_last = await _pages(client, 0, STREAM_PAGE_THRESHOLD + 1)
+        return ids, pages, last, again, streamed, streamed_last
+
+    ids, pages, last, again, streamed, streamed_last = run_db(body)
+    assert pages == [["event 0", "event 1"], ["event 2", "event 3"], ["event 4"], []]
+    assert last == ids[-1]
+    assert again == {"logs": [], "next": ids[-1]}
+    # large pages are streamed, with the same cursor semantics
+    assert streamed == [[f"event {n}" for n in range(5)], []]
+    assert streamed_last == ids[-1]
+
+def test_cursor_paging_is_read_only(run_db):
+    from backend.main import app
+
+    async def body():
+        await _seed(3)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            await _pages(client, 0, 2)
+            async with AsyncSessionLocal() as db:
+                delivered = (await db.execute(select(LogEntry.delivered))).scalars().all()
+            # the draining form still hands out everything, once
+            drained = (await client.get("/logs")).json()
+            drained_again = (await client.get("/logs")).json()
+        return delivered, drained, drained_again
+
+    delivered, drained, drained_again = run_db(body)
+    assert delivered == [False, False, False]
+    assert [log[2]["summary"] for log in drained["logs"]] == ["event 0", "event 1", "event 2"]
+    assert drained_again == {"logs": []}
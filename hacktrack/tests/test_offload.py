@@ -0,0 +1,45 @@
+import time
+import asyncio
+
+from backend.utils import offload
+from backend.utils.offload import LoopLagMonitor, offload_map, offload_parse
+
+def test_offload_map_keeps_order_across_batches():
+    items = list(range(23))
+    assert asyncio.run(offload_map(lambda n: n * n, items, batch_size=5)) == [n * n for n in items]
+    assert asyncio.run(offload_map(len, [])) == []
+
+def test_offload_parse_runs_small_payloads_inline(monkeypatch):
+    handed_off = []
+
+    async def fake_offload(fn, *args):
+        handed_off.append(args)
+        return fn(*args)
+
+    monkeypatch.setattr(offload, "offload", fake_offload)
+    monkeypatch.setattr(offload, "OFFLOAD_MIN_BYTES", 10)
+    assert asyncio.run(offload_parse(len, b"small")) == 5
+    assert asyncio.run(offload_parse(len, b"x" * 10)) == 10
+    assert handed_off == [(b"x" * 10,)]
+
+def test_inline_executor_runs_on_the_loop(monkeypatch):
+    monkeypatch.setattr(offload, "OFFLOAD_EXECUTOR", "inline")
+    monkeypatch.setattr(offload, "_executor", None)
+    assert offload.get_executor() is None
+    assert asyncio.run(offload.offload(sum, [1, 2, 3])) == 6
+
+def test_loop_lag_monitor_sees_a_blocked_loop():
+    monitor = LoopLagMonitor(interval=0.01, warn_after=float("inf"))
+
+    async def body():
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.05)
+        # hold the loop the way a synchronous parse would
+        time.sleep(0.1)
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(body())
+    assert max(monitor.samples) >= 0.08
+    assert monitor.take_worst() >= 0.08
+    assert monitor.take_worst() == 0.0
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import httpx
+
+from backend.db.session import AsyncSessionLocal
+from backend.db.sync_state import get_sync_state
+from backend.ingest import otx
+from backend.ingest.http import http_pool
+from backend.ingest.otx import OTX_WATERMARK_KEY, OTXCollector
+
+START = datetime(2026, 1, 1)
+
+class PulseFeed:
+    """Answers /search/pulses like OTX: filtered by modified_since, sorted by `sort`, paged by page/limit."""
+    def __init__(self):
+        self.pulses = []
+        self.requests = []
+        self.fail_on_page = None
+
+    def add(self, first, count):
+        """Pulses first..first+count-1, each modified one minute after the previous."""
+        for n in range(first, first + count):
+            self.pulses.append({"id": f"pulse-{n}", "name": f"pulse {n}",
+                                "modified": (START + timedelta(minutes=n)).isoformat()})
+
+    def handle(self, request):
+        params = request.url.params
+        since, page, limit = params.get("modified_since"), int(params["page"]), int(params["limit"])
+        self.requests.append((params["sort"], since, page))
+        if page == self.fail_on_page:
+            return httpx.Response(400, json={"detail": "injected failure"})
+        pulses = sorted((p for p in self.pulses if not since or p["modified"] > since),
+                        key=lambda p: p["modified"], reverse=params["sort"].startswith("-"))
+        return httpx.Response(200, json={"results": pulses[(page - 1) * limit:page * limit], "count": len(pulses)})
+
+def _setup(monkeypatch, feed):
+    monkeypatch.setattr(otx, "OTX_API_KEY", "test")
+    monkeypatch.setattr(otx, "PAGE_SIZE", 2)
+    monkeypatch.setattr(otx, "MAX_PAGES", 2)
+    monkeypatch.setattr(http_pool, "transport", httpx.MockTransport(feed.handle))
+
+async def _run(collector):
+    """One collector run; returns the pulse numbers it yielded and the watermark it left."""
+    fetched = []
+    async with AsyncSessionLocal() as db:
+        try:
+            async for page in collector.batches(db):
+                fetched += [int(event["raw"]["pulse_id"].split("-")[1]) for event in page]
+        except httpx.HTTPStatusError:
+            pass
+        return fetched, await get_sync_state(db, OTX_WATERMARK_KEY)
+
+def _at(n):
+    return (START + timedelta(minutes=n)).isoformat()
+
+def test_backlog_longer_than_max_pages_is_caught_up_over_several_runs(run_db, monkeypatch):
+    feed = PulseFeed()
+    _setup(monkeypatch, feed)
+
+    async def body():
+        collector = OTXCollector()
+        runs = []
+        try:
+            feed.add(0, 10)
+            # first run: newest first, as far as MAX_PAGES goes
+            runs.append(await _run(collector))
+            # an outage's worth of new pulses, more than one run's MAX_PAGES * PAGE_SIZE
+            feed.add(10, 9)
+            feed.requests.clear()
+            for _ in range(3):
+                runs.append(await _run(collector))
+            return runs, feed.requests
+        finally:
+            await http_pool.aclose()
+
+    runs, requests = run_db(body)
+    assert runs[0] == ([9, 8, 7, 6], _at(9))
+    # oldest first from the watermark, each run picking up where the last one stopped
+    assert runs[1] == ([10, 11, 12, 13], _at(13))
+    assert runs[2] == ([14, 15, 16, 17], _at(17))
+    assert runs[3] == ([18], _at(18))
+    assert requests[:2] == [("modified", _at(9), 1), ("modified", _at(9), 2)]
+
+def test_a_failed_page_keeps_the_pages_written_before_it(run_db, monkeypatch):
+    feed = PulseFeed()
+    _setup(monkeypatch, feed)
+
+    async def body():
+        collector = OTXCollector()
+        try:
+            feed.add(0, 1)
+            await _run(collector)
+            feed.add(1, 4)
+            feed.fail_on_page = 2
+            failed = await _run(collector)
+            feed.fail_on_page = None
+            return failed, await _run(collector)
+        finally:
+            await http_pool.aclose()
+
+    failed, retried = run_db(body)
+    assert failed == ([1, 2], _at(2))
+    assert retried == ([3, 4], _at(4))
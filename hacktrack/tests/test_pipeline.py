@@ -0,0 +1,65 @@
+import time
+import asyncio
+
+from sqlalchemy.future import select
+
+from backend.db.models import Event
+from backend.db.session import AsyncSessionLocal
+from backend.utils import pipeline
+from backend.utils.pipeline import SummaryPipeline
+
+async def _seed(count):
+    async with AsyncSessionLocal() as db:
+        db.add_all([Event(source="OTX", timestamp=f"2026-01-01T00:00:0{n}", sched_key=n) for n in range(count)])
+        await db.commit()
+
+async def _claim_until(summary_pipeline, queued):
+    """Runs the claim stage until `queued` events are waiting for a summarise worker, then stops it."""
+    async def waiting():
+        while summary_pipeline.summarise_queue.qsize() < queued:
+            await asyncio.sleep(0.01)
+        # let the claimer block on the full queue before stopping it
+        await asyncio.sleep(0.05)
+
+    task = asyncio.create_task(summary_pipeline._claim())
+    try:
+        await asyncio.wait_for(waiting(), timeout=5)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+async def _rows():
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(Event.sched_key, Event.status, Event.claimed_by, Event.lease_expires_at)
+                                 .order_by(Event.sched_key))).all()
+
+def test_failed_arc_preview_still_queues_the_event(run_db, monkeypatch):
+    def preview(event):
+        raise ValueError("no arc")
+
+    monkeypatch.setattr(pipeline, "publish_arc_preview", preview)
+
+    async def body():
+        await _seed(2)
+        summary_pipeline = SummaryPipeline(claim_size=2, summarise_workers=1, idle_poll=0.05)
+        await _claim_until(summary_pipeline, 2)
+        return [summary_pipeline.summarise_queue.get_nowait().sched_key for _ in range(2)], await _rows()
+
+    queued, rows = run_db(body)
+    assert queued == [0, 1]
+    assert [status for _, status, _, _ in rows] == ["claimed", "claimed"]
+
+def test_claimed_events_that_never_reach_a_worker_are_released(run_db):
+    async def body():
+        await _seed(2)
+        # room in the queue for one of the two claimed events
+        summary_pipeline = SummaryPipeline(claim_size=2, summarise_workers=1, queue_size=1, idle_poll=0.05)
+        await _claim_until(summary_pipeline, 1)
+        return dict(summary_pipeline.in_flight), await _rows(), time.time()
+
+    in_flight, rows, now = run_db(body)
+    (first, first_status, first_owner, _), (second, second_status, second_owner, second_lease) = rows
+    assert first_status == "claimed" and first_owner is not None
+    # the second goes straight back, claimable at once rather than when its lease runs out
+    assert (second_status, second_owner) == ("pending", None) and second_lease <= now
+    assert len(in_flight) == 1
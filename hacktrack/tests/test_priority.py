@@ -0,0 +1,36 @@
+import time
+
+from backend.db.history import append_history, history_row
+from backend.db.session import AsyncSessionLocal
+from backend.ingest.collectors import normalised_event
+from backend.utils.priority import PairNovelty, pair_key, seed_pair_novelty
+
+def _published(attacker, victim, count):
+    """History rows for `count` summarised events whose arc resolved to these countries."""
+    event = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()), "source": "OTX",
+             "resolved_attacker_country": attacker, "resolved_victim_country": victim}
+    return [history_row(None, [event, None, {}]) for _ in range(count)]
+
+def test_pair_key_uses_the_same_codes_as_history():
+    # feed codes, names and text cues all land on ISO alpha-2 codes
+    assert pair_key(normalised_event("AbuseIPDB", "2026-01-01T00:00:00", attacker_country="CHN",
+                                     victim_country="Germany")) == ("CN", "DE")
+    assert pair_key(normalised_event("OTX", "2026-01-01T00:00:00",
+                                     title="China-nexus actor targeting Germany")) == ("CN", "DE")
+    assert pair_key(normalised_event("OTX", "2026-01-01T00:00:00")) == (None, None)
+    assert pair_key({"attacker_country": "RU", "victim_country": "US"}) == ("RU", "US")
+
+def test_seeded_history_makes_familiar_ingest_pairs_less_novel(run_db):
+    async def body():
+        async with AsyncSessionLocal() as db:
+            await append_history(db, _published("China", "Germany", 10) + _published("Russia", "Ukraine", 2))
+            await db.commit()
+            tracker = PairNovelty()
+            return await seed_pair_novelty(db, tracker=tracker), tracker
+
+    seeded, tracker = run_db(body)
+    assert seeded == 2
+    familiar = pair_key(normalised_event("OTX", "2026-01-01T00:00:00", attacker_country="CN", victim_country="Germany"))
+    occasional = pair_key(normalised_event("OTX", "2026-01-01T00:00:00", attacker_country="RUS", victim_country="UA"))
+    unseen = pair_key(normalised_event("OTX", "2026-01-01T00:00:00", attacker_country="Brazil", victim_country="Japan"))
+    assert tracker.novelty(familiar) < tracker.novelty(occasional) < tracker.novelty(unseen) == 1.0
@@ -0,0 +1,46 @@
+from sqlalchemy.future import select
+
+from backend.db.models import Event
+from backend.db.retention import trim_event_table
+from backend.db.session import AsyncSessionLocal
+from backend.db.work_queue import claim_events, complete_events
+
+def _payload(event):
+    return [{"id": event.id, "source": event.source, "timestamp": event.timestamp}, None,
+            {"summary": "x", "attacker_country": "China", "victim_country": "Germany"}]
+
+async def _seed(db, *timestamps):
+    # claimed oldest first
+    db.add_all([Event(source="OTX", timestamp=ts, sched_key=n) for n, ts in enumerate(timestamps)])
+    await db.commit()
+
+async def _timestamps(db):
+    return sorted((await db.execute(select(Event.timestamp))).scalars().all())
+
+def test_claimed_events_survive_the_count_cap(run_db):
+    async def body():
+        async with AsyncSessionLocal() as db:
+            await _seed(db, *(f"2026-01-01T00:00:0{n}" for n in range(5)))
+            claimed = await claim_events(db, limit=2, worker_id="w1")
+            deleted = await trim_event_table(db, max_events=1, max_age_hours=0)
+            kept = await _timestamps(db)
+            # the worker can still publish what it was summarising
+            published = await complete_events(db, [e.id for e in claimed], [_payload(e) for e in claimed], worker_id="w1")
+        return deleted, kept, published
+
+    deleted, kept, published = run_db(body)
+    assert deleted == 2
+    assert kept == ["2026-01-01T00:00:00", "2026-01-01T00:00:01", "2026-01-01T00:00:04"]
+    assert published == 2
+
+def test_claimed_events_survive_the_age_limit(run_db):
+    async def body():
+        async with AsyncSessionLocal() as db:
+            await _seed(db, "2000-01-01T00:00:00", "2000-01-01T00:00:01", "2999-01-01T00:00:00")
+            await claim_events(db, limit=1, worker_id="w1")
+            deleted = await trim_event_table(db, max_events=100, max_age_hours=1)
+            return deleted, await _timestamps(db)
+
+    deleted, kept = run_db(body)
+    assert deleted == 1
+    assert kept == ["2000-01-01T00:00:00", "2999-01-01T00:00:00"]
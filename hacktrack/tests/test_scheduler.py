@@ -0,0 +1,152 @@
+import time
+import asyncio
+
+from backend.db.session import AsyncSessionLocal
+from backend.db.sync_state import acquire_lease, release_lease
+from backend.ingest import collectors
+from backend.ingest.collectors import Collector, normalised_event
+from backend.ingest.scheduler import CollectorHealth, CollectorScheduler
+
+class Feed(Collector):
+    name = "Feed"
+    schedule = "0.05"
+
+    def __init__(self, batches=()):
+        super().__init__()
+        self._batches = list(batches)
+        self.calls = 0
+
+    async def batches(self, db):
+        self.calls += 1
+        for batch in self._batches:
+            yield batch
+
+def _scheduler(collector, **kwargs):
+    scheduler = CollectorScheduler([collector], **kwargs)
+    scheduler.health[collector.name] = CollectorHealth(collector)
+    return scheduler, scheduler.health[collector.name]
+
+# START OF LEASES
+
+def test_lease_is_exclusive_until_released_or_expired(run_db):
+    async def body():
+        async with AsyncSessionLocal() as db:
+            results = [
+                await acquire_lease(db, "feed", "a", 60),
+                await acquire_lease(db, "feed", "b", 60),
+                # the holder renews
+                await acquire_lease(db, "feed", "a", 60),
+            ]
+            await release_lease(db, "feed", "a")
+            results.append(await acquire_lease(db, "feed", "b", -1))
+            # b's lease has already expired, so a may take it over
+            results.append(await acquire_lease(db, "feed", "a", 60))
+        return results
+
+    assert run_db(body) == [True, False, True, True, True]
+
+def test_run_skips_feed_leased_by_another_process(run_db):
+    async def body():
+        collector = Feed()
+        scheduler, health = _scheduler(collector)
+        async with AsyncSessionLocal() as db:
+            await acquire_lease(db, "collector.Feed.lease", "elsewhere:1", 60)
+        await scheduler._run(collector, health, time.time())
+        return collector.calls, health
+
+    calls, health = run_db(body)
+    assert calls == 0
+    assert (health.leased_elsewhere, health.runs, health.status()) == (1, 0, "pending")
+
+def test_run_records_success_and_releases_lease(run_db):
+    async def body():
+        collector = Feed([[normalised_event("Feed", "2026-01-01T00:00:00", title="scan")]])
+        scheduler, health = _scheduler(collector)
+        await scheduler._run(collector, health, time.time())
+        async with AsyncSessionLocal() as db:
+            free = await acquire_lease(db, "collector.Feed.lease", "other:1", 60)
+        return health, free
+
+    health, free = run_db(body)
+    assert (health.status(), health.runs, health.last_fetched, health.last_inserted) == ("ok", 1, 1, 1)
+    assert health.newest_event_at is not None
+    assert free
+
+def test_run_failure_is_reported_in_health(run_db):
+    class Broken(Feed):
+        async def batches(self, db):
+            raise RuntimeError("feed down")
+            yield []
+
+    async def body():
+        collector = Broken()
+        scheduler, health = _scheduler(collector)
+        await scheduler._run(collector, health, time.time())
+        return health
+
+    health = run_db(body)
+    assert health.status() == "failing"
+    assert health.consecutive_failures == 1
+    assert "feed down" in health.last_error
+    assert not health.running
+
+# END OF LEASES
+
+# START OF OVERLAPS
+
+def test_overlapping_runs_are_skipped():
+    async def body():
+        collector = Feed()
+        scheduler, health = _scheduler(collector)
+        started = []
+
+        async def slow_run(collector, health, due):
+            started.append(due)
+            await asyncio.sleep(0.12)
+
+        scheduler._run = slow_run
+        loop = asyncio.create_task(scheduler._loop(collector))
+        await asyncio.sleep(0.5)
+        loop.cancel()
+        return started, health
+
+    started, health = asyncio.run(body())
+    # due every 0.05s while each run takes 0.12s: only every third or so may start
+    assert 2 <= len(started) <= 5
+    assert health.overlaps_skipped >= 4
+    assert started == sorted(started)
+
+# END OF OVERLAPS
+
+# START OF STARTUP
+
+class Keyless(Collector):
+    name = "Keyless"
+    schedule = "600"
+
+    def __init__(self):
+        raise RuntimeError("KEYLESS_API_KEY environment variable is required")
+
+    async def batches(self, db):
+        yield []
+
+def test_collector_that_cannot_be_created_leaves_the_others_running(run_db, monkeypatch):
+    monkeypatch.setattr(collectors, "COLLECTORS", f"{__name__}:Keyless,{__name__}:Feed")
+
+    async def body():
+        scheduler = CollectorScheduler()
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.2)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return scheduler
+
+    scheduler = run_db(body)
+    assert [type(c) for c in scheduler.collectors] == [Feed]
+    assert scheduler.collectors[0].calls >= 1
+    keyless, feed = scheduler.snapshot()
+    assert (keyless["name"], keyless["schedule"], keyless["status"]) == ("Keyless", "600", "failing")
+    assert "KEYLESS_API_KEY" in keyless["last_error"]
+    assert feed["name"] == "Feed" and feed["runs"] >= 1
+
+# END OF STARTUP
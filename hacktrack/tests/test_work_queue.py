@@ -0,0 +1,103 @@
+from backend.db.models import Event
+from backend.db.session import AsyncSessionLocal
+from backend.db.work_queue import claim_events
+from backend.utils.priority import QuotaRotation
+
+def _rows(source, count, first_key):
+    return [Event(source=source, timestamp=f"2026-01-01T00:{n // 60:02d}:{n % 60:02d}", sched_key=first_key + n)
+            for n in range(count)]
+
+async def _seed(*groups):
+    async with AsyncSessionLocal() as db:
+        for rows in groups:
+            db.add_all(rows)
+        await db.commit()
+
+# START OF QUOTAS
+
+def test_quotas_split_by_share_and_fill_the_batch():
+    assert QuotaRotation({"AbuseIPDB": 0.5, "OTX": 0.5}).quotas(10) == {"AbuseIPDB": 5, "OTX": 5}
+    rotation = QuotaRotation({"AbuseIPDB": 3, "OTX": 1})
+    first, second = rotation.quotas(10), rotation.quotas(10)
+    assert sum(first.values()) == sum(second.values()) == 10
+    # the half row each batch can't split carries over: 15 and 5 across the two
+    assert (first["AbuseIPDB"] + second["AbuseIPDB"], first["OTX"] + second["OTX"]) == (15, 5)
+
+def test_single_slots_rotate_through_every_source():
+    rotation = QuotaRotation({"AbuseIPDB": 0.5, "OTX": 0.5})
+    assert [list(rotation.quotas(1)) for _ in range(4)] == [["AbuseIPDB"], ["OTX"], ["AbuseIPDB"], ["OTX"]]
+    rotation = QuotaRotation({"AbuseIPDB": 3, "OTX": 1})
+    picks = [source for _ in range(8) for source in rotation.quotas(1)]
+    assert picks.count("AbuseIPDB") == 6 and picks.count("OTX") == 2
+
+def test_sources_without_a_share_get_no_quota():
+    assert QuotaRotation({"AbuseIPDB": 1, "OTX": 0}).quotas(10) == {"AbuseIPDB": 10}
+    assert QuotaRotation({}).quotas(10) == {}
+
+# END OF QUOTAS
+
+# START OF CLAIMS
+
+def test_each_source_gets_its_share_despite_priority(run_db):
+    async def body():
+        # every AbuseIPDB row sorts ahead of every OTX row
+        await _seed(_rows("AbuseIPDB", 30, 0), _rows("OTX", 30, 1000))
+        async with AsyncSessionLocal() as db:
+            return await claim_events(db, limit=10, worker_id="w1")
+
+    events = run_db(body)
+    assert sorted(e.source for e in events) == ["AbuseIPDB"] * 5 + ["OTX"] * 5
+    # the most urgent rows of each source, returned in claim order
+    assert [e.sched_key for e in events] == [0, 1, 2, 3, 4, 1000, 1001, 1002, 1003, 1004]
+    assert {e.status for e in events} == {"claimed"} and {e.claimed_by for e in events} == {"w1"}
+
+def test_unused_share_is_topped_up_from_the_global_order(run_db):
+    async def body():
+        await _seed(_rows("AbuseIPDB", 30, 100), _rows("OTX", 2, 0), _rows("Other", 3, 50))
+        async with AsyncSessionLocal() as db:
+            return await claim_events(db, limit=10, worker_id="w1")
+
+    events = run_db(body)
+    sources = [e.source for e in events]
+    assert len(events) == 10
+    assert sources.count("OTX") == 2
+    # OTX left three rows of its share unused; they go to the lowest sched_key of any source
+    assert sources.count("Other") == 3
+    assert sources.count("AbuseIPDB") == 5
+
+def test_one_free_slot_alternates_between_sources(run_db):
+    async def body():
+        # every AbuseIPDB row sorts ahead of every OTX row
+        await _seed(_rows("AbuseIPDB", 4, 0), _rows("OTX", 4, 1000))
+        rotation = QuotaRotation({"AbuseIPDB": 0.5, "OTX": 0.5})
+        async with AsyncSessionLocal() as db:
+            return [(await claim_events(db, limit=1, worker_id="w1", rotation=rotation))[0] for _ in range(4)]
+
+    events = run_db(body)
+    assert [e.source for e in events] == ["AbuseIPDB", "OTX", "AbuseIPDB", "OTX"]
+
+def test_claimed_rows_wait_for_their_lease(run_db):
+    async def body():
+        await _seed(_rows("AbuseIPDB", 4, 0))
+        async with AsyncSessionLocal() as db:
+            first = await claim_events(db, limit=2, worker_id="w1")
+            second = await claim_events(db, limit=4, worker_id="w2")
+            third = await claim_events(db, limit=4, worker_id="w3")
+        return first, second, third
+
+    first, second, third = run_db(body)
+    assert [e.sched_key for e in first] == [0, 1]
+    assert [e.sched_key for e in second] == [2, 3]
+    assert third == []
+
+def test_expired_leases_are_claimable_again(run_db):
+    async def body():
+        await _seed(_rows("OTX", 3, 0))
+        async with AsyncSessionLocal() as db:
+            await claim_events(db, limit=3, worker_id="crashed", lease_seconds=-1)
+            return await claim_events(db, limit=3, worker_id="w2")
+
+    events = run_db(body)
+    assert [(e.sched_key, e.claimed_by) for e in events] == [(0, "w2"), (1, "w2"), (2, "w2")]
+
+# END OF CLAIMS